@@ -3,10 +3,38 @@
 
 """Config package"""
 
-from .config_example import CONFIG_EXAMPLE, LOG_CONFIG, COOKIE_CONFIG
+from .config_example import (
+    CONFIG_EXAMPLE,
+    LOG_CONFIG,
+    COOKIE_CONFIG,
+    STATION_CONFIG,
+    SALE_TRIGGER_CONFIG,
+    CLOCK_SYNC_CONFIG,
+    SCHEDULER_CONFIG,
+    THROTTLE_CONFIG,
+    SESSION_WARM_CONFIG,
+    QUERY_CACHE_CONFIG,
+    FANOUT_CONFIG,
+    SELECTION_CONFIG,
+    POLL_CONFIG,
+    TRACE_CONFIG,
+    DUMP_CONFIG
+)
 
 __all__ = [
     'CONFIG_EXAMPLE',
     'LOG_CONFIG',
-    'COOKIE_CONFIG'
+    'COOKIE_CONFIG',
+    'STATION_CONFIG',
+    'SALE_TRIGGER_CONFIG',
+    'CLOCK_SYNC_CONFIG',
+    'SCHEDULER_CONFIG',
+    'THROTTLE_CONFIG',
+    'SESSION_WARM_CONFIG',
+    'QUERY_CACHE_CONFIG',
+    'FANOUT_CONFIG',
+    'SELECTION_CONFIG',
+    'POLL_CONFIG',
+    'TRACE_CONFIG',
+    'DUMP_CONFIG'
 ]
@@ -25,11 +25,114 @@ CONFIG_EXAMPLE = {
 LOG_CONFIG = {
     'filename': '12306.log',
     'level': 'INFO',
-    'format': '%(asctime)s - %(levelname)s - %(message)s'
+    'format': '%(asctime)s - %(levelname)s - %(message)s',
+    'queue': True,  # 日志放入队列，由后台线程格式化并写出
+    'critical_window': True,  # 开售触发后的订票过程中只保留较高级别的日志
+    'critical_window_level': 'WARNING'
 }
 
 # Cookie配置
 COOKIE_CONFIG = {
-    'filename': 'cookies.pkl',
+    'filename': 'cookies.pkl',  # 旧版cookies文件，会话存储中没有账号时加载
+    'store': 'sessions.db',  # 按账号保存cookies的SQLite文件
+    'account': None,  # 启动时加载的账号，为空时加载最近登录的账号
     'auto_save': True  # 登录后自动保存
 }
+
+# 车站数据配置（相对路径按项目根目录解析）
+STATION_CONFIG = {
+    'source': 'data/station_name.js',  # 12306全国车站列表，可用 python -m tools.update_stations 下载
+    'cache': 'data/station_name.bin'  # 编译后的二进制缓存，按源文件哈希自动重建
+}
+
+# 开售触发配置（毫秒）
+SALE_TRIGGER_CONFIG = {
+    'lead_ms': 0,  # 提前触发的时间，可用于抵消请求到达服务器的网络延迟
+    'coarse_ms': 1000,  # 距离开售多于此值时每次最多睡眠1秒
+    'fine_step_ms': 10,  # 接近开售时的单次睡眠上限
+    'spin_ms': 2,  # 最后多少毫秒忙等
+    'record_file': 'trigger_records.jsonl'  # 每次触发的实际偏差记录，None表示不记录
+}
+
+# 服务器时钟同步配置
+CLOCK_SYNC_CONFIG = {
+    'enabled': True,  # 按12306服务器时间触发抢票
+    'path': '/otn/leftTicket/init',  # 采样请求路径（HEAD请求，读取响应头Date）
+    'samples': 8,  # 每次同步最多采样次数，每次最多等待1秒
+    'target_error_ms': 20,  # 误差上限低于此值时提前结束采样
+    'resync_before_s': 60,  # 开售前多少秒重新同步一次
+    'max_age_s': 300  # 多个任务共用时钟时，距上次同步不超过此秒数则不重复同步
+}
+
+# 请求限速与熔断配置
+THROTTLE_CONFIG = {
+    'enabled': True,  # 进程内所有会话、任务共用
+    'limits': {  # 接口类别: (每秒请求数, 突发上限)
+        'query': (2, 4),  # 余票查询
+        'order': (5, 10),  # 下单各步骤
+        'order_page': (5, 10),  # 下单流程中的页面（initDc、提交订单前的leftTicket/init）
+        'poll': (4, 4),  # 排队轮询
+        'page': (1, 2),  # 查询前的首页访问、登录页面等
+        'auth': (2, 4)  # 登录相关
+    },
+    'failure_threshold': 3,  # 连续过载（5xx/429、返回HTML、系统繁忙）多少次后熔断
+    'cooldown_s': 2,  # 首次熔断的冷却秒数，探测仍过载时加倍
+    'max_cooldown_s': 30
+}
+
+# 会话预热配置
+SESSION_WARM_CONFIG = {
+    'cookies': ['JSESSIONID', 'route', 'BIGipServerotn'],  # 访问首页获得的引导cookies
+    'max_age_s': 600  # 引导cookies齐全且获取不超过该秒数时，查询前不再访问首页
+}
+
+# 余票查询缓存配置
+QUERY_CACHE_CONFIG = {
+    'enabled': True,  # 同一线路短时间内的查询复用结果，开售后的订票流程始终直接请求
+    'ttl_s': 3,  # 结果有效秒数
+    'max_entries': 64  # 缓存的线路数上限，超出时淘汰最久未使用的
+}
+
+# 多日期、多线路并发查询配置
+FANOUT_CONFIG = {
+    'max_concurrent': 4,  # 同时在途的查询数上限
+    'max_requests': 20  # 一次并发查询的总请求数上限，超出的组合不查询
+}
+
+# 按选择规则自动选择车次的配置
+SELECTION_CONFIG = {
+    'max_candidates': 3  # 满足规则的最优车次依次提交，前一个提交失败时改选下一个
+}
+
+# 订单状态轮询配置（秒）
+POLL_CONFIG = {
+    'deadline_s': 300,  # 总截止时间
+    'fast_interval': 0.25,  # 开始阶段的轮询间隔
+    'fast_phase_s': 3,  # 开始阶段时长，多数订单在这段时间内完成
+    'max_interval': 5,  # 之后间隔按backoff倍数增长到此上限
+    'backoff': 1.5,
+    'wait_time_factor': 0.5,  # 服务器返回waitTime时，下次轮询不早于waitTime的这一比例
+    'jitter': 0.2  # 开始阶段之后间隔的随机抖动比例（±）
+}
+
+# 请求耗时追踪配置
+TRACE_CONFIG = {
+    'enabled': False,  # 记录订票流程中每个请求的DNS/建连/首字节/总耗时和收发字节数
+    'file': 'spans.jsonl',  # 追加写入的JSON Lines文件，None表示只打印汇总表
+    'summary': True  # 每次订票流程结束后打印汇总表
+}
+
+# 调试响应转储配置
+DUMP_CONFIG = {
+    'enabled': False,  # 在内存中保留最近的调试响应（确认乘客页面、非JSON的查询响应），失败时写入归档
+    'archive': 'dumps/dumps.zip',  # zip归档，含index.json索引
+    'max_entries': 20,  # 内存中保留的响应条数
+    'max_archive_mb': 5,  # 归档超过该大小后轮转
+    'backup_count': 3  # 保留的旧归档个数
+}
+
+# 多任务调度配置
+SCHEDULER_CONFIG = {
+    'max_concurrent': 4,  # 开售触发后同时订票的任务数上限，超过时按触发顺序轮候（开售前的等待不受限制）
+    'wake_before_s': 120  # 开售前多少秒唤醒任务（检查登录、获取乘客、重新同步时钟）
+}
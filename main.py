@@ -3,32 +3,45 @@
 
 """主程序入口"""
 
+import argparse
+import asyncio
+import contextlib
 import sys
 import os
+from datetime import datetime, timedelta
+from functools import cached_property
 
-from utils import setup_logging, STATION_MAPPING, get_logger
-from services import (
-    TrainTicketDebugger,
-    AuthService,
-    CookieService,
-    OrderQueryService,
-    OrderSubmitService,
-    GrabTicketService
-)
-import requests
+from utils import setup_logging, SEAT_TYPE_MAPPING, get_logger, get_station_index
+from utils.constants import BASE_URL
+from config import (LOG_CONFIG, COOKIE_CONFIG, CLOCK_SYNC_CONFIG, SCHEDULER_CONFIG, TRACE_CONFIG, DUMP_CONFIG,
+                    QUERY_CACHE_CONFIG, SESSION_WARM_CONFIG, FANOUT_CONFIG, THROTTLE_CONFIG, SELECTION_CONFIG)
+from models import TrainRecordList, BookingContext, SessionWarmState, SeatMatrix, JobSpecError, load_jobs
+# services包按需导入各服务模块，--check/--help 不加载任何服务，只查询时不加载下单、抢票等服务
+import services
 
 
 class TrainOrderManager:
     """火车订票管理器"""
     
-    def __init__(self):
-        """初始化订单管理器"""
-        # 设置日志
-        self.logger = setup_logging()
+    def __init__(self, base_url=BASE_URL, server_clock=None, trace_file=None, dump_archive=None,
+                 restore_session=True):
+        """
+        初始化订单管理器
+
+        Args:
+            base_url: 12306站点地址，可指向本地替身服务器
+            server_clock: 共用的服务器时钟（多任务调度时），默认新建
+            trace_file: 请求耗时追踪文件，指定时启用追踪（默认按TRACE_CONFIG）
+            dump_archive: 调试响应转储归档，指定时启用转储（默认按DUMP_CONFIG）
+            restore_session: 是否加载上次登录的会话（任务模式由run_job按任务账号加载）
+        """
+        # 日志由main()在进程启动时统一设置，每个任务的订单管理器只取用记录器
+        self.logger = get_logger('12306')
         
-        self.station_mapping = STATION_MAPPING
+        self.station_index = get_station_index()
 
         # 创建独立的session用于订单
+        import requests
         self.session = requests.Session()
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/140.0.0.0 Safari/537.36',
@@ -38,6 +51,28 @@ class TrainOrderManager:
             'Connection': 'keep-alive'
         })
 
+        # 所有服务共用的异步客户端
+        self.client = services.AsyncHttpClient(self.session, base_url=base_url)
+        if THROTTLE_CONFIG['enabled']:
+            # 所有会话、任务共用一组令牌桶和熔断器
+            self.client.throttle = services.get_shared_throttle(
+                THROTTLE_CONFIG['limits'],
+                failure_threshold=THROTTLE_CONFIG['failure_threshold'],
+                cooldown_s=THROTTLE_CONFIG['cooldown_s'],
+                max_cooldown_s=THROTTLE_CONFIG['max_cooldown_s']
+            )
+        self.trace_file = trace_file or TRACE_CONFIG['file']
+        if trace_file or TRACE_CONFIG['enabled']:
+            self.client.recorder = services.SpanRecorder()
+        if dump_archive or DUMP_CONFIG['enabled']:
+            self.client.dumps = services.DumpStore(
+                dump_archive or DUMP_CONFIG['archive'],
+                max_entries=DUMP_CONFIG['max_entries'],
+                max_archive_bytes=int(DUMP_CONFIG['max_archive_mb'] * 1024 * 1024),
+                backup_count=DUMP_CONFIG['backup_count'],
+                logger=self.logger
+            )
+
         # 订单相关配置
         self.order_config = {
             'preferred_trains': [],
@@ -50,29 +85,52 @@ class TrainOrderManager:
         # 订单状态
         self.current_train_info = None
         self.current_seat_type = None
-        self.passengers_data = None
-        self._target_train_no = None
-        self._target_seat_type = None
-        self._auto_select_passenger = False
-
-        # 初始化服务
-        self.auth_service = AuthService(self.session, self.logger)
-        self.cookie_service = CookieService(self.session, self.logger)
-        self.order_query_service = OrderQueryService(self.session, self.logger)
-        self.order_submit_service = OrderSubmitService(self.session, self.logger)
-        self.grab_ticket_service = GrabTicketService(self.session, self.logger)
-
-        # 加载cookies
-        self.load_cookies()
+        # 订票流程中获取的token、乘客列表等，各步骤共用
+        self.booking_context = BookingContext()
+
+        # 初始化服务（登录、下单、抢票相关服务在首次使用时创建）
+        self.cookie_service = services.CookieService(self.session, self.logger)
+        # 当前会话所属账号
+        self.account = None
+        if server_clock is not None:
+            self.server_clock = server_clock
+
+        # 加载上次登录的会话
+        if restore_session:
+            self.restore_session()
+
+    @cached_property
+    def auth_service(self):
+        return services.AuthService(self.session, self.logger, client=self.client)
+
+    @cached_property
+    def order_query_service(self):
+        return services.OrderQueryService(self.session, self.logger, client=self.client,
+                                          context=self.booking_context)
+
+    @cached_property
+    def order_submit_service(self):
+        return services.OrderSubmitService(self.session, self.logger, client=self.client,
+                                           context=self.booking_context)
+
+    @cached_property
+    def grab_ticket_service(self):
+        return services.GrabTicketService(self.session, self.logger)
+
+    @cached_property
+    def server_clock(self):
+        """12306服务器时钟，定时抢票按估计的服务器时间触发"""
+        return services.ServerClock(self.session, self.logger, client=self.client,
+                                    path=CLOCK_SYNC_CONFIG['path'])
 
     def _create_ticket_debugger(self):
         """创建票务查询器"""
         config = {
-            'base_url': 'https://kyfw.12306.cn/otn/leftTicket/query',
+            'base_url': self.client.url('/otn/leftTicket/query'),
             'headers': {
                 'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
                 'Accept': 'application/json, text/javascript, */*; q=0.01',
-                'Referer': 'https://kyfw.12306.cn/otn/leftTicket/init'
+                'Referer': self.client.url('/otn/leftTicket/init')
             },
             'query_params': {
                 'leftTicketDTO.train_date': '',
@@ -82,22 +140,90 @@ class TrainOrderManager:
             }
         }
 
-        debugger = TrainTicketDebugger(
+        # 进程内共用，多个任务监视同一线路时共用查询结果
+        cache = None
+        if QUERY_CACHE_CONFIG['enabled']:
+            cache = services.get_shared_query_cache(QUERY_CACHE_CONFIG['ttl_s'], QUERY_CACHE_CONFIG['max_entries'])
+
+        debugger = services.TrainTicketDebugger(
             config=config,
             session=self.session,
-            station_mapping=self.station_mapping,
-            logger=self.logger
+            station_index=self.station_index,
+            logger=self.logger,
+            client=self.client,
+            cache=cache,
+            warm_state=SessionWarmState(SESSION_WARM_CONFIG['cookies'], SESSION_WARM_CONFIG['max_age_s'])
         )
 
         return debugger
 
+    def _flush_trace(self):
+        """写出本次流程的请求耗时并打印汇总表"""
+        recorder = self.client.recorder
+        if recorder is None:
+            return
+        try:
+            recorder.flush(self.trace_file, summary=TRACE_CONFIG['summary'])
+        except OSError as e:
+            self.logger.warning("写入请求耗时记录失败: %s", e)
+
+    def flush_dumps(self, reason='manual', wait=False):
+        """
+        把保留的调试响应写入归档（后台线程），未启用转储时不做任何事
+
+        Args:
+            reason: 写出原因，写入归档索引
+            wait: 是否等待写入完成
+        """
+        dumps = self.client.dumps
+        if dumps is not None:
+            dumps.flush(reason, wait=wait)
+
+    def _ensure_session_store(self):
+        """首次使用时打开会话存储（进程内共用）"""
+        if self.cookie_service.store is None:
+            self.cookie_service.store = services.get_session_store(COOKIE_CONFIG['store'])
+        return self.cookie_service.store
+
+    def restore_session(self, account=None, record=None):
+        """
+        加载账号的会话
+
+        账号依次取参数、COOKIE_CONFIG['account']、会话存储中最近登录的账号；
+        会话存储中没有有效会话时加载旧版cookies文件。
+
+        Args:
+            account: 账号
+            record: 已预先读取的SessionRecord
+
+        Returns:
+            bool: 是否加载到有效的tk
+        """
+        if record is not None:
+            account = record.account
+        else:
+            account = account or COOKIE_CONFIG['account'] or self._ensure_session_store().latest_account()
+        if account:
+            self._ensure_session_store()
+            if self.cookie_service.load_session(account, record):
+                self.account = account
+                return True
+        return self.load_cookies(COOKIE_CONFIG['filename'])
+
     def load_cookies(self, filename='cookies.pkl'):
-        """加载cookies"""
+        """加载cookies（旧版pickle文件）"""
         return self.cookie_service.load_cookies(filename)
 
-    def save_cookies(self, filename='cookies.pkl'):
-        """保存cookies"""
-        return self.cookie_service.save_cookies(filename)
+    def save_cookies(self, filename=None):
+        """
+        保存cookies
+
+        已知当前账号时保存到会话存储，否则写入旧版cookies文件
+        """
+        if filename is None and self.account:
+            self._ensure_session_store()
+            return self.cookie_service.save_session(self.account)
+        return self.cookie_service.save_cookies(filename or COOKIE_CONFIG['filename'])
 
     def check_login_status(self):
         """检查登录状态"""
@@ -105,56 +231,111 @@ class TrainOrderManager:
 
     def login_process(self):
         """完整的登录流程"""
-        return self.auth_service.login_process()
+        success = self.auth_service.login_process()
+        if success:
+            # 重新登录后之前获取的乘客列表、token等不再可信
+            self.booking_context.reset()
+            self.account = self.auth_service.account
+            if COOKIE_CONFIG['auto_save']:
+                self.save_cookies()
+        return success
 
     def get_login_user_name(self):
-        """获取当前登录用户的姓名"""
-        return self.auth_service.get_login_user_name()
-
-    def query_available_trains(self):
+        """获取当前登录用户的姓名，已获取过时不再请求"""
+        return services.run_sync(self.get_login_user_name_async())
+
+    async def get_login_user_name_async(self):
+        """获取当前登录用户的姓名（异步），已获取过时不再请求"""
+        name = self.booking_context.get('login_user_name')
+        if name:
+            return name
+        name = await self.auth_service.get_login_user_name_async()
+        self.booking_context.set('login_user_name', name, 'queryLoginUser')
+        return name
+
+    def query_available_trains(self, bypass_cache=False):
         """查询可用车次"""
-        self.logger.info("开始查询可用车次...")
-        response_data = self.ticket_debugger.make_request()
+        return services.run_sync(self.query_available_trains_async(bypass_cache=bypass_cache))
 
-        if not response_data or not response_data.get('status'):
-            self.logger.error("查询车次失败")
+    async def query_available_trains_async(self, bypass_cache=False):
+        """
+        查询可用车次（异步）
+
+        Args:
+            bypass_cache: 不使用查询缓存（订票流程需要最新的secretStr和余票）
+        """
+        records = await self.iter_available_trains_async(bypass_cache=bypass_cache)
+        if records is None:
             return None
 
-        results = response_data.get('data', {}).get('result', [])
-        if not results:
+        available_trains = TrainRecordList(records)
+        if not available_trains:
             self.logger.warning("没有找到可用车次")
             return None
 
-        # 解析车次信息
-        available_trains = []
-        for result in results:
-            train_info = self.ticket_debugger.decode_train_info(result)
-            if train_info:
-                parts = result.split('|')
-                train_info['secretStr'] = parts[0]
-                train_info['seat_discount_info'] = 'M0097O0097W0097'
-                available_trains.append(train_info)
-
-        self.logger.info(f"找到 {len(available_trains)} 趟可用车次")
+        self.logger.info("找到 %s 趟可用车次", len(available_trains))
         return available_trains
 
+    def iter_available_trains(self, trains=None, bypass_cache=False, accept=None):
+        """查询车次，返回逐条解码的车次生成器"""
+        return services.run_sync(self.iter_available_trains_async(trains, bypass_cache=bypass_cache,
+                                                                   accept=accept))
+
+    async def iter_available_trains_async(self, trains=None, bypass_cache=False, accept=None):
+        """
+        查询车次（异步），返回逐条解码的车次生成器
+
+        调用方找到需要的车次后停止迭代，其余行不再解码。
+
+        Args:
+            trains: 只解码这些车次号，为空时解码全部
+            bypass_cache: 不使用查询缓存
+            accept: 原始车次字符串的预筛选函数，返回False的行不解码
+
+        Returns:
+            generator: TrainRecord生成器，查询失败时返回None
+        """
+        self.logger.info("开始查询可用车次...")
+        response_data = await self.ticket_debugger.make_request_async(bypass_cache=bypass_cache)
+
+        if not response_data or not response_data.get('status'):
+            self.logger.error("查询车次失败")
+            return None
+
+        return self.ticket_debugger.iter_trains(response_data, trains or None, accept)
+
+    def resolve_station(self, station_name, label='车站'):
+        """
+        查找车站代码
+
+        支持完整站名、车站代码和拼音首字母，找不到时提示相近的站名。
+
+        Args:
+            station_name: 用户输入的站名
+            label: 提示中使用的名称，如 出发站
+
+        Returns:
+            tuple: (站名, 车站代码)，未找到时车站代码为None
+        """
+        name, code = self.station_index.resolve(station_name)
+        if code:
+            if name != station_name:
+                print(f"{label} '{station_name}' 匹配为: {name} ({code})")
+            return name, code
+
+        message = f"未找到{label} '{station_name}' 的代码，请检查站名"
+        suggestions = self.station_index.suggest(station_name)
+        if suggestions:
+            message += f"，您是否要找: {'、'.join(suggestions)}"
+        print(message)
+        return station_name, None
+
     def get_seat_type_code(self, seat_type_name):
         """获取座位类型代码"""
-        seat_mapping = {
-            '商务座': '9',
-            '一等座': 'M',
-            '二等座': 'O',
-            '硬卧': '3',
-            '软卧': '4',
-            '硬座': '1',
-            '无座': '1'
-        }
-        return seat_mapping.get(seat_type_name, 'O')
+        return SEAT_TYPE_MAPPING.get(seat_type_name, 'O')
 
     def select_train_manually(self, available_trains):
         """手动选择车次和座位"""
-        from utils import format_seat_display
-
         print("\n可用车次列表：")
         print("="*100)
         print(f"{'序号':<4} {'车次':<10} {'出发时间':<10} {'到达时间':<10} {'历时':<10} {'商务座':<8} {'一等座':<8} {'二等座':<8} {'硬卧':<8} {'软卧':<8} {'硬座':<8}")
@@ -162,8 +343,8 @@ class TrainOrderManager:
 
         for idx, train in enumerate(available_trains, 1):
             print(f"{idx:<4} {train.get('列车号', ''):<10} {train.get('出发时间', ''):<10} {train.get('到达时间', ''):<10} {train.get('历时', ''):<10} "
-                  f"{format_seat_display(train.get('商务座', '--')):<8} {format_seat_display(train.get('一等座', '--')):<8} {format_seat_display(train.get('二等座', '--')):<8} "
-                  f"{format_seat_display(train.get('硬卧', '--')):<8} {format_seat_display(train.get('软卧', '--')):<8} {format_seat_display(train.get('硬座', '--')):<8}")
+                  f"{train.seat_display('商务座'):<8} {train.seat_display('一等座'):<8} {train.seat_display('二等座'):<8} "
+                  f"{train.seat_display('硬卧'):<8} {train.seat_display('软卧'):<8} {train.seat_display('硬座'):<8}")
         print("="*100)
 
         # 选择车次
@@ -180,12 +361,8 @@ class TrainOrderManager:
                 print("输入无效，请输入数字")
 
         # 获取该车次可用的座位类型
-        available_seats = []
         seat_types = ['商务座', '一等座', '二等座', '硬卧', '软卧', '硬座']
-        for seat_type in seat_types:
-            seat_value = selected_train.get(seat_type, '--')
-            if seat_value and seat_value != '无' and seat_value != '--' and seat_value != '*':
-                available_seats.append(seat_type)
+        available_seats = [seat_type for seat_type in seat_types if selected_train.has_seat(seat_type)]
 
         if not available_seats:
             print("该车次没有可用座位")
@@ -194,7 +371,7 @@ class TrainOrderManager:
         # 选择座位类型
         print(f"\n车次 {selected_train.get('列车号')} 可用座位类型：")
         for idx, seat_type in enumerate(available_seats, 1):
-            print(f"{idx}. {seat_type} - 余票: {selected_train.get(seat_type)}")
+            print(f"{idx}. {seat_type} - 余票: {selected_train.seat_display(seat_type)}")
 
         while True:
             try:
@@ -203,7 +380,7 @@ class TrainOrderManager:
                 if 0 <= choice_idx < len(available_seats):
                     seat_type = available_seats[choice_idx]
                     print(f"已选择: {selected_train.get('列车号')} {seat_type}")
-                    self.logger.info(f"用户选择车次: {selected_train.get('列车号')}, 座位类型: {seat_type}")
+                    self.logger.info("用户选择车次: %s, 座位类型: %s", selected_train.get('列车号'), seat_type)
                     return selected_train, seat_type
                 else:
                     print(f"请输入 1 到 {len(available_seats)} 之间的数字")
@@ -215,7 +392,7 @@ class TrainOrderManager:
         try:
             self.logger.info("开始查询车次")
 
-            print("\n请输入查询参数：")
+            print("\n请输入查询参数（多个日期/车站用逗号分隔，日期范围如 2026-02-10~2026-02-12）：")
 
             train_date = input("出发日期 (格式: YYYY-MM-DD): ").strip()
             if not train_date:
@@ -232,22 +409,27 @@ class TrainOrderManager:
                 print("到达站不能为空")
                 return False
 
-            # 查找站点代码
-            from_station_code = None
-            to_station_code = None
-
-            for name, code in self.station_mapping.items():
-                if name == from_station_name:
-                    from_station_code = code
-                if name == to_station_name:
-                    to_station_code = code
+            dates = expand_dates(train_date)
+            from_names = split_list(from_station_name)
+            to_names = split_list(to_station_name)
+            if len(dates) > 1 or len(from_names) > 1 or len(to_names) > 1:
+                seat_filter = None
+                filter_text = input("余票筛选（如 二等座 2 07:00-10:00，直接回车不筛选）: ").strip()
+                if filter_text:
+                    try:
+                        seat_filter = parse_seat_filter(filter_text)
+                    except ValueError as e:
+                        print(f"筛选条件格式错误: {e}")
+                        return False
+                return self.fan_out_query(dates, from_names, to_names, seat_filter=seat_filter)
 
+            # 查找站点代码
+            from_station_name, from_station_code = self.resolve_station(from_station_name, '出发站')
             if not from_station_code:
-                print(f"未找到出发站 '{from_station_name}' 的代码")
                 return False
 
+            to_station_name, to_station_code = self.resolve_station(to_station_name, '到达站')
             if not to_station_code:
-                print(f"未找到到达站 '{to_station_name}' 的代码")
                 return False
 
             # 更新查询参数
@@ -271,7 +453,7 @@ class TrainOrderManager:
                 return False
 
         except Exception as e:
-            self.logger.error(f"查询车次异常: {e}")
+            self.logger.error("查询车次异常: %s", e)
             print(f"查询过程中发生错误: {e}")
             return False
 
@@ -298,21 +480,12 @@ class TrainOrderManager:
                 return False
 
             # 查找站点代码
-            from_station_code = None
-            to_station_code = None
-
-            for name, code in self.station_mapping.items():
-                if name == from_station_name:
-                    from_station_code = code
-                if name == to_station_name:
-                    to_station_code = code
-
+            from_station_name, from_station_code = self.resolve_station(from_station_name, '出发站')
             if not from_station_code:
-                print(f"未找到出发站 '{from_station_name}' 的代码")
                 return False
 
+            to_station_name, to_station_code = self.resolve_station(to_station_name, '到达站')
             if not to_station_code:
-                print(f"未找到到达站 '{to_station_name}' 的代码")
                 return False
 
             # 更新查询参数
@@ -325,64 +498,273 @@ class TrainOrderManager:
             print(f"  出发站: {from_station_name} ({from_station_code})")
             print(f"  到达站: {to_station_name} ({to_station_code})")
 
-            # 清空抢票模式的标记
-            self._target_train_no = None
-            self._target_seat_type = None
-            self._auto_select_passenger = False
-
             # 调用执行流程
             return self._execute_booking_flow(from_station_code, to_station_code, train_date, 
                                              from_station_name, to_station_name)
 
         except Exception as e:
-            self.logger.error(f"自动订票流程异常: {e}")
+            self.logger.error("自动订票流程异常: %s", e)
             print(f"订票过程中发生错误: {e}")
             return False
 
-    def _execute_booking_flow(self, from_station, to_station, train_date, from_name, to_name):
-        """执行订票流程核心逻辑"""
+    def fan_out_query(self, dates, from_names, to_names, seat_filter=None):
+        """
+        并发查询多个日期和多个出发站/到达站的组合，车次随查询完成陆续显示
+
+        Args:
+            dates: 出发日期列表
+            from_names: 出发站名列表
+            to_names: 到达站名列表
+            seat_filter: 查询完成后按余票筛选，SeatMatrix.filter()的参数
+
+        Returns:
+            bool: 是否查到车次
+        """
+        from_codes = []
+        for name in from_names:
+            name, code = self.resolve_station(name, '出发站')
+            if not code:
+                return False
+            from_codes.append(code)
+        to_codes = []
+        for name in to_names:
+            name, code = self.resolve_station(name, '到达站')
+            if not code:
+                return False
+            to_codes.append(code)
+
+        fan_out = services.FanOutQuery(self.ticket_debugger, max_concurrent=FANOUT_CONFIG['max_concurrent'],
+                                       max_requests=FANOUT_CONFIG['max_requests'], logger=self.logger)
+        pairs = [(from_code, to_code) for from_code in from_codes for to_code in to_codes]
+        print(f"\n正在并发查询 {len(dates)} 个日期 × {len(pairs)} 组车站...")
+
+        matrix = SeatMatrix()
+
+        def show(train_date, train):
+            print(f"{train_date} {train.get('列车号', ''):<8} {train.get('出发站', '')}->{train.get('到达站', '')} "
+                  f"{train.get('出发时间', '')}-{train.get('到达时间', '')} "
+                  f"一等座:{train.seat_display('一等座')} 二等座:{train.seat_display('二等座')}")
+
+        async def collect():
+            async for train_date, train in fan_out.stream(dates, pairs):
+                matrix.append(train, train_date)
+                show(train_date, train)
+
+        services.run_sync(collect())
+        stats = fan_out.stats
+        print(f"\n查询完成: 请求 {stats.requested} 次，失败 {stats.failed} 次，"
+              f"车次 {stats.records} 趟（去重 {stats.duplicates} 条），超出预算未查询 {stats.skipped} 个组合")
+
+        if seat_filter:
+            try:
+                matches = matrix.filter(**seat_filter)
+            except ValueError as e:
+                print(f"筛选条件错误: {e}")
+                return False
+            print(f"\n满足筛选条件的车次 {len(matches)} 趟:")
+            for train_date, train in matches:
+                show(train_date, train)
+            return bool(matches)
+        return stats.records > 0
+
+    @staticmethod
+    def _select_candidate_train(records, trains, seat_types):
+        """
+        按候选车次和座位类型的优先级选择有余票的组合
+
+        records可以是车次生成器：确定了结果（更优先的候选车次都已出现且无票）即停止迭代，
+        其余车次不再解码。
+
+        Args:
+            records: 查询结果（可迭代的TrainRecord）
+            trains: 候选车次（按优先级），为空时不限车次
+            seat_types: 候选座位类型（按优先级）
+
+        Returns:
+            tuple: (车次, 座位类型)；候选车次都无余票时返回第一个找到的候选车次和首选座位，
+                   没有找到任何候选车次时返回 (None, None)
+        """
+        def first_seat(train):
+            for seat_type in seat_types:
+                if train.has_seat(seat_type):
+                    return seat_type
+            return None
+
+        if not trains:
+            for train in records:
+                seat_type = first_seat(train)
+                if seat_type:
+                    return train, seat_type
+            return None, None
+
+        rank = {code: i for i, code in enumerate(dict.fromkeys(trains))}
+        found = {}
+        # 尚未确定无票的最优先候选
+        next_rank = 0
+        for train in records:
+            i = rank.get(train.train_code)
+            if i is None or i in found:
+                continue
+            found[i] = train
+            while next_rank in found:
+                seat_type = first_seat(found[next_rank])
+                if seat_type:
+                    return found[next_rank], seat_type
+                next_rank += 1
+
+        for i in sorted(found):
+            seat_type = first_seat(found[i]) if i >= next_rank else None
+            if seat_type:
+                return found[i], seat_type
+
+        # 刚开售时查询结果可能尚未刷新，仍然尝试提交首选组合
+        if found:
+            return found[min(found)], seat_types[0]
+        return None, None
+
+    def _select_passengers(self, passengers, passenger_names=None, interactive=True, login_user_name=None):
+        """
+        选择乘客
+
+        Args:
+            passengers: 账号下的乘客列表
+            passenger_names: 指定的乘客姓名
+            interactive: 未指定姓名时是否提示手动选择，否则使用登录用户或第一个乘客
+            login_user_name: 已取得的登录用户姓名（取不到时为空字符串），为None时按需查询
+
+        Returns:
+            list: 选中的乘客，指定的乘客不存在时返回None
+        """
+        if passenger_names:
+            by_name = {p.get('passenger_name'): p for p in passengers}
+            missing = [name for name in passenger_names if name not in by_name]
+            if missing:
+                print(f"乘客列表中没有: {'、'.join(missing)}")
+                return None
+            selected = [by_name[name] for name in passenger_names]
+            print(f"使用指定乘客: {'、'.join(passenger_names)}")
+            return selected
+
+        if not interactive:
+            if login_user_name is None:
+                login_user_name = self.get_login_user_name()
+            if login_user_name:
+                for p in passengers:
+                    if p.get('passenger_name') == login_user_name:
+                        print(f"使用登录用户: {login_user_name}")
+                        return [p]
+            print(f"使用第一个乘客: {passengers[0]['passenger_name']}")
+            return [passengers[0]]
+
+        print("\n可用乘客列表：")
+        for idx, p in enumerate(passengers, 1):
+            print(f"{idx}. {p['passenger_name']} - {p['passenger_id_type_name']} - {p['passenger_id_no']}")
+
+        while True:
+            try:
+                choice = input(f"\n请选择乘客 (1-{len(passengers)}): ").strip()
+                choice_idx = int(choice) - 1
+                if 0 <= choice_idx < len(passengers):
+                    selected_passenger = passengers[choice_idx]
+                    print(f"已选择乘客: {selected_passenger['passenger_name']}")
+                    return [selected_passenger]
+                else:
+                    print(f"请输入 1 到 {len(passengers)} 之间的数字")
+            except (ValueError, KeyboardInterrupt):
+                print("输入无效，请输入数字")
+
+    def _execute_booking_flow(self, from_station, to_station, train_date, from_name, to_name,
+                              trains=None, seat_types=None, passenger_names=None, passengers=None,
+                              interactive=True, payload=None, rule=None):
+        """
+        执行订票流程核心逻辑
+
+        Args:
+            from_station: 出发站代码
+            to_station: 到达站代码
+            train_date: 出发日期
+            from_name: 出发站名
+            to_name: 到达站名
+            trains: 候选车次（按优先级），为空且interactive时手动选择
+            seat_types: 候选座位类型（按优先级）
+            passenger_names: 乘客姓名，为空时使用登录用户或第一个乘客（interactive时手动选择）
+            passengers: 已选好的乘客（如开售前预先选择的），优先于passenger_names
+            interactive: 为False时不等待任何输入，登录失效等情况直接返回失败
+            payload: 开售前预构建的OrderPayload（已设置乘客），为空时新建
+            rule: 车次选择规则（SelectionRule），指定时按规则选出最优的若干车次依次提交，
+                  忽略trains和seat_types（已包含在规则中）
+
+        Returns:
+            bool: 订票是否成功
+        """
+        succeeded = False
         try:
-            # 1. 查询车次
+            if payload is None:
+                payload = services.OrderPayload(train_date, from_station, to_station, from_name, to_name)
+            if passengers and not payload.has_passengers:
+                payload.set_passengers(passengers)
+
+            # 本流程在开售触发之后执行，自身不做定时判断；触发时刻由wait_and_book按服务器时钟决定
+            if self.server_clock.estimate:
+                self.logger.info("订票流程开始，估计服务器时间: %s",
+                                 self.server_clock.now().strftime('%H:%M:%S.%f')[:-3])
+
+            # 1. 查询并选择车次
             print("\n正在查询可用车次...")
-            available_trains = self.query_available_trains()
-            if not available_trains:
-                print("没有找到可用车次")
-                return False
+            if rule is not None:
+                # 不满足时段、车型、历时条件的行不解码
+                selector = rule.compile()
+                records = self.iter_available_trains(bypass_cache=True, accept=selector.accepts_raw)
+                if records is None:
+                    print("没有找到可用车次")
+                    return False
 
-            # 选择车次
-            if self._target_train_no and self._target_seat_type:
-                selected_train = None
-                for train in available_trains:
-                    if train.get('列车号') == self._target_train_no:
-                        selected_train = train
-                        break
+                candidates = selector.best(records, SELECTION_CONFIG['max_candidates'])
+                if not candidates:
+                    print(f"没有满足选择规则的车次: {rule.describe()}")
+                    return False
 
+                print(f"按规则选择车次（{rule.describe()}）: "
+                      f"{'、'.join(f'{train.train_code} {seat}' for train, seat in candidates)}")
+            elif trains or not interactive:
+                # 逐条解码，首选车次有票时即停止，不解码其余车次
+                records = self.iter_available_trains(trains, bypass_cache=True)
+                if records is None:
+                    print("没有找到可用车次")
+                    return False
+
+                seat_types = seat_types or self.order_config['preferred_seat_types']
+                selected_train, seat_type = self._select_candidate_train(records, trains, seat_types)
                 if not selected_train:
-                    print(f"未找到目标车次: {self._target_train_no}")
+                    print(f"未找到目标车次: {'、'.join(trains) if trains else '无可用车次'}")
                     return False
 
-                seat_type = self._target_seat_type
                 print(f"自动选择车次: {selected_train.get('列车号')} {seat_type}")
+                candidates = [(selected_train, seat_type)]
             else:
+                available_trains = self.query_available_trains(bypass_cache=True)
+                if not available_trains:
+                    print("没有找到可用车次")
+                    return False
+
                 selected_train, seat_type = self.select_train_manually(available_trains)
                 if not selected_train:
                     print("没有选择车次")
                     return False
-
-            self.current_train_info = selected_train
-            self.current_seat_type = seat_type
+                candidates = [(selected_train, seat_type)]
 
             # 2. 检查登录状态
             print("\n正在检查登录状态...")
             if not self.check_login_status():
                 print("登录验证失败 - 需要重新登录")
+                if not interactive:
+                    return False
 
                 while True:
                     choice = input("\n是否立即登录? (y/n): ").strip().lower()
                     if choice == 'y':
                         if self.login_process():
                             print("\n登录成功，继续订票流程...")
-                            self.save_cookies()
                             break
                         else:
                             print("\n登录失败，无法继续订票")
@@ -393,70 +775,44 @@ class TrainOrderManager:
 
             print("登录状态正常，开始订票流程...")
 
-            # 3. 提交订单
-            print("正在提交订单...")
-            success, result = self.order_submit_service.submit_order_request(
-                selected_train, seat_type, from_station, to_station, 
-                train_date, from_name, to_name
-            )
-            if not success:
+            # 3. 提交订单，失败时改选下一个候选车次
+            for idx, (selected_train, seat_type) in enumerate(candidates):
+                self.current_train_info = selected_train
+                self.current_seat_type = seat_type
+                payload.set_train(selected_train, seat_type)
+                print(f"正在提交订单: {selected_train.get('列车号')} {seat_type}...")
+                success, result = self.order_submit_service.submit_order_request(payload)
+                if success:
+                    break
+                if idx + 1 < len(candidates):
+                    print(f"{selected_train.get('列车号')} 提交失败，改选下一个候选车次")
+            else:
                 print("订单提交失败")
                 return False
 
             # 4. 获取乘客信息
-            if not self.passengers_data:
+            if not payload.has_passengers:
                 print("正在获取乘客信息...")
-                success, passengers = self.order_query_service.get_passengers(
-                    self.order_submit_service.repeat_submit_token
+                success, passenger_list = self.order_query_service.get_passengers(
+                    self.booking_context.repeat_submit_token
                 )
-                if not success or not passengers:
+                if not success or not passenger_list:
                     print("获取乘客信息失败")
                     return False
 
-                # 选择乘客
-                if self._auto_select_passenger:
-                    login_user_name = self.get_login_user_name()
-                    selected_passenger = None
-
-                    if login_user_name:
-                        for p in passengers:
-                            if p.get('passenger_name') == login_user_name:
-                                selected_passenger = p
-                                print(f"使用登录用户: {login_user_name}")
-                                break
-
-                    if not selected_passenger:
-                        selected_passenger = passengers[0]
-                        print(f"使用第一个乘客: {selected_passenger['passenger_name']}")
-
-                    self.passengers_data = [selected_passenger]
-                else:
-                    print("\n可用乘客列表：")
-                    for idx, p in enumerate(passengers, 1):
-                        print(f"{idx}. {p['passenger_name']} - {p['passenger_id_type_name']} - {p['passenger_id_no']}")
-
-                    while True:
-                        try:
-                            choice = input(f"\n请选择乘客 (1-{len(passengers)}): ").strip()
-                            choice_idx = int(choice) - 1
-                            if 0 <= choice_idx < len(passengers):
-                                selected_passenger = passengers[choice_idx]
-                                print(f"已选择乘客: {selected_passenger['passenger_name']}")
-                                self.passengers_data = [selected_passenger]
-                                break
-                            else:
-                                print(f"请输入 1 到 {len(passengers)} 之间的数字")
-                        except (ValueError, KeyboardInterrupt):
-                            print("输入无效，请输入数字")
+                passengers = self._select_passengers(passenger_list, passenger_names, interactive)
+                if not passengers:
+                    return False
+                payload.set_passengers(passengers)
                 print()
             else:
-                print(f"使用预选乘客: {self.passengers_data[0].get('passenger_name')}")
+                print(f"使用预选乘客: {'、'.join(p.get('passenger_name') for p in payload.passengers)}")
 
             # 5. 检查订单信息
             print("正在检查订单信息...")
             success, result = self.order_submit_service.check_order_info(
-                self.passengers_data[0],
-                self.order_submit_service.repeat_submit_token
+                payload,
+                self.booking_context.repeat_submit_token
             )
             if not success:
                 print("订单信息检查失败")
@@ -464,35 +820,37 @@ class TrainOrderManager:
 
             # 6. 获取排队人数
             print("正在查询排队人数...")
-            seat_type_code = self.get_seat_type_code(seat_type)
             success, result = self.order_query_service.get_queue_count(
-                selected_train, seat_type_code, from_station, to_station,
-                train_date, self.order_submit_service.repeat_submit_token
+                payload, self.booking_context.repeat_submit_token
             )
             if not success:
                 print("获取排队人数失败")
                 return False
 
-            # 7. 验证关键参数
-            if not self.order_submit_service.key_check_ischange:
+            # 7. 验证关键参数，提交订单时未能从initDc取到的才重新获取
+            context = self.booking_context
+            if not context.order_ready:
+                print("关键参数不完整，重新获取确认乘客页面...")
+                self.order_query_service.get_repeat_submit_token(context.init_url)
+
+            if not context.key_check_ischange:
                 print("缺少关键参数 key_check_isChange")
                 return False
 
-            if not self.order_submit_service.repeat_submit_token:
+            if not context.repeat_submit_token:
                 print("缺少 REPEAT_SUBMIT_TOKEN")
                 return False
 
             print(f"关键参数验证通过:")
-            print(f"  - key_check_isChange: {self.order_submit_service.key_check_ischange[:20]}...")
-            print(f"  - REPEAT_SUBMIT_TOKEN: {self.order_submit_service.repeat_submit_token[:20]}...")
+            print(f"  - key_check_isChange: {context.key_check_ischange[:20]}... ({context.source('key_check_ischange')})")
+            print(f"  - REPEAT_SUBMIT_TOKEN: {context.repeat_submit_token[:20]}... ({context.source('repeat_submit_token')})")
 
             # 8. 确认订单队列
             print("\n正在提交订单到排队系统...")
             success, result = self.order_submit_service.confirm_order_queue(
-                self.passengers_data[0],
-                selected_train,
-                self.order_submit_service.repeat_submit_token,
-                self.order_submit_service.key_check_ischange
+                payload,
+                context.repeat_submit_token,
+                context.key_check_ischange
             )
             if not success:
                 print("提交订单到排队系统失败")
@@ -501,30 +859,262 @@ class TrainOrderManager:
             # 9. 轮询订单状态
             print("正在排队，请等待...")
             success, final_result = self.order_submit_service.poll_order_status(
-                self.order_submit_service.repeat_submit_token
+                context.repeat_submit_token
             )
 
             if success:
                 print("订票成功！请及时支付订单")
+                succeeded = True
                 return True
             else:
                 print("订票失败")
                 return False
 
         except Exception as e:
-            self.logger.error(f"订票流程执行异常: {e}")
+            self.logger.error("订票流程执行异常: %s", e)
             print(f"订票过程中发生错误: {e}")
             import traceback
             traceback.print_exc()
             return False
+        finally:
+            self._flush_trace()
+            if not succeeded:
+                # 失败时把保留的调试响应写入归档（后台线程）
+                self.flush_dumps('failure')
 
     def scheduled_grab_ticket(self):
         """定时抢票功能"""
         return self.grab_ticket_service.execute_grab_ticket(self)
 
+    def run_job(self, job, session_record=None):
+        """无人值守地执行订票任务，参数见run_job_async()"""
+        return services.run_sync(self.run_job_async(job, session_record=session_record))
 
-def main():
+    async def run_job_async(self, job, session_record=None, booking_slot=None):
+        """
+        无人值守地执行订票任务（异步）
+
+        有开售时间时等待开售后抢票，否则立即订票；全程不等待输入。
+        等待开售期间不占用线程，订票流程在单独的线程中执行。
+
+        Args:
+            job: BookingJob任务
+            session_record: 预先从会话存储读取的该任务账号的会话
+            booking_slot: 返回异步上下文管理器的函数，开售触发后的订票在其中执行（如JobScheduler.booking_slot）
+
+        Returns:
+            bool: 订票是否成功
+        """
+        try:
+            self.logger.info("开始执行任务: %s", job.name)
+            print(f"\n=== 任务: {job.name} ===")
+            if self.client.recorder is not None:
+                self.client.recorder.job = job.name
+            if self.client.dumps is not None:
+                self.client.dumps.job = job.name
+
+            # 每个任务使用自己账号的cookies，不混入默认cookies
+            self.session.cookies.clear()
+            self.booking_context.reset()
+            if job.account:
+                # 过期的cookies在此时（任务唤醒时）丢弃
+                if session_record is None:
+                    self._ensure_session_store()
+                if not self.cookie_service.load_session(job.account, session_record):
+                    print(f"加载账号会话失败: {job.account}")
+                    return False
+                self.account = job.account
+            elif job.cookie_file:
+                if not self.load_cookies(job.cookie_file):
+                    print(f"加载cookies失败: {job.cookie_file}")
+                    return False
+            else:
+                self.restore_session()
+
+            from_station_name, from_station_code = self.resolve_station(job.from_station, '出发站')
+            if not from_station_code:
+                return False
+
+            to_station_name, to_station_code = self.resolve_station(job.to_station, '到达站')
+            if not to_station_code:
+                return False
+
+            self.ticket_debugger.query_params['leftTicketDTO.train_date'] = job.train_date
+            self.ticket_debugger.query_params['leftTicketDTO.from_station'] = from_station_code
+            self.ticket_debugger.query_params['leftTicketDTO.to_station'] = to_station_code
+
+            if job.sale_time:
+                return await self.grab_ticket_service.wait_and_book_async(
+                    self, job.sale_time, job.train_date,
+                    from_station_code, to_station_code, from_station_name, to_station_name,
+                    trains=job.trains, seat_types=job.seat_types,
+                    passenger_names=job.passengers, interactive=False, rule=job.selection,
+                    booking_slot=booking_slot
+                )
+
+            async with booking_slot() if booking_slot else contextlib.nullcontext():
+                return await asyncio.to_thread(
+                    self._execute_booking_flow,
+                    from_station_code, to_station_code, job.train_date,
+                    from_station_name, to_station_name,
+                    trains=job.trains, seat_types=job.seat_types,
+                    passenger_names=job.passengers, interactive=False, rule=job.selection
+                )
+
+        except Exception as e:
+            self.logger.error("任务 %s 执行异常: %s", job.name, e)
+            print(f"任务执行过程中发生错误: {e}")
+            return False
+
+
+def split_list(text):
+    """按中英文逗号分隔"""
+    return [item.strip() for item in text.replace('，', ',').split(',') if item.strip()]
+
+
+def parse_seat_filter(text):
+    """
+    解析余票筛选条件：座位类型 [最少张数] [最早出发-最晚出发]，如 "二等座 2 07:00-10:00"
+
+    Returns:
+        dict: SeatMatrix.filter()的参数
+
+    Raises:
+        ValueError: 格式错误
+    """
+    parts = text.split()
+    if not parts:
+        raise ValueError("缺少座位类型")
+    spec = {'seat': parts[0]}
+    for part in parts[1:]:
+        if part.isdigit():
+            spec['minimum'] = int(part)
+        elif '-' in part:
+            depart_from, depart_to = (value.strip() for value in part.split('-', 1))
+            spec['depart_from'] = depart_from or None
+            spec['depart_to'] = depart_to or None
+        else:
+            raise ValueError(f"无法识别 {part}")
+    return spec
+
+
+def expand_dates(text):
+    """
+    解析日期输入：逗号分隔的日期，或 起始~结束 的日期范围（含两端）
+
+    Returns:
+        list: YYYY-MM-DD 列表
+    """
+    dates = []
+    for item in split_list(text):
+        if '~' not in item:
+            dates.append(item)
+            continue
+        start, end = (datetime.strptime(part.strip(), '%Y-%m-%d') for part in item.split('~', 1))
+        while start <= end:
+            dates.append(start.strftime('%Y-%m-%d'))
+            start += timedelta(days=1)
+    return list(dict.fromkeys(dates))
+
+
+def run_jobs(paths, check_only=False, base_url=BASE_URL,
+             max_concurrent=SCHEDULER_CONFIG['max_concurrent'], trace_file=None, dump_archive=None):
+    """
+    执行任务描述文件中的所有任务
+
+    任务按开售时间调度，每个任务使用独立的订单管理器（cookies、token互不影响），
+    所有任务共用连接池、服务器时钟和会话存储。
+
+    Args:
+        paths: 任务描述文件路径列表
+        check_only: 只校验任务描述，不执行
+        base_url: 12306站点地址
+        max_concurrent: 开售触发后同时订票的任务数上限
+        trace_file: 请求耗时追踪文件，指定时启用追踪
+        dump_archive: 调试响应转储归档，指定时启用转储
+
+    Returns:
+        int: 进程退出状态，全部成功时为0
+    """
+    jobs = []
+    try:
+        for path in paths:
+            jobs.extend(load_jobs(path))
+    except (OSError, JobSpecError) as e:
+        print(f"读取任务失败: {e}")
+        return 2
+
+    for job in jobs:
+        print(f"{job.name}: {job.to_dict()}")
+    if check_only:
+        print(f"共 {len(jobs)} 个任务，校验通过")
+        return 0
+
+    # 服务器时钟与账号无关，所有任务共用，近期同步过的不再重复采样
+    server_clock = services.ServerClock(client=services.AsyncHttpClient(base_url=base_url),
+                                        path=CLOCK_SYNC_CONFIG['path'])
+
+    # 启动时一次查询取回所有任务账号的会话，任务唤醒时再放入各自的会话（届时丢弃已过期的cookies）
+    accounts = [job.account for job in jobs if job.account]
+    records = services.get_session_store(COOKIE_CONFIG['store']).load_many(accounts) if accounts else {}
+    if accounts:
+        print(f"会话存储: {len(records)}/{len(set(accounts))} 个账号有有效会话")
+
+    async def run_one(job):
+        # 任务唤醒时才创建订单管理器，各任务的会话只共用连接池
+        manager = TrainOrderManager(base_url=base_url, server_clock=server_clock, trace_file=trace_file,
+                                    dump_archive=dump_archive, restore_session=False)
+        success = await manager.run_job_async(job, session_record=records.get(job.account),
+                                              booking_slot=scheduler.booking_slot)
+        print(f"任务 {job.name}: {'成功' if success else '失败'}")
+        return success
+
+    scheduler = services.JobScheduler(run_one, max_concurrent=max_concurrent,
+                                      wake_before_s=SCHEDULER_CONFIG['wake_before_s'],
+                                      server_clock=server_clock)
+    for job in jobs:
+        scheduler.add(job)
+    results = scheduler.run()
+    if QUERY_CACHE_CONFIG['enabled']:
+        get_logger('12306').info("余票查询缓存: %s", services.get_shared_query_cache().stats())
+    if THROTTLE_CONFIG['enabled']:
+        get_logger('12306').info("请求限速与熔断: %s", services.get_shared_throttle().stats())
+
+    failed = [result.job.name for result in results if not result.success]
+    if failed:
+        print(f"\n失败的任务: {'、'.join(failed)}")
+        return 1
+    return 0
+
+
+def main(argv=None):
     """主函数"""
+    parser = argparse.ArgumentParser(description='12306火车票订票工具')
+    parser.add_argument('--job', dest='jobs', action='append', metavar='FILE',
+                        help='任务描述文件（JSON/YAML），可指定多次；指定后无人值守执行，不进入菜单')
+    parser.add_argument('--check', action='store_true', help='只校验任务描述文件，不执行')
+    parser.add_argument('--max-concurrent', type=int, default=SCHEDULER_CONFIG['max_concurrent'],
+                        help='开售触发后同时订票的任务数上限')
+    parser.add_argument('--trace', metavar='FILE',
+                        help='记录每个请求的耗时（JSON Lines），订票流程结束后打印汇总表')
+    parser.add_argument('--dump', metavar='FILE',
+                        help='在内存中保留最近的调试响应，订票失败时写入该zip归档')
+    parser.add_argument('--base-url', default=BASE_URL, help='12306站点地址，可指向本地替身服务器')
+    args = parser.parse_args(argv)
+
+    # 进程内只设置一次日志，所有订单管理器共用
+    setup_logging(LOG_CONFIG['filename'], level=LOG_CONFIG['level'],
+                  fmt=LOG_CONFIG['format'], use_queue=LOG_CONFIG['queue'])
+
+    if args.jobs:
+        try:
+            return run_jobs(args.jobs, check_only=args.check, base_url=args.base_url,
+                            max_concurrent=args.max_concurrent, trace_file=args.trace,
+                            dump_archive=args.dump)
+        except KeyboardInterrupt:
+            print("\n程序被用户中断")
+            return 130
+
     try:
         # 打印ASCII艺术字
         print("""
@@ -539,7 +1129,8 @@ def main():
         """)
 
         print("\n正在加载...")
-        order_manager = TrainOrderManager()
+        order_manager = TrainOrderManager(base_url=args.base_url, trace_file=args.trace,
+                                          dump_archive=args.dump)
 
         while True:
             print("\n选择操作:")
@@ -566,6 +1157,7 @@ def main():
                     print("\n抢票失败，请检查日志文件")
             elif choice == '4':
                 print("退出程序")
+                order_manager.flush_dumps('exit', wait=True)
                 order_manager.logger.info("程序正常退出")
                 break
             else:
@@ -578,4 +1170,4 @@ def main():
 
 
 if __name__ == '__main__':
-    main()
+    sys.exit(main())
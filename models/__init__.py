@@ -2,3 +2,48 @@
 # -*- coding: utf-8 -*-
 
 """Models package"""
+
+from .train import (
+    TrainRecord,
+    TrainRecordList,
+    SEAT_FIELDS,
+    SEAT_NONE,
+    SEAT_NOT_OFFERED,
+    SEAT_NOT_ON_SALE,
+    SEAT_PLENTY,
+    encode_seat,
+    seat_text,
+    seat_display,
+    train_code_of,
+    schedule_of
+)
+from .seat_matrix import SeatMatrix
+from .selection import SelectionRule, TrainSelector, DepartureIndex
+from .booking import BookingContext, ContextValue
+from .session import SessionWarmState
+from .job import BookingJob, JobSpecError, load_jobs
+
+__all__ = [
+    'TrainRecord',
+    'TrainRecordList',
+    'SEAT_FIELDS',
+    'SEAT_NONE',
+    'SEAT_NOT_OFFERED',
+    'SEAT_NOT_ON_SALE',
+    'SEAT_PLENTY',
+    'encode_seat',
+    'seat_text',
+    'seat_display',
+    'SeatMatrix',
+    'SelectionRule',
+    'TrainSelector',
+    'DepartureIndex',
+    'train_code_of',
+    'schedule_of',
+    'BookingContext',
+    'ContextValue',
+    'SessionWarmState',
+    'BookingJob',
+    'JobSpecError',
+    'load_jobs'
+]
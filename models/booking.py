@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""订票会话状态模型"""
+
+import time
+
+# 同一笔订单内有效的值，重新提交订单（submitOrderRequest）后作废
+ORDER_SCOPED_KEYS = ('repeat_submit_token', 'key_check_ischange', 'left_ticket_str', 'init_url')
+
+# 同一登录会话内有效的值，重新登录后作废
+SESSION_SCOPED_KEYS = ('passengers', 'login_user_name')
+
+# 默认有效期（秒），None表示在所属范围内一直有效
+DEFAULT_TTLS = {
+    'passengers': 1800,
+    'login_user_name': 1800,
+}
+
+
+class ContextValue:
+    """带来源和有效期的上下文值"""
+
+    __slots__ = ('value', 'source', 'obtained_at', 'ttl')
+
+    def __init__(self, value, source, ttl=None):
+        self.value = value
+        # 值的来源，如 'initDc(GET)'、'getPassengerDTOs'
+        self.source = source
+        self.obtained_at = time.monotonic()
+        self.ttl = ttl
+
+    @property
+    def age(self):
+        """获取至今的秒数"""
+        return time.monotonic() - self.obtained_at
+
+    @property
+    def valid(self):
+        return self.value is not None and (self.ttl is None or self.age < self.ttl)
+
+
+class BookingContext:
+    """
+    订票上下文
+
+    集中保存订票流程中各步骤获得的值（REPEAT_SUBMIT_TOKEN、key_check_isChange、
+    leftTicketStr、leftTicket/init地址、乘客列表等），并记录每个值的来源与获取时间。
+    各步骤先查看上下文，只有缺少有效值时才发起请求。
+    """
+
+    def __init__(self, ttls=None):
+        """
+        Args:
+            ttls: {键: 有效期秒数}，覆盖DEFAULT_TTLS
+        """
+        self._values = {}
+        self.ttls = dict(DEFAULT_TTLS)
+        if ttls:
+            self.ttls.update(ttls)
+
+    def set(self, key, value, source, ttl=None):
+        """
+        保存值
+
+        Args:
+            key: 键名
+            value: 值，None时等同于作废
+            source: 来源说明
+            ttl: 有效期（秒），默认取ttls配置
+        """
+        if value is None:
+            self._values.pop(key, None)
+            return
+        self._values[key] = ContextValue(value, source, ttl if ttl is not None else self.ttls.get(key))
+
+    def get(self, key, default=None):
+        """获取有效的值，不存在或已过期时返回default"""
+        entry = self._values.get(key)
+        if entry is None or not entry.valid:
+            return default
+        return entry.value
+
+    def has(self, key):
+        """是否有有效的值"""
+        entry = self._values.get(key)
+        return entry is not None and entry.valid
+
+    def source(self, key):
+        """值的来源，不存在时返回None"""
+        entry = self._values.get(key)
+        return entry.source if entry is not None else None
+
+    def entry(self, key):
+        """获取原始的ContextValue"""
+        return self._values.get(key)
+
+    def invalidate(self, *keys):
+        """作废指定的值"""
+        for key in keys:
+            self._values.pop(key, None)
+
+    def start_order(self):
+        """开始新的一笔订单，作废上一笔订单的token等值"""
+        self.invalidate(*ORDER_SCOPED_KEYS)
+
+    def reset(self):
+        """作废所有值（如重新登录后）"""
+        self._values.clear()
+
+    # ---- 常用值 ----
+
+    @property
+    def repeat_submit_token(self):
+        return self.get('repeat_submit_token')
+
+    @property
+    def key_check_ischange(self):
+        return self.get('key_check_ischange')
+
+    @property
+    def left_ticket_str(self):
+        return self.get('left_ticket_str')
+
+    @property
+    def init_url(self):
+        return self.get('init_url')
+
+    @property
+    def passengers(self):
+        return self.get('passengers')
+
+    @property
+    def order_ready(self):
+        """提交排队所需的token与key_check_isChange是否齐全"""
+        return self.has('repeat_submit_token') and self.has('key_check_ischange')
+
+    def describe(self):
+        """各值的来源与获取时间，用于日志"""
+        return {
+            key: f"{entry.source}, {entry.age:.1f}s前{'' if entry.valid else ', 已过期'}"
+            for key, entry in self._values.items()
+        }
+
+    def __repr__(self):
+        return f"BookingContext({self.describe()})"
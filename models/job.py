@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+订票任务模型
+
+任务描述文件（JSON或YAML）声明出发日期、车站、候选车次、座位类型、乘客和开售时间，
+用于无人值守地订票或定时抢票。文件可以是单个任务、任务列表，或 {"jobs": [...]}。
+
+示例（JSON）:
+    {
+        "name": "张三-春运",
+        "train_date": "2026-02-10",
+        "from_station": "北京",
+        "to_station": "上海",
+        "trains": ["G1", "G3"],
+        "seat_types": ["二等座", "一等座"],
+        "passengers": ["张三"],
+        "sale_time": "2026-01-27 15:00:00",
+        "account": "13800000000"
+    }
+
+未列出候选车次、或希望首选车次无票时自动改选时，可用 selection 声明选择规则
+（见 models/selection.py），此时 trains 中的车次作为优先车次:
+    "selection": {"depart": "07:00-12:00", "train_types": ["G", "D"], "max_duration": "06:00"}
+
+YAML中的日期、时间可以不加引号（示例见项目根目录的 jobs_example.yaml）。
+"""
+
+import json
+import os
+from datetime import date, datetime
+
+from .selection import SelectionRule
+from .train import SEAT_NAME_INDEX
+
+
+class JobSpecError(ValueError):
+    """任务描述无效"""
+
+
+_REQUIRED_FIELDS = ('train_date', 'from_station', 'to_station')
+
+_KNOWN_FIELDS = _REQUIRED_FIELDS + (
+    'name', 'trains', 'seat_types', 'passengers', 'sale_time', 'account', 'cookie_file', 'selection',
+)
+
+_SALE_TIME_FORMATS = ('%Y-%m-%d %H:%M:%S', '%Y-%m-%d %H:%M:%S.%f', '%Y-%m-%dT%H:%M:%S')
+
+
+def _as_list(value, field):
+    if value is None:
+        return []
+    if isinstance(value, str):
+        return [item.strip() for item in value.split(',') if item.strip()]
+    if isinstance(value, (list, tuple)):
+        return [str(item).strip() for item in value if str(item).strip()]
+    raise JobSpecError(f"{field} 应为列表或逗号分隔的字符串")
+
+
+def _parse_train_date(value):
+    """出发日期规范为 YYYY-MM-DD 字符串（YAML中未加引号的日期读出为date）"""
+    if isinstance(value, date):
+        return value.strftime('%Y-%m-%d')
+    try:
+        datetime.strptime(value, '%Y-%m-%d')
+    except (TypeError, ValueError):
+        raise JobSpecError(f"出发日期格式错误: {value}，应为 YYYY-MM-DD")
+    return value
+
+
+def _parse_sale_time(value, today=None):
+    """解析开售时间，只给出时分秒时取当天"""
+    if value is None or value == '':
+        return None
+    if isinstance(value, datetime):
+        return value
+    if not isinstance(value, str):
+        # 只写日期或数字（如YAML 1.1把未加引号的 15:00 读成60进制整数）无法确定开售时刻
+        raise JobSpecError(f"开售时间格式错误: {value}，应为 HH:MM:SS 或 YYYY-MM-DD HH:MM:SS 字符串（YAML中请加引号）")
+    text = value.strip()
+    for fmt in _SALE_TIME_FORMATS:
+        try:
+            return datetime.strptime(text, fmt)
+        except ValueError:
+            pass
+    try:
+        clock = datetime.strptime(text, '%H:%M:%S')
+    except ValueError:
+        raise JobSpecError(f"开售时间格式错误: {text}，应为 HH:MM:SS 或 YYYY-MM-DD HH:MM:SS")
+    today = today or datetime.now()
+    return today.replace(hour=clock.hour, minute=clock.minute, second=clock.second, microsecond=0)
+
+
+class BookingJob:
+    """订票任务"""
+
+    def __init__(self, train_date, from_station, to_station, name=None, trains=None,
+                 seat_types=None, passengers=None, sale_time=None, account=None,
+                 cookie_file=None, selection=None):
+        """
+        Args:
+            train_date: 出发日期 YYYY-MM-DD（字符串或date）
+            from_station: 出发站（站名、车站代码或拼音首字母）
+            to_station: 到达站
+            name: 任务名称，用于日志
+            trains: 候选车次（按优先级），为空时不限车次
+            seat_types: 候选座位类型（按优先级），默认 二等座、一等座
+            passengers: 乘客姓名，为空时使用登录用户或第一个乘客
+            sale_time: 开售时间，为空时立即订票
+            account: 该任务使用的登录账号（手机号），从会话存储加载其cookies
+            cookie_file: 该任务使用的旧版cookies文件（未指定account时使用）
+            selection: 车次选择规则（selection字段的字典或SelectionRule），
+                       最少余票张数默认为乘客人数
+        """
+        train_date = _parse_train_date(train_date)
+
+        self.train_date = train_date
+        self.from_station = from_station
+        self.to_station = to_station
+        self.name = name or f"{train_date} {from_station}-{to_station}"
+        self.trains = [code.upper() for code in _as_list(trains, 'trains')]
+        self.seat_types = _as_list(seat_types, 'seat_types') or ['二等座', '一等座']
+        self.passengers = _as_list(passengers, 'passengers')
+        self.sale_time = _parse_sale_time(sale_time)
+        self.account = str(account) if account is not None else None
+        self.cookie_file = cookie_file
+
+        unknown = [seat for seat in self.seat_types if seat not in SEAT_NAME_INDEX]
+        if unknown:
+            raise JobSpecError(f"未知的座位类型: {'、'.join(unknown)}")
+
+        self.selection = None
+        if isinstance(selection, SelectionRule):
+            self.selection = selection
+        elif selection is not None:
+            try:
+                self.selection = SelectionRule.from_dict(selection, seat_types=self.seat_types,
+                                                         trains=self.trains,
+                                                         min_seats=max(1, len(self.passengers)))
+            except (TypeError, ValueError) as e:
+                raise JobSpecError(f"选择规则无效: {e}")
+
+    @classmethod
+    def from_dict(cls, spec):
+        """从字典创建任务"""
+        if not isinstance(spec, dict):
+            raise JobSpecError("任务描述应为对象")
+        missing = [field for field in _REQUIRED_FIELDS if not spec.get(field)]
+        if missing:
+            raise JobSpecError(f"任务缺少字段: {', '.join(missing)}")
+        unknown = [field for field in spec if field not in _KNOWN_FIELDS]
+        if unknown:
+            raise JobSpecError(f"任务包含未知字段: {', '.join(unknown)}")
+        return cls(**{field: spec[field] for field in _KNOWN_FIELDS if field in spec})
+
+    def to_dict(self):
+        return {
+            'name': self.name,
+            'train_date': self.train_date,
+            'from_station': self.from_station,
+            'to_station': self.to_station,
+            'trains': list(self.trains),
+            'seat_types': list(self.seat_types),
+            'passengers': list(self.passengers),
+            'sale_time': self.sale_time.strftime('%Y-%m-%d %H:%M:%S') if self.sale_time else None,
+            'account': self.account,
+            'cookie_file': self.cookie_file,
+            'selection': self.selection.to_dict() if self.selection else None,
+        }
+
+    def __repr__(self):
+        return f"BookingJob({self.name!r})"
+
+
+def _job_loader(yaml):
+    """
+    读取任务描述的YAML加载器
+
+    YAML 1.1把未加引号的 15:00:00 读成60进制整数（54000），这里保留原文，
+    由_parse_sale_time按时分秒解析；日期仍读出为date/datetime。
+    """
+    class JobLoader(yaml.SafeLoader):
+        def construct_yaml_int(self, node):
+            value = self.construct_scalar(node)
+            if ':' in value:
+                return value
+            return super().construct_yaml_int(node)
+
+        def construct_yaml_float(self, node):
+            value = self.construct_scalar(node)
+            if ':' in value:
+                return value
+            return super().construct_yaml_float(node)
+
+    JobLoader.add_constructor('tag:yaml.org,2002:int', JobLoader.construct_yaml_int)
+    JobLoader.add_constructor('tag:yaml.org,2002:float', JobLoader.construct_yaml_float)
+    return JobLoader
+
+
+def _load_yaml(text, path):
+    try:
+        import yaml
+    except ImportError:
+        raise JobSpecError(f"读取 {path} 需要安装PyYAML（pip install pyyaml），或改用JSON格式")
+    try:
+        return yaml.load(text, Loader=_job_loader(yaml))
+    except yaml.YAMLError as e:
+        raise JobSpecError(f"{path} 不是有效的YAML: {e}")
+
+
+def load_jobs(path):
+    """
+    读取任务描述文件
+
+    Args:
+        path: JSON或YAML文件路径（按扩展名区分）
+
+    Returns:
+        list: BookingJob列表
+
+    Raises:
+        JobSpecError: 文件格式或任务内容无效
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        text = f.read()
+
+    ext = os.path.splitext(path)[1].lower()
+    try:
+        data = _load_yaml(text, path) if ext in ('.yaml', '.yml') else json.loads(text)
+    except json.JSONDecodeError as e:
+        raise JobSpecError(f"{path} 不是有效的JSON: {e}")
+
+    if isinstance(data, dict) and 'jobs' in data:
+        data = data['jobs']
+    if isinstance(data, dict):
+        data = [data]
+    if not isinstance(data, list):
+        raise JobSpecError(f"{path} 中没有任务")
+
+    jobs = []
+    for idx, spec in enumerate(data, 1):
+        try:
+            jobs.append(BookingJob.from_dict(spec))
+        except JobSpecError as e:
+            raise JobSpecError(f"{path} 第{idx}个任务: {e}")
+    return jobs
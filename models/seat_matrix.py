@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+座位余票矩阵
+
+把一组车次（可来自多个日期、多条线路）的余票排成 车次×座位类型 的小整数矩阵，
+编码与TrainRecord.seats相同（SEAT_PLENTY/SEAT_NONE/SEAT_NOT_ON_SALE/SEAT_NOT_OFFERED
+或余票张数），连同出发时刻（分钟）和日期编号保存在紧凑的array中。
+
+"出发时段内某座位至少N张"这类筛选在安装了NumPy且行数较多时按列向量化计算，
+否则逐行比较，两者结果相同。NumPy在首次向量化筛选时才导入。
+"""
+
+from array import array
+
+from .train import SEAT_FIELDS, SEAT_INDEX
+
+# 行数达到该值时才使用NumPy（行数较少时逐行比较更快）
+NUMPY_MIN_ROWS = 512
+
+_numpy = None
+
+
+def _load_numpy():
+    """导入NumPy，未安装时返回None（只尝试一次）"""
+    global _numpy
+    if _numpy is None:
+        try:
+            import numpy
+        except ImportError:
+            numpy = False
+        _numpy = numpy
+    return _numpy or None
+
+
+def depart_minutes(value):
+    """
+    出发时刻转换为当天的分钟数
+
+    Args:
+        value: 'HH:MM' 字符串或分钟数
+
+    Returns:
+        int: 分钟数，无法解析时为-1
+    """
+    if isinstance(value, int):
+        return value
+    try:
+        hour, minute = value.split(':', 1)
+        return int(hour) * 60 + int(minute)
+    except (AttributeError, ValueError):
+        return -1
+
+
+class SeatMatrix:
+    """
+    车次×座位类型的余票矩阵
+
+    用法:
+        matrix = SeatMatrix.from_pairs(fan_out.run(dates, pairs))
+        for train_date, record in matrix.filter('二等座', minimum=2, depart_from='07:00', depart_to='10:00'):
+            ...
+    """
+
+    WIDTH = len(SEAT_FIELDS)
+
+    def __init__(self, records=(), dates=None):
+        """
+        Args:
+            records: TrainRecord序列
+            dates: 与records一一对应的出发日期，为空时取各车次的start_date
+        """
+        self.records = []
+        # 出现过的日期，date_ids中保存其下标
+        self.date_values = []
+        self._date_index = {}
+        # 行优先的余票编码，每行WIDTH个
+        self.seats = array('b')
+        self.depart = array('h')
+        self.date_ids = array('h')
+        if dates is None:
+            for record in records:
+                self.append(record)
+        else:
+            for train_date, record in zip(dates, records):
+                self.append(record, train_date)
+
+    @classmethod
+    def from_pairs(cls, pairs):
+        """从 (日期, TrainRecord) 序列（如FanOutQuery的结果）创建"""
+        matrix = cls()
+        for train_date, record in pairs:
+            matrix.append(record, train_date)
+        return matrix
+
+    def append(self, record, train_date=None):
+        """追加一个车次"""
+        train_date = train_date or record.start_date
+        date_id = self._date_index.get(train_date)
+        if date_id is None:
+            date_id = self._date_index[train_date] = len(self.date_values)
+            self.date_values.append(train_date)
+        self.records.append(record)
+        self.seats.extend(record.seats)
+        self.depart.append(depart_minutes(record.start_time))
+        self.date_ids.append(date_id)
+
+    def __len__(self):
+        return len(self.records)
+
+    def date_of(self, row):
+        return self.date_values[self.date_ids[row]]
+
+    def row(self, row):
+        """某车次各座位的余票编码（按SEAT_FIELDS顺序）"""
+        start = row * self.WIDTH
+        return tuple(self.seats[start:start + self.WIDTH])
+
+    def column(self, seat):
+        """某座位类型在各车次的余票编码"""
+        return self.seats[_seat_index(seat)::self.WIDTH]
+
+    def select(self, seat, minimum=1, depart_from=None, depart_to=None, dates=None, use_numpy=None):
+        """
+        筛选车次
+
+        Args:
+            seat: 座位名称（如 二等座）或座位代码（如 O）
+            minimum: 最少余票张数（"有"视为充足）
+            depart_from: 最早出发时刻 'HH:MM'（含）
+            depart_to: 最晚出发时刻 'HH:MM'（含）
+            dates: 只保留这些出发日期
+            use_numpy: 是否使用NumPy，默认在已安装且行数不少于NUMPY_MIN_ROWS时使用
+
+        Returns:
+            list: 满足条件的行号（按加入顺序）
+        """
+        column = _seat_index(seat)
+        low = _bound(depart_from)
+        high = _bound(depart_to)
+        date_ids = None
+        if dates is not None:
+            date_ids = {self._date_index[value] for value in dates if value in self._date_index}
+            if not date_ids:
+                return []
+        if not self.records:
+            return []
+
+        np = _load_numpy() if use_numpy is not False else None
+        if np is not None and (use_numpy or len(self.records) >= NUMPY_MIN_ROWS):
+            seats = np.frombuffer(self.seats, dtype=np.int8).reshape(-1, self.WIDTH)
+            mask = seats[:, column] >= minimum
+            if low is not None or high is not None:
+                depart = np.frombuffer(self.depart, dtype=np.int16)
+                if low is not None:
+                    mask &= depart >= low
+                if high is not None:
+                    mask &= depart <= high
+            if date_ids is not None:
+                mask &= np.isin(np.frombuffer(self.date_ids, dtype=np.int16), list(date_ids))
+            return np.flatnonzero(mask).tolist()
+
+        depart = self.depart
+        rows = []
+        for row, count in enumerate(self.seats[column::self.WIDTH]):
+            if count < minimum:
+                continue
+            if low is not None and depart[row] < low:
+                continue
+            if high is not None and depart[row] > high:
+                continue
+            if date_ids is not None and self.date_ids[row] not in date_ids:
+                continue
+            rows.append(row)
+        return rows
+
+    def filter(self, seat, minimum=1, depart_from=None, depart_to=None, dates=None, use_numpy=None):
+        """
+        筛选车次，参数同select()
+
+        Returns:
+            list: [(日期, TrainRecord)]
+        """
+        rows = self.select(seat, minimum, depart_from, depart_to, dates, use_numpy)
+        return [(self.date_of(row), self.records[row]) for row in rows]
+
+
+def _bound(value):
+    if value is None:
+        return None
+    minutes = depart_minutes(value)
+    if minutes < 0:
+        raise ValueError(f"出发时刻格式错误: {value}，应为 HH:MM")
+    return minutes
+
+
+def _seat_index(seat):
+    idx = SEAT_INDEX.get(seat)
+    if idx is None:
+        raise ValueError(f"未知的座位类型: {seat}")
+    return idx
@@ -0,0 +1,431 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+车次选择规则
+
+以声明的条件代替手动选择或单一的目标车次：出发/到达时段、车型（车次号前缀 G/D/K…）、
+最长历时、座位类型优先级、最少余票张数、优先车次。规则编译为一个判断函数和一个排序键，
+从查询结果中选出最优的若干个 (车次, 座位类型)，首选提交失败时可以依次改选下一个。
+
+示例（任务描述中的 selection 字段）:
+    {
+        "depart": "07:00-12:00",
+        "arrive": "-18:00",
+        "train_types": ["G", "D"],
+        "max_duration": "06:00",
+        "order_by": "duration"
+    }
+
+交互输入时可写为一行: "G,D 出发07:00-12:00 到达-18:00 历时06:00 二等座,一等座 2 按历时"
+"""
+
+import heapq
+from bisect import bisect_left, bisect_right
+
+from .seat_matrix import depart_minutes
+from .train import SEAT_INDEX, SEAT_NAME_INDEX, schedule_of
+
+DAY_MINUTES = 24 * 60
+
+# 排序键中出发/到达/历时所占的位宽（见TrainSelector.sort_key）
+_ORDER_MASK = (1 << 14) - 1
+
+# 时刻、历时文本 -> 分钟数（车次的这些字段已驻留，取值种类有限）
+_MINUTES_CACHE = {}
+_MINUTES_CACHE_SIZE = 8192
+
+# 排序方式 -> 说明
+ORDER_BY = {
+    'depart': '出发最早',
+    'arrive': '到达最早',
+    'duration': '历时最短',
+}
+
+_ORDER_WORDS = {'按出发': 'depart', '按到达': 'arrive', '按历时': 'duration'}
+
+_RULE_FIELDS = ('depart', 'arrive', 'train_types', 'max_duration', 'min_seats', 'order_by')
+
+
+def clock_minutes(text):
+    """车次的时刻或历时文本转换为分钟数（带缓存），无法解析时为-1"""
+    minutes = _MINUTES_CACHE.get(text)
+    if minutes is None:
+        minutes = depart_minutes(text)
+        if len(_MINUTES_CACHE) < _MINUTES_CACHE_SIZE:
+            _MINUTES_CACHE[text] = minutes
+    return minutes
+
+
+def parse_window(value):
+    """
+    解析时段 'HH:MM-HH:MM'（任一端可省略，起点晚于终点表示跨零点）
+
+    Returns:
+        tuple: (起点分钟, 终点分钟)，不限时为None
+
+    Raises:
+        ValueError: 格式错误
+    """
+    if value is None or value == '':
+        return None
+    if isinstance(value, str):
+        if '-' not in value:
+            raise ValueError(f"时段格式错误: {value}，应为 HH:MM-HH:MM")
+        value = value.split('-', 1)
+    try:
+        start, end = value
+    except (TypeError, ValueError):
+        raise ValueError(f"时段格式错误: {value}，应为 HH:MM-HH:MM")
+    low = _minutes(start, 0)
+    high = _minutes(end, DAY_MINUTES - 1)
+    if low == 0 and high == DAY_MINUTES - 1:
+        return None
+    return low, high
+
+
+def _minutes(value, default):
+    if value is None or (isinstance(value, str) and not value.strip()):
+        return default
+    minutes = depart_minutes(value.strip() if isinstance(value, str) else value)
+    if not 0 <= minutes < DAY_MINUTES:
+        raise ValueError(f"时刻格式错误: {value}，应为 HH:MM")
+    return minutes
+
+
+def _in_window(minutes, window):
+    if minutes < 0:
+        return False
+    low, high = window
+    if low <= high:
+        return low <= minutes <= high
+    return minutes >= low or minutes <= high
+
+
+def _window_text(window):
+    if window is None:
+        return '不限'
+    low, high = window
+    return f"{low // 60:02d}:{low % 60:02d}-{high // 60:02d}:{high % 60:02d}"
+
+
+class SelectionRule:
+    """
+    车次选择规则
+
+    用法:
+        rule = SelectionRule(seat_types=['二等座', '一等座'], depart='07:00-12:00', train_types=['G', 'D'])
+        selector = rule.compile()
+        for train, seat_type in selector.best(records, limit=3):
+            ...
+    """
+
+    def __init__(self, seat_types=None, depart=None, arrive=None, train_types=None, max_duration=None,
+                 min_seats=1, trains=None, order_by='depart'):
+        """
+        Args:
+            seat_types: 座位类型（按优先级），默认 二等座、一等座
+            depart: 出发时段 'HH:MM-HH:MM' 或 (起点, 终点)
+            arrive: 到达时段（按到达时刻，不区分是否次日到达）
+            train_types: 车次号前缀，如 ['G', 'D']，为空时不限
+            max_duration: 最长历时 'HH:MM' 或分钟数
+            min_seats: 最少余票张数（"有"视为充足）
+            trains: 优先的车次号（按优先级），排在其他满足条件的车次之前
+            order_by: 同等优先级时的排序 depart/arrive/duration
+
+        Raises:
+            ValueError: 条件无效
+        """
+        self.seat_types = list(seat_types or ['二等座', '一等座'])
+        unknown = [seat for seat in self.seat_types if seat not in SEAT_NAME_INDEX]
+        if unknown:
+            raise ValueError(f"未知的座位类型: {'、'.join(unknown)}")
+        self.depart = parse_window(depart)
+        self.arrive = parse_window(arrive)
+        self.train_types = tuple(dict.fromkeys(prefix.strip().upper() for prefix in (train_types or ())
+                                               if prefix.strip()))
+        self.max_duration = None
+        if max_duration not in (None, ''):
+            self.max_duration = depart_minutes(max_duration)
+            if self.max_duration <= 0:
+                raise ValueError(f"最长历时格式错误: {max_duration}，应为 HH:MM")
+        self.min_seats = int(min_seats)
+        if self.min_seats < 1:
+            raise ValueError(f"最少余票张数应不小于1: {min_seats}")
+        self.trains = [code.upper() for code in dict.fromkeys(trains or ())]
+        if order_by not in ORDER_BY:
+            raise ValueError(f"未知的排序方式: {order_by}，应为 {'/'.join(ORDER_BY)}")
+        self.order_by = order_by
+
+    @classmethod
+    def from_dict(cls, spec, seat_types=None, trains=None, min_seats=1):
+        """
+        从任务描述的selection字段创建
+
+        Args:
+            spec: {'depart', 'arrive', 'train_types', 'max_duration', 'min_seats', 'order_by'}
+            seat_types: 任务的座位类型
+            trains: 任务的候选车次（作为优先车次）
+            min_seats: 未指定min_seats时的最少余票张数
+        """
+        if not isinstance(spec, dict):
+            raise ValueError("selection 应为对象")
+        unknown = [field for field in spec if field not in _RULE_FIELDS]
+        if unknown:
+            raise ValueError(f"selection 包含未知字段: {', '.join(unknown)}")
+        train_types = spec.get('train_types')
+        if isinstance(train_types, str):
+            train_types = train_types.replace('，', ',').split(',')
+        return cls(seat_types=seat_types, depart=spec.get('depart'), arrive=spec.get('arrive'),
+                   train_types=train_types, max_duration=spec.get('max_duration'),
+                   min_seats=spec.get('min_seats', min_seats), trains=trains,
+                   order_by=spec.get('order_by', 'depart'))
+
+    @classmethod
+    def parse(cls, text, seat_types=None):
+        """
+        解析一行规则，各项以空格分隔、顺序不限:
+            G,D            车型
+            G1,G3          优先车次
+            07:00-12:00    出发时段（也可写作 出发07:00-12:00）
+            到达-18:00      到达时段
+            历时06:00       最长历时
+            二等座,一等座    座位类型优先级（默认seat_types）
+            2              最少余票张数
+            按历时          排序方式（按出发/按到达/按历时）
+
+        Raises:
+            ValueError: 格式错误
+        """
+        spec = {'seat_types': seat_types}
+        for part in text.replace('，', ',').split():
+            items = [item for item in part.split(',') if item]
+            if part in _ORDER_WORDS:
+                spec['order_by'] = _ORDER_WORDS[part]
+            elif part.isdigit():
+                spec['min_seats'] = int(part)
+            elif part.startswith('到达'):
+                spec['arrive'] = part[2:]
+            elif part.startswith('出发'):
+                spec['depart'] = part[2:]
+            elif part.startswith('历时'):
+                spec['max_duration'] = part[2:].lstrip('<=')
+            elif ':' in part and '-' in part:
+                spec['depart'] = part
+            elif items and all(item in SEAT_NAME_INDEX for item in items):
+                spec['seat_types'] = items
+            elif items and all(item.isalpha() and item.isascii() for item in items):
+                spec['train_types'] = items
+            elif items and all(item.isalnum() and item.isascii() for item in items):
+                spec['trains'] = items
+            else:
+                raise ValueError(f"无法识别 {part}")
+        return cls(**spec)
+
+    def to_dict(self):
+        """任务描述selection字段的形式（座位类型和优先车次属于任务本身）"""
+        return {
+            'depart': _window_text(self.depart) if self.depart else None,
+            'arrive': _window_text(self.arrive) if self.arrive else None,
+            'train_types': list(self.train_types),
+            'max_duration': (f"{self.max_duration // 60:02d}:{self.max_duration % 60:02d}"
+                             if self.max_duration else None),
+            'min_seats': self.min_seats,
+            'order_by': self.order_by,
+        }
+
+    def describe(self):
+        """规则的中文描述"""
+        parts = [f"出发{_window_text(self.depart)}"]
+        if self.arrive:
+            parts.append(f"到达{_window_text(self.arrive)}")
+        if self.train_types:
+            parts.append(f"车型{'/'.join(self.train_types)}")
+        if self.max_duration:
+            parts.append(f"历时不超过{self.max_duration // 60}小时{self.max_duration % 60}分")
+        if self.trains:
+            parts.append(f"优先{'、'.join(self.trains)}")
+        parts.append(f"{'>'.join(self.seat_types)} 至少{self.min_seats}张")
+        parts.append(ORDER_BY[self.order_by])
+        return '，'.join(parts)
+
+    def compile(self):
+        """编译为TrainSelector"""
+        return TrainSelector(self)
+
+    def __repr__(self):
+        return f"SelectionRule({self.describe()})"
+
+
+class TrainSelector:
+    """
+    编译后的选择规则
+
+    predicate(record) 判断车次是否满足条件，sort_key(record) 给出排序键（整数，越小越优先，
+    依次比较 优先车次顺序、座位优先级、出发/到达/历时、出发时刻），best() 返回最优的若干个
+    (车次, 座位类型)。
+    """
+
+    def __init__(self, rule):
+        self.rule = rule
+        self.depart = rule.depart
+        self._seat_columns = tuple(enumerate(SEAT_INDEX[name] for name in rule.seat_types))
+        self._seat_types = tuple(rule.seat_types)
+        self._train_rank = {code: i for i, code in enumerate(rule.trains)}
+        self._schedule = self._compile_schedule(rule)
+        self._order_by = rule.order_by
+
+    @staticmethod
+    def _compile_schedule(rule):
+        """
+        与余票无关的条件编译为一个函数 check(车次号, 出发时刻, 到达时刻, 历时)，
+        只检查规则中指定了的条件；没有条件时返回None
+        """
+        depart = rule.depart
+        arrive = rule.arrive
+        prefixes = rule.train_types or None
+        max_duration = rule.max_duration
+        if depart is None and arrive is None and prefixes is None and max_duration is None:
+            return None
+
+        def check(train_code, start_time, arrive_time, duration):
+            if prefixes is not None and not train_code.startswith(prefixes):
+                return False
+            if depart is not None and not _in_window(clock_minutes(start_time), depart):
+                return False
+            if arrive is not None and not _in_window(clock_minutes(arrive_time), arrive):
+                return False
+            if max_duration is not None and not 0 <= clock_minutes(duration) <= max_duration:
+                return False
+            return True
+        return check
+
+    def matches_schedule(self, record):
+        """是否满足时段、车型、历时条件（不看余票，开售前预览用）"""
+        return self._schedule is None or self._schedule(record.train_code, record.start_time,
+                                                        record.arrive_time, record.duration)
+
+    def accepts_raw(self, raw):
+        """
+        按原始车次字符串预先判断时段、车型、历时条件，不满足的行不必解码
+
+        格式异常的行返回True，交由解码时处理。
+        """
+        if self._schedule is None:
+            return True
+        fields = schedule_of(raw)
+        return fields is None or self._schedule(*fields)
+
+    def seat_rank(self, record):
+        """
+        按优先级第一个余票足够的座位
+
+        Returns:
+            int: 座位在seat_types中的下标，都不满足时为None
+        """
+        seats = record.seats
+        minimum = self.rule.min_seats
+        for rank, column in self._seat_columns:
+            if seats[column] >= minimum:
+                return rank
+        return None
+
+    def predicate(self, record):
+        """车次是否满足规则（含余票）"""
+        return self.seat_rank(record) is not None and self.matches_schedule(record)
+
+    def sort_key(self, record, seat_rank=None):
+        """排序键（整数，越小越优先）"""
+        if seat_rank is None:
+            seat_rank = self.seat_rank(record)
+        depart = clock_minutes(record.start_time)
+        if depart < 0:
+            depart = DAY_MINUTES - 1
+        if self._order_by == 'depart':
+            value = depart
+        else:
+            duration = clock_minutes(record.duration)
+            duration = duration if duration >= 0 else _ORDER_MASK
+            value = duration if self._order_by == 'duration' else depart + duration
+        rank = self._train_rank.get(record.train_code, len(self._train_rank))
+        return (((rank << 3 | seat_rank) << 14 | min(value, _ORDER_MASK)) << 11) | depart
+
+    def best(self, records, limit=1, ordered=False):
+        """
+        选出最优的若干个车次
+
+        Args:
+            records: 可迭代的TrainRecord（可以是车次生成器）
+            limit: 返回个数
+            ordered: records已按出发时刻排序（DepartureIndex）；按出发时刻排序且没有优先车次时，
+                     首选座位满足的车次凑够limit个即停止
+
+        Returns:
+            list: [(车次, 座位类型)]，按优先级排列
+        """
+        stop_early = ordered and self._order_by == 'depart' and not self._train_rank
+        columns = self._seat_columns
+        minimum = self.rule.min_seats
+        schedule = self._schedule
+        sort_key = self.sort_key
+        matches = []
+        found = 0
+        for order, record in enumerate(records):
+            seats = record.seats
+            for rank, column in columns:
+                if seats[column] >= minimum:
+                    break
+            else:
+                continue
+            if schedule is not None and not schedule(record.train_code, record.start_time,
+                                                     record.arrive_time, record.duration):
+                continue
+            # 加入顺序作为最后的排序键，排序键相同时保持原来的顺序
+            matches.append((sort_key(record, rank), order, record))
+            if stop_early and rank == 0:
+                found += 1
+                if found >= limit:
+                    break
+        return [(record, self._seat_types[key >> 25 & 7]) for key, _, record in heapq.nsmallest(limit, matches)]
+
+
+class DepartureIndex:
+    """
+    按出发时刻排序的车次索引
+
+    按出发时段选择时用二分查找取出时段内的车次，只对这部分车次做其余判断；
+    按出发时刻排序的规则首选座位凑够所需个数即停止。同一查询结果可供多条规则（如多个任务）复用。
+
+    用法:
+        index = DepartureIndex(records)
+        candidates = index.best(rule.compile(), limit=3)
+    """
+
+    def __init__(self, records=()):
+        pairs = sorted(((clock_minutes(record.start_time), order, record)
+                        for order, record in enumerate(records)), key=lambda item: item[:2])
+        self.minutes = [minutes for minutes, _, _ in pairs]
+        self.records = [record for _, _, record in pairs]
+
+    def __len__(self):
+        return len(self.records)
+
+    def between(self, window):
+        """
+        出发时段内的车次（按出发时刻排序）
+
+        Args:
+            window: (起点分钟, 终点分钟)，起点晚于终点表示跨零点；None表示全部
+        """
+        if window is None:
+            return self.records
+        low, high = window
+        if low <= high:
+            return self.records[bisect_left(self.minutes, low):bisect_right(self.minutes, high)]
+        # 跨零点的时段，当天凌晨出发的车次在前
+        return (self.records[bisect_left(self.minutes, 0):bisect_right(self.minutes, high)] +
+                self.records[bisect_left(self.minutes, low):])
+
+    def best(self, selector, limit=1):
+        """按selector选出最优的若干个 (车次, 座位类型)"""
+        return selector.best(self.between(selector.depart), limit, ordered=True)
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""会话预热状态模型"""
+
+import time
+
+# 访问leftTicket/init页面时由12306设置的引导cookies
+DEFAULT_BOOTSTRAP_COOKIES = ('JSESSIONID', 'route', 'BIGipServerotn')
+
+# 引导cookies获取后多少秒内视为有效
+DEFAULT_MAX_AGE_S = 600
+
+
+class SessionWarmState:
+    """
+    会话预热状态
+
+    记录引导cookies是否齐全以及何时获取。查询前先检查：cookies齐全且未过期时
+    不再访问首页；缺少cookies、超过max_age_s或上次查询返回了非JSON页面（多为
+    会话失效或被拦截）时才重新访问。
+    """
+
+    def __init__(self, cookie_names=DEFAULT_BOOTSTRAP_COOKIES, max_age_s=DEFAULT_MAX_AGE_S):
+        """
+        Args:
+            cookie_names: 需要具备的引导cookies
+            max_age_s: 引导cookies的有效秒数
+        """
+        self.cookie_names = tuple(cookie_names)
+        self.max_age_s = max_age_s
+        self.warmed_at = None
+        # 被标记为需要重新访问的原因
+        self.stale_reason = None
+        self.visits = 0
+        self.skipped = 0
+
+    @property
+    def age(self):
+        """距上次访问首页的秒数，未访问过时为None"""
+        return time.monotonic() - self.warmed_at if self.warmed_at is not None else None
+
+    def missing(self, cookies):
+        """cookies中缺少的引导cookies"""
+        return [name for name in self.cookie_names if name not in cookies]
+
+    def bootstrap_reason(self, cookies):
+        """
+        判断是否需要访问首页
+
+        Args:
+            cookies: 会话的cookie jar
+
+        Returns:
+            str: 需要访问的原因，不需要时返回None
+        """
+        if self.stale_reason:
+            return self.stale_reason
+        missing = self.missing(cookies)
+        if missing:
+            return f"缺少cookies: {', '.join(missing)}"
+        # cookies齐全但不是本进程获取的（如从cookies文件加载），从第一次检查起计时
+        if self.warmed_at is None:
+            self.warmed_at = time.monotonic()
+        elif self.max_age_s is not None and self.age >= self.max_age_s:
+            return f"引导cookies已获取{self.age:.0f}s"
+        return None
+
+    def mark_visited(self):
+        """首页访问成功"""
+        self.visits += 1
+        self.warmed_at = time.monotonic()
+        self.stale_reason = None
+
+    def mark_skipped(self):
+        self.skipped += 1
+
+    def mark_stale(self, reason):
+        """下次查询前重新访问首页"""
+        self.stale_reason = reason
+
+    def stats(self):
+        return {
+            'visits': self.visits,
+            'skipped': self.skipped,
+            'age_s': round(self.age, 1) if self.age is not None else None,
+        }
@@ -0,0 +1,310 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""车次数据模型"""
+
+import sys
+import urllib.parse
+
+# 查询结果最少字段数
+MIN_FIELD_COUNT = 35
+
+# 座位余票编码
+SEAT_NONE = 0            # 无
+SEAT_NOT_OFFERED = -1    # -- 或空，该车次不提供此座位
+SEAT_NOT_ON_SALE = -2    # * 未开售
+SEAT_PLENTY = 127        # 有，余票充足
+
+# 座位类型: (名称, 座位代码, 查询结果字段下标)，顺序即TrainRecord.seats的顺序
+SEAT_FIELDS = (
+    ('商务座', '9', 32),
+    ('一等座', 'M', 31),
+    ('二等座', 'O', 30),
+    ('软卧', '4', 23),
+    ('硬卧', '3', 28),
+    ('硬座', '1', 29),
+    ('无座', 'WZ', 26),
+)
+
+# 座位名称 -> seats下标
+SEAT_NAME_INDEX = {name: idx for idx, (name, _, _) in enumerate(SEAT_FIELDS)}
+
+# 座位名称/代码 -> seats下标（硬座与无座共用代码1，按代码查找时取硬座）
+SEAT_INDEX = dict(SEAT_NAME_INDEX)
+for _idx, (_name, _code, _pos) in enumerate(SEAT_FIELDS):
+    SEAT_INDEX.setdefault(_code, _idx)
+
+_SEAT_POSITIONS = tuple(pos for _, _, pos in SEAT_FIELDS)
+
+_SEAT_TEXT_CODES = {
+    '有': SEAT_PLENTY,
+    '无': SEAT_NONE,
+    '*': SEAT_NOT_ON_SALE,
+    '--': SEAT_NOT_OFFERED,
+    '': SEAT_NOT_OFFERED,
+}
+
+_SEAT_CODE_TEXTS = {
+    SEAT_PLENTY: '有',
+    SEAT_NONE: '无',
+    SEAT_NOT_ON_SALE: '*',
+    SEAT_NOT_OFFERED: '--',
+}
+
+
+def encode_seat(value):
+    """将座位余票文本编码为小整数"""
+    code = _SEAT_TEXT_CODES.get(value)
+    if code is not None:
+        return code
+    if '#' in value:
+        return encode_seat(value.split('#', 1)[0])
+    if value.isdigit():
+        return min(int(value), SEAT_PLENTY)
+    return SEAT_NOT_OFFERED
+
+
+def seat_text(count):
+    """将座位余票编码还原为12306的显示文本"""
+    text = _SEAT_CODE_TEXTS.get(count)
+    return text if text is not None else str(count)
+
+
+def seat_display(count):
+    """座位余票编码的界面显示文本（未开售显示为"未开售"）"""
+    if count == SEAT_NOT_ON_SALE:
+        return '未开售'
+    return seat_text(count)
+
+
+_MISSING = object()
+
+
+def _unquote(value):
+    """仅在字段包含转义时解码"""
+    return urllib.parse.unquote(value) if '%' in value else value
+
+
+def train_code_of(raw):
+    """只取出原始车次字符串中的车次号（不完整切分），格式异常时返回None"""
+    parts = raw.split('|', 4)
+    return parts[3] if len(parts) > 4 else None
+
+
+def schedule_of(raw):
+    """
+    只取出原始车次字符串中的车次号、出发时刻、到达时刻、历时（不完整切分）
+
+    Returns:
+        tuple: (车次号, 出发时刻, 到达时刻, 历时)，格式异常时返回None
+    """
+    parts = raw.split('|', 11)
+    if len(parts) < 12:
+        return None
+    return parts[3], parts[8], parts[9], parts[10]
+
+
+class TrainRecord:
+    """
+    车次记录
+
+    由leftTicket/query返回的原始字符串一次切分得到。座位余票以小整数保存，
+    同时兼容原先字典形式的中文键访问（如 record.get('列车号')）。
+    """
+
+    __slots__ = (
+        'secret_str', 'train_no', 'train_code',
+        'from_station', 'to_station', 'from_station_name', 'to_station_name',
+        'start_time', 'arrive_time', 'duration', 'start_date',
+        'left_ticket', 'train_location', 'seats', 'seat_discount_info',
+    )
+
+    # 原字典键 -> 属性名
+    KEY_ATTRS = {
+        '列车号': 'train_code',
+        '出发站代码': 'from_station',
+        '到达站代码': 'to_station',
+        '出发时间': 'start_time',
+        '到达时间': 'arrive_time',
+        '历时': 'duration',
+        '出发站': 'from_station_name',
+        '到达站': 'to_station_name',
+        '日期': 'start_date',
+        'train_no': 'train_no',
+        'leftTicket': 'left_ticket',
+        'train_location': 'train_location',
+        'secretStr': 'secret_str',
+        'seat_discount_info': 'seat_discount_info',
+    }
+
+    # items()输出的键顺序，与原先decode_train_info返回的字典一致
+    FIELD_KEYS = (
+        '列车号', '出发站代码', '到达站代码', '出发时间', '到达时间', '历时', '出发站', '到达站', '日期',
+        '商务座', '一等座', '二等座', '硬卧', '软卧', '硬座', '无座',
+        'train_no', 'leftTicket', 'train_location',
+    )
+
+    def __init__(self, secret_str, train_no, train_code, from_station, to_station,
+                 start_time, arrive_time, duration, start_date, left_ticket, train_location,
+                 seats, from_station_name=None, to_station_name=None,
+                 seat_discount_info='M0097O0097W0097'):
+        self.secret_str = secret_str
+        self.train_no = train_no
+        self.train_code = train_code
+        self.from_station = from_station
+        self.to_station = to_station
+        self.from_station_name = from_station_name or from_station
+        self.to_station_name = to_station_name or to_station
+        self.start_time = start_time
+        self.arrive_time = arrive_time
+        self.duration = duration
+        self.start_date = start_date
+        self.left_ticket = left_ticket
+        self.train_location = train_location
+        self.seats = seats
+        self.seat_discount_info = seat_discount_info
+
+    @classmethod
+    def from_raw(cls, raw, station_names=None):
+        """
+        从leftTicket/query返回的原始字符串解析车次
+
+        Args:
+            raw: 以|分隔的原始车次字符串
+            station_names: 车站代码到名称的映射
+
+        Returns:
+            TrainRecord: 车次记录
+
+        Raises:
+            ValueError: 字段数量不足
+        """
+        parts = raw.split('|')
+        if len(parts) < MIN_FIELD_COUNT:
+            raise ValueError(f"数据格式异常，字段数量: {len(parts)}")
+
+        # 车站、时间等字段在多次查询快照之间大量重复，驻留后共享同一对象
+        intern = sys.intern
+        from_station = intern(parts[6])
+        to_station = intern(parts[7])
+        names = station_names or {}
+
+        return cls(
+            # secretStr保持原始的URL编码形式，提交订单时直接使用
+            secret_str=parts[0],
+            train_no=intern(parts[2]),
+            train_code=intern(parts[3]),
+            from_station=from_station,
+            to_station=to_station,
+            from_station_name=names.get(from_station, from_station),
+            to_station_name=names.get(to_station, to_station),
+            start_time=intern(parts[8]),
+            arrive_time=intern(parts[9]),
+            duration=intern(parts[10]),
+            start_date=intern(parts[13]),
+            left_ticket=_unquote(parts[12]),
+            train_location=intern(parts[15]),
+            seats=tuple([encode_seat(parts[pos]) for pos in _SEAT_POSITIONS]),
+        )
+
+    def seat_count(self, seat):
+        """
+        获取座位余票编码
+
+        Args:
+            seat: 座位名称（如 二等座）或座位代码（如 O）
+
+        Returns:
+            int: 余票数量，或 SEAT_PLENTY/SEAT_NONE/SEAT_NOT_ON_SALE/SEAT_NOT_OFFERED
+        """
+        idx = SEAT_INDEX.get(seat)
+        if idx is None:
+            return SEAT_NOT_OFFERED
+        return self.seats[idx]
+
+    def has_seat(self, seat, minimum=1):
+        """判断座位余票是否满足数量要求"""
+        return self.seat_count(seat) >= minimum
+
+    def seat_display(self, seat):
+        """座位余票的界面显示文本"""
+        return seat_display(self.seat_count(seat))
+
+    # ---- 兼容字典形式的访问 ----
+
+    def get(self, key, default=None):
+        """按原字典键取值"""
+        attr = self.KEY_ATTRS.get(key)
+        if attr is not None:
+            return getattr(self, attr)
+        idx = SEAT_NAME_INDEX.get(key)
+        if idx is not None:
+            return seat_text(self.seats[idx])
+        return default
+
+    def __getitem__(self, key):
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key, value):
+        attr = self.KEY_ATTRS.get(key)
+        if attr is None:
+            raise KeyError(key)
+        setattr(self, attr, value)
+
+    def __contains__(self, key):
+        return self.get(key, _MISSING) is not _MISSING
+
+    def items(self):
+        """按原字典顺序返回 (键, 值)"""
+        return [(key, self.get(key)) for key in self.FIELD_KEYS]
+
+    def to_dict(self):
+        """转换为原先的字典格式"""
+        result = dict(self.items())
+        result['secretStr'] = self.secret_str
+        result['seat_discount_info'] = self.seat_discount_info
+        return result
+
+    def __repr__(self):
+        return f"TrainRecord({self.train_code} {self.from_station}->{self.to_station} {self.start_time}-{self.arrive_time})"
+
+
+class TrainRecordList(list):
+    """车次列表，支持按车次号和train_no常数时间查找"""
+
+    __slots__ = ('_by_code', '_by_train_no')
+
+    def __init__(self, records=()):
+        super().__init__(records)
+        self._by_code = None
+        self._by_train_no = None
+
+    def append(self, record):
+        super().append(record)
+        self._by_code = self._by_train_no = None
+
+    def extend(self, records):
+        super().extend(records)
+        self._by_code = self._by_train_no = None
+
+    def _build_index(self):
+        self._by_code = {}
+        self._by_train_no = {}
+        for record in self:
+            self._by_code.setdefault(record.train_code, record)
+            self._by_train_no.setdefault(record.train_no, record)
+
+    def by_code(self, train_code):
+        """按车次号（如 G101）查找"""
+        if self._by_code is None:
+            self._build_index()
+        return self._by_code.get(train_code)
+
+    def by_train_no(self, train_no):
+        """按车次编号查找"""
+        if self._by_train_no is None:
+            self._build_index()
+        return self._by_train_no.get(train_no)
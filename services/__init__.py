@@ -1,20 +1,55 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
-"""Services package"""
-
-from .ticket_debugger import TrainTicketDebugger
-from .auth_service import AuthService
-from .cookie_service import CookieService
-from .order_query_service import OrderQueryService
-from .order_submit_service import OrderSubmitService
-from .grab_ticket_service import GrabTicketService
-
-__all__ = [
-    'TrainTicketDebugger',
-    'AuthService',
-    'CookieService',
-    'OrderQueryService',
-    'OrderSubmitService',
-    'GrabTicketService'
-]
+"""
+Services package
+
+导出的名称在首次访问时才导入所在的子模块，只查询时不会加载下单、抢票、会话存储、
+调试转储等用不到的服务及其依赖。
+"""
+
+import importlib
+
+# 导出名称 -> 所在子模块
+_EXPORTS = {
+    'TrainTicketDebugger': 'ticket_debugger',
+    'AuthService': 'auth_service',
+    'CookieService': 'cookie_service',
+    'SessionStore': 'session_store',
+    'SessionRecord': 'session_store',
+    'get_session_store': 'session_store',
+    'OrderQueryService': 'order_query_service',
+    'OrderSubmitService': 'order_submit_service',
+    'GrabTicketService': 'grab_ticket_service',
+    'AsyncHttpClient': 'http_client',
+    'run_sync': 'http_client',
+    'ServerClock': 'server_clock',
+    'JobScheduler': 'job_scheduler',
+    'JobResult': 'job_scheduler',
+    'OrderPayload': 'order_payload',
+    'SpanRecorder': 'tracing',
+    'Span': 'tracing',
+    'DumpStore': 'dump_store',
+    'QueryCache': 'query_cache',
+    'get_shared_query_cache': 'query_cache',
+    'FanOutQuery': 'fanout_query',
+    'FanOutStats': 'fanout_query',
+    'RequestThrottle': 'throttle',
+    'CircuitOpenError': 'throttle',
+    'get_shared_throttle': 'throttle',
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f'.{module}', __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -4,43 +4,56 @@
 """登录认证服务模块"""
 
 import json
-import requests
 import getpass
 from utils import get_logger, encrypt_password
 
+from .http_client import AsyncHttpClient, run_sync
+
 
 class AuthService:
     """12306认证服务"""
     
-    def __init__(self, session=None, logger=None):
+    def __init__(self, session=None, logger=None, client=None):
         """
         初始化认证服务
         
         Args:
             session: requests会话对象
             logger: 日志记录器
+            client: 异步HTTP客户端
         """
-        self.session = session if session is not None else requests.Session()
+        self.client = client or AsyncHttpClient(session)
+        self.session = self.client.session
         self.logger = logger or get_logger('12306')
+        # 最近一次登录成功的账号（手机号）
+        self.account = None
 
     def visit_login_page(self):
         """访问登录页面获取初始cookies"""
+        return run_sync(self.visit_login_page_async())
+
+    async def visit_login_page_async(self):
+        """访问登录页面获取初始cookies（异步）"""
         try:
             self.logger.info("访问登录页面...")
-            response = self.session.get("https://kyfw.12306.cn/", timeout=30)
-            self.logger.info(f"主页访问状态码: {response.status_code}")
+            response = await self.client.get(self.client.url("/"))
+            self.logger.info("主页访问状态码: %s", response.status_code)
 
-            response = self.session.get("https://kyfw.12306.cn/otn/resources/login.html", timeout=30)
-            self.logger.info(f"登录页访问状态码: {response.status_code}")
+            response = await self.client.get(self.client.url("/otn/resources/login.html"))
+            self.logger.info("登录页访问状态码: %s", response.status_code)
             return response.status_code == 200
         except Exception as e:
-            self.logger.error(f"访问登录页面失败: {e}")
+            self.logger.error("访问登录页面失败: %s", e)
             return False
 
     def check_login_verify(self, username):
         """检查登录验证方式"""
+        return run_sync(self.check_login_verify_async(username))
+
+    async def check_login_verify_async(self, username):
+        """检查登录验证方式（异步）"""
         try:
-            url = "https://kyfw.12306.cn/passport/web/checkLoginVerify"
+            url = self.client.url("/passport/web/checkLoginVerify")
 
             headers = self.session.headers.copy()
             headers.update({
@@ -53,11 +66,11 @@ class AuthService:
                 'appid': 'otn'
             }
 
-            self.logger.info(f"checkLoginVerify请求参数: {data}")
-            response = self.session.post(url, data=data, headers=headers, timeout=30)
+            self.logger.info("checkLoginVerify请求参数: %s", data)
+            response = await self.client.post(url, data=data, headers=headers)
 
-            self.logger.info(f"checkLoginVerify响应状态码: {response.status_code}")
-            self.logger.info(f"checkLoginVerify响应内容: {response.text}")
+            self.logger.info("checkLoginVerify响应状态码: %s", response.status_code)
+            self.logger.info("checkLoginVerify响应内容: %s", response.text)
 
             if response.status_code == 200:
                 result = response.json()
@@ -65,42 +78,50 @@ class AuthService:
                     self.logger.info("checkLoginVerify成功")
                     return True, result
                 else:
-                    self.logger.error(f"checkLoginVerify失败: {result.get('result_message', '未知错误')}")
+                    self.logger.error("checkLoginVerify失败: %s", result.get('result_message', '未知错误'))
                     return False, result
             return False, None
         except Exception as e:
-            self.logger.error(f"检查登录验证失败: {e}")
+            self.logger.error("检查登录验证失败: %s", e)
             return False, None
 
     def get_sms_code(self, phone, id_last_four):
         """获取短信验证码"""
+        return run_sync(self.get_sms_code_async(phone, id_last_four))
+
+    async def get_sms_code_async(self, phone, id_last_four):
+        """获取短信验证码（异步）"""
         try:
-            url = "https://kyfw.12306.cn/passport/web/getMessageCode"
+            url = self.client.url("/passport/web/getMessageCode")
             data = {
                 'appid': 'otn',
                 'username': phone,
                 'castNum': id_last_four
             }
-            self.logger.info(f"发送验证码请求参数: {data}")
-            response = self.session.post(url, data=data, timeout=30)
+            self.logger.info("发送验证码请求参数: %s", data)
+            response = await self.client.post(url, data=data)
 
             if response.status_code == 200:
                 result = response.json()
-                self.logger.info(f"发送短信验证码响应: {result}")
+                self.logger.info("发送短信验证码响应: %s", result)
                 if result.get('result_code') == 0 or result.get('result_code') == '0':
                     return True, result
                 else:
-                    self.logger.error(f"发送验证码失败: {result.get('result_message', '未知错误')}")
+                    self.logger.error("发送验证码失败: %s", result.get('result_message', '未知错误'))
                     return False, result
             return False, None
         except Exception as e:
-            self.logger.error(f"发送短信验证码失败: {e}")
+            self.logger.error("发送短信验证码失败: %s", e)
             return False, None
 
     def login_with_sms(self, phone, sms_code, password):
         """使用短信验证码登录"""
+        return run_sync(self.login_with_sms_async(phone, sms_code, password))
+
+    async def login_with_sms_async(self, phone, sms_code, password):
+        """使用短信验证码登录（异步）"""
         try:
-            url = "https://kyfw.12306.cn/passport/web/login"
+            url = self.client.url("/passport/web/login")
 
             # 加密密码
             encrypted_password = ''
@@ -110,7 +131,7 @@ class AuthService:
                 if not encrypted_password:
                     self.logger.error("密码加密失败")
                     return False, None
-                self.logger.info(f"密码加密成功: {encrypted_password[:30]}...")
+                self.logger.info("密码加密成功: %s...", encrypted_password[:30])
 
             # 更新请求头
             headers = self.session.headers.copy()
@@ -134,11 +155,11 @@ class AuthService:
                 'appid': 'otn'
             }
 
-            self.logger.info(f"登录请求参数: {data}")
-            response = self.session.post(url, data=data, headers=headers, timeout=30)
+            self.logger.info("登录请求参数: %s", data)
+            response = await self.client.post(url, data=data, headers=headers)
 
-            self.logger.info(f"登录响应状态码: {response.status_code}")
-            self.logger.info(f"登录响应内容: {response.text}")
+            self.logger.info("登录响应状态码: %s", response.status_code)
+            self.logger.info("登录响应内容: %s", response.text)
 
             if response.status_code == 200:
                 result = response.json()
@@ -146,61 +167,73 @@ class AuthService:
                 if result.get('result_code') == 0 or result.get('result_code') == '0':
                     self.logger.info("登录成功!")
                     uamtk = result.get('uamtk', '')
-                    self.logger.info(f"获取到uamtk: {uamtk}")
+                    self.logger.info("获取到uamtk: %s", uamtk)
 
                     if uamtk:
-                        return self.auth_uamtk(uamtk)
+                        return await self.auth_uamtk_async(uamtk)
                     return True, result
                 else:
-                    self.logger.error(f"登录失败: {result.get('result_message', '未知错误')}")
+                    self.logger.error("登录失败: %s", result.get('result_message', '未知错误'))
                     return False, result
             return False, None
         except Exception as e:
-            self.logger.error(f"登录失败: {e}")
+            self.logger.error("登录失败: %s", e)
             return False, None
 
     def auth_uamtk(self, uamtk):
         """使用uamtk获取认证token"""
+        return run_sync(self.auth_uamtk_async(uamtk))
+
+    async def auth_uamtk_async(self, uamtk):
+        """使用uamtk获取认证token（异步）"""
         try:
-            url = "https://kyfw.12306.cn/passport/web/auth/uamtk"
+            url = self.client.url("/passport/web/auth/uamtk")
             data = {'appid': 'otn'}
-            response = self.session.post(url, data=data, timeout=30)
+            response = await self.client.post(url, data=data)
 
             if response.status_code == 200:
                 result = response.json()
-                self.logger.info(f"UAMTK认证响应: {result}")
+                self.logger.info("UAMTK认证响应: %s", result)
 
                 if result.get('result_code') == 0 or result.get('result_code') == '0':
                     new_apptk = result.get('newapptk')
                     if new_apptk:
-                        return self.auth_uamauthclient(new_apptk)
+                        return await self.auth_uamauthclient_async(new_apptk)
             return False, None
         except Exception as e:
-            self.logger.error(f"UAMTK认证失败: {e}")
+            self.logger.error("UAMTK认证失败: %s", e)
             return False, None
 
     def auth_uamauthclient(self, apptk):
         """使用apptk完成最终认证"""
+        return run_sync(self.auth_uamauthclient_async(apptk))
+
+    async def auth_uamauthclient_async(self, apptk):
+        """使用apptk完成最终认证（异步）"""
         try:
-            url = "https://kyfw.12306.cn/otn/uamauthclient"
+            url = self.client.url("/otn/uamauthclient")
             data = {'tk': apptk}
-            response = self.session.post(url, data=data, timeout=30)
+            response = await self.client.post(url, data=data)
 
             if response.status_code == 200:
                 result = response.json()
-                self.logger.info(f"最终认证响应: {result}")
+                self.logger.info("最终认证响应: %s", result)
 
                 if result.get('result_code') == 0 or result.get('result_code') == '0':
                     username = result.get('username')
-                    self.logger.info(f"认证成功，用户: {username}")
+                    self.logger.info("认证成功，用户: %s", username)
                     return True, result
             return False, None
         except Exception as e:
-            self.logger.error(f"最终认证失败: {e}")
+            self.logger.error("最终认证失败: %s", e)
             return False, None
 
     def check_login_status(self):
         """检查登录状态"""
+        return run_sync(self.check_login_status_async())
+
+    async def check_login_status_async(self):
+        """检查登录状态（异步）"""
         try:
             self.logger.info("检查登录状态...")
 
@@ -208,33 +241,33 @@ class AuthService:
             has_tk = 'tk' in self.session.cookies
             has_ukey = 'uKey' in self.session.cookies
 
-            self.logger.info(f"认证cookie检查 - tk: {has_tk}, uKey: {has_ukey}")
+            self.logger.info("认证cookie检查 - tk: %s, uKey: %s", has_tk, has_ukey)
 
             if not has_tk:
                 self.logger.warning("缺少tk认证cookie，需要重新登录")
                 return False
 
-            url = "https://kyfw.12306.cn/otn/login/checkUser"
+            url = self.client.url("/otn/login/checkUser")
 
             # 保存checkUser前的所有cookies
             saved_cookies = dict(self.session.cookies)
-            self.logger.info(f"checkUser前JSESSIONID: {saved_cookies.get('JSESSIONID')}")
+            self.logger.info("checkUser前JSESSIONID: %s", saved_cookies.get('JSESSIONID'))
 
-            response = self.session.post(url, timeout=30)
+            response = await self.client.post(url)
 
             # checkUser会改变JSESSIONID,我们需要恢复原始的
             jsessionid_after = self.session.cookies.get('JSESSIONID')
             if saved_cookies.get('JSESSIONID') != jsessionid_after:
-                self.logger.warning(f"checkUser改变了JSESSIONID: {saved_cookies.get('JSESSIONID')} -> {jsessionid_after}")
+                self.logger.warning("checkUser改变了JSESSIONID: %s -> %s", saved_cookies.get('JSESSIONID'), jsessionid_after)
                 # 恢复登录时的cookies
                 self.session.cookies.clear()
                 self.session.cookies.update(saved_cookies)
-                self.logger.info(f"已恢复登录时的JSESSIONID: {self.session.cookies.get('JSESSIONID')}")
+                self.logger.info("已恢复登录时的JSESSIONID: %s", self.session.cookies.get('JSESSIONID'))
 
             if response.status_code == 200:
                 try:
                     result = response.json()
-                    self.logger.info(f"checkUser响应: {result}")
+                    self.logger.info("checkUser响应: %s", result)
 
                     if result.get('status'):
                         data = result.get('data', {})
@@ -242,22 +275,22 @@ class AuthService:
                             self.logger.info("用户已登录且认证完整")
                             return True
                         else:
-                            self.logger.warning(f"checkUser返回status=true但data异常: {data}")
+                            self.logger.warning("checkUser返回status=true但data异常: %s", data)
                             return False
                     else:
-                        self.logger.warning(f"用户未登录，checkUser返回: {result}")
+                        self.logger.warning("用户未登录，checkUser返回: %s", result)
                         return False
 
                 except json.JSONDecodeError as e:
-                    self.logger.error(f"解析登录状态响应失败: {e}")
-                    self.logger.error(f"响应内容: {response.text[:500]}")
+                    self.logger.error("解析登录状态响应失败: %s", e)
+                    self.logger.error("响应内容: %s", response.text[:500])
                     return False
             else:
-                self.logger.error(f"检查登录状态HTTP错误: {response.status_code}")
+                self.logger.error("检查登录状态HTTP错误: %s", response.status_code)
                 return False
 
         except Exception as e:
-            self.logger.error(f"检查登录状态异常: {e}")
+            self.logger.error("检查登录状态异常: %s", e)
             return False
 
     def login_process(self):
@@ -311,21 +344,26 @@ class AuthService:
                 return False
 
             print("\n登录成功！")
+            self.account = phone_number
             return True
 
         except KeyboardInterrupt:
             print("\n登录被用户中断")
             return False
         except Exception as e:
-            self.logger.error(f"登录流程异常: {e}")
+            self.logger.error("登录流程异常: %s", e)
             print(f"登录过程中发生错误: {e}")
             return False
 
     def get_login_user_name(self):
         """获取当前登录用户的姓名"""
+        return run_sync(self.get_login_user_name_async())
+
+    async def get_login_user_name_async(self):
+        """获取当前登录用户的姓名（异步）"""
         try:
-            url = "https://kyfw.12306.cn/otn/modifyUser/queryLoginUser"
-            response = self.session.get(url, timeout=10)
+            url = self.client.url("/otn/modifyUser/queryLoginUser")
+            response = await self.client.get(url, timeout=10)
 
             if response.status_code == 200:
                 data = response.json()
@@ -334,9 +372,9 @@ class AuthService:
                     # 尝试获取用户姓名
                     name = user_data.get('name') or user_data.get('user_name')
                     if name:
-                        self.logger.info(f"获取到登录用户姓名: {name}")
+                        self.logger.info("获取到登录用户姓名: %s", name)
                         return name
         except Exception as e:
-            self.logger.warning(f"获取登录用户信息失败: {e}")
+            self.logger.warning("获取登录用户信息失败: %s", e)
 
         return None
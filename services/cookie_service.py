@@ -11,19 +11,65 @@ from utils import get_logger
 class CookieService:
     """Cookie管理服务"""
     
-    def __init__(self, session=None, logger=None):
+    def __init__(self, session=None, logger=None, store=None):
         """
         初始化Cookie服务
         
         Args:
             session: requests会话对象
             logger: 日志记录器
+            store: 按账号保存会话的SessionStore
         """
         self.session = session
         self.logger = logger or get_logger('12306')
+        self.store = store
+
+    def load_session(self, account, record=None):
+        """
+        从会话存储加载账号的cookies（已过期的丢弃）
+
+        Args:
+            account: 账号
+            record: 已预先读取的SessionRecord，为空时从存储读取
+
+        Returns:
+            bool: 是否加载到有效的tk
+        """
+        try:
+            if record is None:
+                if self.store is None:
+                    self.logger.warning("未配置会话存储")
+                    return False
+                record = self.store.load(account)
+            if record is None:
+                self.logger.warning("会话存储中没有账号 %s 的有效会话", account)
+                return False
+
+            count = record.apply(self.session.cookies)
+            self.logger.info("加载账号 %s 的cookies %d 个", account, count)
+            if 'tk' not in self.session.cookies:
+                self.logger.warning("警告: 缺少tk认证cookie，可能需要重新登录")
+                return False
+            return True
+        except Exception as e:
+            self.logger.error("加载会话失败: %s", e)
+            return False
+
+    def save_session(self, account):
+        """把当前cookies保存到会话存储"""
+        if self.store is None:
+            self.logger.warning("未配置会话存储")
+            return False
+        try:
+            count = self.store.save(account, self.session.cookies)
+            self.logger.info("账号 %s 的cookies已保存（%d 个）", account, count)
+            return True
+        except Exception as e:
+            self.logger.error("保存会话失败: %s", e)
+            return False
 
     def load_cookies(self, filename='cookies.pkl'):
-        """加载cookies"""
+        """加载cookies（旧版pickle文件）"""
         try:
             if os.path.exists(filename):
                 with open(filename, 'rb') as f:
@@ -50,10 +96,12 @@ class CookieService:
             return False
 
     def save_cookies(self, filename='cookies.pkl'):
-        """保存cookies到文件"""
+        """保存cookies到文件（旧版pickle文件，先写临时文件再替换）"""
         try:
-            with open(filename, 'wb') as f:
+            tmp_path = f'{filename}.tmp'
+            with open(tmp_path, 'wb') as f:
                 pickle.dump(self.session.cookies, f)
+            os.replace(tmp_path, filename)
             self.logger.info(f"Cookies已保存到 {filename}")
             return True
         except Exception as e:
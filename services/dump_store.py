@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+调试响应转储模块
+
+订票过程中值得保留的响应（非JSON的查询响应、确认乘客页面等）压缩后放入内存中的
+环形缓冲区，只保留最近max_entries条，请求路径上没有磁盘I/O。流程失败或需要时
+由后台线程把缓冲区写入一个zip归档：每条响应一个文件，index.json记录各文件对应的
+接口、状态码、时间和写出原因；归档超过大小上限时按 dumps.zip -> dumps.1.zip ... 轮转。
+
+未启用时客户端上的dumps为None，调用方只多一次属性判断。
+"""
+
+import json
+import os
+import threading
+import time
+import zipfile
+import zlib
+from collections import deque
+from datetime import datetime
+
+from utils import get_logger
+
+# 默认参数
+DEFAULT_ARCHIVE = 'dumps/dumps.zip'
+DEFAULT_MAX_ENTRIES = 20
+DEFAULT_MAX_ARCHIVE_BYTES = 5 * 1024 * 1024
+DEFAULT_BACKUP_COUNT = 3
+
+INDEX_NAME = 'index.json'
+
+# 多个任务的转储可能写入同一个归档，写归档时按进程串行
+_archive_lock = threading.Lock()
+
+
+class DumpEntry:
+    """一条压缩保存的响应"""
+
+    __slots__ = ('name', 'url', 'status', 'created_at', 'size', 'data')
+
+    def __init__(self, name, url, status, created_at, size, data):
+        self.name = name
+        self.url = url
+        self.status = status
+        self.created_at = created_at
+        # 压缩前的字节数
+        self.size = size
+        self.data = data
+
+    def text(self):
+        """解压后的响应内容"""
+        return zlib.decompress(self.data).decode('utf-8', errors='replace')
+
+
+class DumpStore:
+    """
+    有界的响应转储
+
+    用法:
+        client.dumps = DumpStore('dumps/dumps.zip', max_entries=20)
+        client.dumps.add('confirm_passenger', content, url=response.url, status=200)
+        ...
+        client.dumps.flush('failure')  # 后台线程写入归档
+    """
+
+    def __init__(self, archive=DEFAULT_ARCHIVE, max_entries=DEFAULT_MAX_ENTRIES,
+                 max_archive_bytes=DEFAULT_MAX_ARCHIVE_BYTES, backup_count=DEFAULT_BACKUP_COUNT,
+                 job=None, logger=None):
+        """
+        Args:
+            archive: zip归档路径
+            max_entries: 内存中保留的响应条数
+            max_archive_bytes: 归档大小上限，超过后轮转
+            backup_count: 保留的旧归档个数
+            job: 任务名称，写入索引
+            logger: 日志记录器
+        """
+        self.archive = archive
+        self.max_entries = max(1, int(max_entries))
+        self.max_archive_bytes = max_archive_bytes
+        self.backup_count = max(0, int(backup_count))
+        self.job = job
+        self.logger = logger or get_logger('12306')
+        self._entries = deque(maxlen=self.max_entries)
+        self._lock = threading.Lock()
+        self._threads = []
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+    def add(self, name, content, url=None, status=None):
+        """
+        保存一条响应（超出条数时丢弃最早的一条）
+
+        Args:
+            name: 文件名前缀，如 'confirm_passenger'
+            content: 响应内容（str或bytes）
+            url: 响应地址
+            status: HTTP状态码
+        """
+        raw = content.encode('utf-8') if isinstance(content, str) else bytes(content)
+        # 最快的压缩级别，HTML页面通常可压缩到1/5以下
+        entry = DumpEntry(name, url, status, time.time(), len(raw), zlib.compress(raw, 1))
+        with self._lock:
+            self._entries.append(entry)
+
+    def entries(self):
+        """当前保留的响应（按时间顺序）"""
+        with self._lock:
+            return list(self._entries)
+
+    def flush(self, reason='manual', wait=False):
+        """
+        在后台线程中把缓冲区写入归档并清空缓冲区
+
+        Args:
+            reason: 写出原因，写入索引（如 'failure'、'manual'）
+            wait: 是否等待写入完成
+
+        Returns:
+            threading.Thread: 写入线程，缓冲区为空时返回None
+        """
+        with self._lock:
+            if not self._entries:
+                return None
+            entries = list(self._entries)
+            self._entries.clear()
+
+        # 非守护线程，进程退出前会写完
+        thread = threading.Thread(target=self._write, args=(entries, reason), name='12306-dump')
+        thread.start()
+        self._threads = [t for t in self._threads if t.is_alive()]
+        self._threads.append(thread)
+        if wait:
+            thread.join()
+        return thread
+
+    def join(self, timeout=None):
+        """等待已发起的写入完成"""
+        for thread in list(self._threads):
+            thread.join(timeout)
+
+    def _write(self, entries, reason):
+        try:
+            with _archive_lock:
+                path = self._write_archive(entries, reason)
+            self.logger.info("已转储 %d 条响应到 %s（%s）", len(entries), path, reason)
+        except (OSError, zipfile.BadZipFile, ValueError) as e:
+            self.logger.warning("写入响应转储失败: %s", e)
+
+    def _write_archive(self, entries, reason):
+        """把entries并入归档，重写index.json（在_archive_lock内调用）"""
+        directory = os.path.dirname(self.archive)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        if os.path.exists(self.archive) and os.path.getsize(self.archive) >= self.max_archive_bytes:
+            self._rotate()
+
+        index = []
+        tmp_path = f'{self.archive}.tmp'
+        with zipfile.ZipFile(tmp_path, 'w', compression=zipfile.ZIP_DEFLATED, compresslevel=6) as out:
+            # zip不能原地替换index.json，复制已有文件后重写索引
+            if os.path.exists(self.archive):
+                with zipfile.ZipFile(self.archive) as old:
+                    names = set(old.namelist())
+                    if INDEX_NAME in names:
+                        index = json.loads(old.read(INDEX_NAME).decode('utf-8'))
+                    for item in old.infolist():
+                        if item.filename != INDEX_NAME:
+                            out.writestr(item, old.read(item.filename))
+
+            seq = len(index)
+            for entry in entries:
+                seq += 1
+                stamp = datetime.fromtimestamp(entry.created_at)
+                filename = f"{seq:04d}_{entry.name}_{stamp.strftime('%Y%m%d_%H%M%S')}.html"
+                out.writestr(filename, zlib.decompress(entry.data))
+                index.append({
+                    'file': filename,
+                    'name': entry.name,
+                    'job': self.job,
+                    'url': entry.url,
+                    'status': entry.status,
+                    'time': stamp.isoformat(timespec='milliseconds'),
+                    'size': entry.size,
+                    'reason': reason,
+                })
+            out.writestr(INDEX_NAME, json.dumps(index, ensure_ascii=False, indent=2))
+
+        os.replace(tmp_path, self.archive)
+        return self.archive
+
+    def _rotate(self):
+        """dumps.zip -> dumps.1.zip -> dumps.2.zip ...，超出backup_count的删除"""
+        root, ext = os.path.splitext(self.archive)
+        if self.backup_count == 0:
+            os.remove(self.archive)
+            return
+        oldest = f'{root}.{self.backup_count}{ext}'
+        if os.path.exists(oldest):
+            os.remove(oldest)
+        for idx in range(self.backup_count - 1, 0, -1):
+            src = f'{root}.{idx}{ext}'
+            if os.path.exists(src):
+                os.replace(src, f'{root}.{idx + 1}{ext}')
+        os.replace(self.archive, f'{root}.1{ext}')
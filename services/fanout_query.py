@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+多日期、多线路并发查询模块
+
+把若干出发日期与若干(出发站, 到达站)组合展开为一组查询，在同一事件循环中并发执行：
+同时在途的请求不超过max_concurrent，总请求数不超过max_requests（超出的组合不查询并计入统计）。
+每个查询完成后立即产出其中尚未出现过的车次，同一日期同一车次同一区间只产出一次——
+12306按城市匹配车站，北京→上海与北京南→上海虹桥会返回大量相同车次。
+"""
+
+import asyncio
+import itertools
+
+from utils import get_logger
+
+from .http_client import run_sync
+
+# 默认参数
+DEFAULT_MAX_CONCURRENT = 4
+DEFAULT_MAX_REQUESTS = 20
+
+
+class FanOutStats:
+    """一次并发查询的统计"""
+
+    __slots__ = ('planned', 'requested', 'skipped', 'failed', 'records', 'duplicates')
+
+    def __init__(self):
+        self.planned = 0
+        self.requested = 0
+        # 超出请求预算未查询的组合数
+        self.skipped = 0
+        self.failed = 0
+        self.records = 0
+        self.duplicates = 0
+
+    def to_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class FanOutQuery:
+    """
+    多日期、多线路并发查询
+
+    用法:
+        fan_out = FanOutQuery(ticket_debugger, max_concurrent=4, max_requests=20)
+        async for train_date, record in fan_out.stream(dates, [('BJP', 'SHH'), ('VNP', 'AOH')]):
+            ...
+        records = fan_out.run(dates, pairs)  # 同步，返回全部 (日期, 车次记录)
+    """
+
+    def __init__(self, debugger, max_concurrent=DEFAULT_MAX_CONCURRENT, max_requests=DEFAULT_MAX_REQUESTS,
+                 bypass_cache=False, logger=None):
+        """
+        Args:
+            debugger: TrainTicketDebugger，提供查询和车次解码
+            max_concurrent: 同时在途的查询数上限
+            max_requests: 总查询数上限，None表示不限
+            bypass_cache: 不使用查询缓存
+            logger: 日志记录器
+        """
+        self.debugger = debugger
+        self.max_concurrent = max(1, int(max_concurrent))
+        self.max_requests = max_requests
+        self.bypass_cache = bypass_cache
+        self.logger = logger or get_logger('12306')
+        self.stats = FanOutStats()
+
+    def plan(self, dates, pairs):
+        """
+        展开查询组合（按日期优先，去掉重复组合），超出请求预算的部分计入skipped
+
+        Returns:
+            list: [(日期, 出发站代码, 到达站代码)]
+        """
+        routes = list(dict.fromkeys(
+            (train_date, from_station, to_station)
+            for train_date, (from_station, to_station) in itertools.product(dates, pairs)
+            if from_station != to_station
+        ))
+        self.stats.planned = len(routes)
+        if self.max_requests is not None and len(routes) > self.max_requests:
+            self.stats.skipped = len(routes) - self.max_requests
+            self.logger.warning("查询组合 %d 个超出请求预算 %d，跳过后 %d 个",
+                                len(routes), self.max_requests, self.stats.skipped)
+            routes = routes[:self.max_requests]
+        return routes
+
+    async def stream(self, dates, pairs):
+        """
+        并发查询并按完成顺序产出新出现的车次
+
+        Args:
+            dates: 出发日期列表 YYYY-MM-DD
+            pairs: (出发站代码, 到达站代码) 列表
+
+        Yields:
+            tuple: (日期, TrainRecord)
+        """
+        routes = self.plan(dates, pairs)
+        if not routes:
+            return
+
+        # 先统一预热会话，避免并发的首批查询各自访问首页
+        await self.debugger.ensure_warm_async()
+
+        semaphore = asyncio.Semaphore(self.max_concurrent)
+
+        async def query(route):
+            async with semaphore:
+                self.stats.requested += 1
+                return route, await self.debugger.query_route_async(*route, bypass_cache=self.bypass_cache)
+
+        seen = set()
+        tasks = [asyncio.ensure_future(query(route)) for route in routes]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                (train_date, from_station, to_station), response_data = await next_done
+                if not response_data or not response_data.get('status'):
+                    self.stats.failed += 1
+                    self.logger.warning("查询失败: %s %s->%s", train_date, from_station, to_station)
+                    continue
+
+                for raw in response_data.get('data', {}).get('result', []):
+                    record = self.debugger.decode_train_info(raw)
+                    if record is None:
+                        continue
+                    key = (train_date, record.train_no, record.from_station, record.to_station)
+                    if key in seen:
+                        self.stats.duplicates += 1
+                        continue
+                    seen.add(key)
+                    self.stats.records += 1
+                    yield train_date, record
+        finally:
+            # 调用方提前结束迭代时取消尚未完成的查询
+            for task in tasks:
+                task.cancel()
+
+    async def run_async(self, dates, pairs):
+        """并发查询并返回全部 (日期, 车次记录)（按完成顺序）"""
+        return [item async for item in self.stream(dates, pairs)]
+
+    def run(self, dates, pairs):
+        """并发查询并返回全部 (日期, 车次记录)（按完成顺序）"""
+        return run_sync(self.run_async(dates, pairs))
@@ -3,9 +3,16 @@
 
 """定时抢票服务模块"""
 
+import asyncio
+import contextlib
 import time
 from datetime import datetime
-from utils import get_logger
+from config import LOG_CONFIG, SALE_TRIGGER_CONFIG, CLOCK_SYNC_CONFIG
+from models import SelectionRule
+from utils import get_logger, critical_window, SaleTrigger
+
+from .http_client import run_sync
+from .order_payload import OrderPayload
 
 
 class GrabTicketService:
@@ -54,21 +61,12 @@ class GrabTicketService:
                 return False
 
             # 查找站点代码
-            from_station_code = None
-            to_station_code = None
-
-            for name, code in order_manager.station_mapping.items():
-                if name == from_station_name:
-                    from_station_code = code
-                if name == to_station_name:
-                    to_station_code = code
-
+            from_station_name, from_station_code = order_manager.resolve_station(from_station_name, '出发站')
             if not from_station_code:
-                print(f"未找到出发站 '{from_station_name}' 的代码，请检查站名")
                 return False
 
+            to_station_name, to_station_code = order_manager.resolve_station(to_station_name, '到达站')
             if not to_station_code:
-                print(f"未找到到达站 '{to_station_name}' 的代码，请检查站名")
                 return False
 
             # 2. 输入开售时间
@@ -118,21 +116,24 @@ class GrabTicketService:
             print(f"{'序号':<4} {'车次':<10} {'出发时间':<10} {'到达时间':<10} {'历时':<10} {'商务座':<8} {'一等座':<8} {'二等座':<8}")
             print("="*100)
 
-            def format_seat(value):
-                if value == '*':
-                    return '未开售'
-                elif not value or value == '--':
-                    return '--'
-                return value
-
             for idx, train in enumerate(available_trains, 1):
                 print(f"{idx:<4} {train.get('列车号', ''):<10} {train.get('出发时间', ''):<10} {train.get('到达时间', ''):<10} {train.get('历时', ''):<10} "
-                      f"{format_seat(train.get('商务座', '--')):<8} {format_seat(train.get('一等座', '--')):<8} {format_seat(train.get('二等座', '--')):<8}")
+                      f"{train.seat_display('商务座'):<8} {train.seat_display('一等座'):<8} {train.seat_display('二等座'):<8}")
             print("="*100)
 
+            # 也可以输入选择规则，开售后按规则从当时有票的车次中自动选择
+            rule = None
             while True:
                 try:
-                    choice = input(f"\n请选择车次 (1-{len(available_trains)}): ").strip()
+                    choice = input(f"\n请选择车次 (1-{len(available_trains)})，"
+                                   f"或输入选择规则（如 G,D 07:00-12:00 历时06:00 二等座,一等座）: ").strip()
+                    if choice and not choice.isdigit():
+                        try:
+                            rule = SelectionRule.parse(choice)
+                        except ValueError as e:
+                            print(f"选择规则格式错误: {e}")
+                            continue
+                        break
                     choice_idx = int(choice) - 1
                     if 0 <= choice_idx < len(available_trains):
                         selected_train = available_trains[choice_idx]
@@ -142,6 +143,20 @@ class GrabTicketService:
                 except (ValueError, KeyboardInterrupt):
                     print("输入无效，请输入数字")
 
+            if rule is not None:
+                selector = rule.compile()
+                matched = [train.get('列车号') for train in available_trains if selector.matches_schedule(train)]
+                print(f"\n选择规则: {rule.describe()}")
+                print(f"当前符合时段和车型条件的车次 {len(matched)} 趟: {'、'.join(matched[:20])}"
+                      f"{' 等' if len(matched) > 20 else ''}")
+                print(f"\n等待开售时间: {sale_datetime_str}")
+                print(f"提示: 开售前1小时将提示登录获取cookie")
+                return self.wait_and_book(
+                    order_manager, sale_datetime, train_date,
+                    from_station_code, to_station_code, from_station_name, to_station_name,
+                    trains=None, seat_types=rule.seat_types, rule=rule
+                )
+
             # 5. 选择座位类型
             print("\n请选择座位类型：")
             print("1. 二等座")
@@ -165,102 +180,10 @@ class GrabTicketService:
             print(f"座位: {seat_type}")
             print(f"提示: 开售前1小时将提示登录获取cookie")
 
-            login_prompted = False  # 标记是否已提示登录
-
-            while True:
-                now = datetime.now()
-                time_diff = (sale_datetime - now).total_seconds()
-
-                # 开售前1小时提示登录
-                if time_diff <= 3600 and not login_prompted:
-                    print(f"\n{' '*80}")  # 清除倒计时行
-                    print("\n=== 距离开售还有1小时，请立即登录获取cookie ===\n")
-
-                    while True:
-                        choice = input("是否立即登录? (y/n): ").strip().lower()
-                        if choice == 'y':
-                            if order_manager.login_process():
-                                print("\n登录成功！Cookie已保存")
-
-                                # 获取当前登录用户信息
-                                login_user_name = order_manager.get_login_user_name()
-
-                                # 获取乘客列表并预选乘客
-                                print("正在获取乘客信息...")
-                                success, passengers = order_manager.order_query_service.get_passengers(None)
-                                if success and passengers:
-                                    # 尝试找到登录用户对应的乘客
-                                    selected_passenger = None
-                                    if login_user_name:
-                                        for p in passengers:
-                                            if p.get('passenger_name') == login_user_name:
-                                                selected_passenger = p
-                                                print(f"\n抢票将使用登录用户: {login_user_name}")
-                                                break
-
-                                    # 如果没找到，使用第一个乘客
-                                    if not selected_passenger:
-                                        selected_passenger = passengers[0]
-                                        if login_user_name:
-                                            print(f"\n登录用户 '{login_user_name}' 不在乘客列表中")
-                                        print(f"抢票将使用第一个乘客: {selected_passenger.get('passenger_name')}")
-
-                                    # 预先设置乘客信息
-                                    order_manager.passengers_data = [selected_passenger]
-                                    order_manager._auto_select_passenger = True  # 标记已自动选择
-                                else:
-                                    print("警告: 无法获取乘客信息，将在抢票时重新获取")
-
-                                print("\n继续等待开售...")
-                                login_prompted = True
-                                break
-                            else:
-                                print("\n登录失败，请重试")
-                        elif choice == 'n':
-                            print("\n警告: 未登录可能导致抢票失败")
-                            confirm = input("确认跳过登录? (y/n): ").strip().lower()
-                            if confirm == 'y':
-                                login_prompted = True
-                                break
-                        else:
-                            print("请输入 y 或 n")
-
-                if time_diff > 0:
-                    # 格式化时间显示
-                    hours = int(time_diff // 3600)
-                    minutes = int((time_diff % 3600) // 60)
-                    seconds = int(time_diff % 60)
-
-                    if hours > 0:
-                        time_str = f"{hours}小时{minutes}分{seconds}秒"
-                    elif minutes > 0:
-                        time_str = f"{minutes}分{seconds}秒"
-                    else:
-                        time_str = f"{seconds}秒"
-
-                    print(f"\r距离开售还有: {time_str}     ", end='', flush=True)
-                    time.sleep(1)
-                else:
-                    print("\n\n开始抢票！")
-                    break
-
-            # 7. 开售时间到达，执行完整的订票流程
-            print("\n开始执行订票流程...\n")
-
-            # 将抢票参数设置到查询参数中
-            order_manager.ticket_debugger.query_params['leftTicketDTO.train_date'] = train_date
-            order_manager.ticket_debugger.query_params['leftTicketDTO.from_station'] = from_station_code
-            order_manager.ticket_debugger.query_params['leftTicketDTO.to_station'] = to_station_code
-
-            # 设置目标车次和座位类型，用于自动选择
-            order_manager._target_train_no = selected_train.get('列车号')
-            order_manager._target_seat_type = seat_type
-            order_manager._auto_select_passenger = True  # 标记为自动选择第一个乘客
-
-            # 调用完整的订票流程
-            return order_manager._execute_booking_flow(
-                from_station_code, to_station_code, train_date,
-                from_station_name, to_station_name
+            return self.wait_and_book(
+                order_manager, sale_datetime, train_date,
+                from_station_code, to_station_code, from_station_name, to_station_name,
+                trains=[selected_train.get('列车号')], seat_types=[seat_type]
             )
 
         except KeyboardInterrupt:
@@ -268,8 +191,203 @@ class GrabTicketService:
             self.logger.info("抢票被用户中断")
             return False
         except Exception as e:
-            self.logger.error(f"定时抢票流程异常: {e}")
+            self.logger.error("定时抢票流程异常: %s", e)
             import traceback
             traceback.print_exc()
             print(f"抢票过程中发生错误: {e}")
             return False
+
+    def wait_and_book(self, order_manager, sale_datetime, train_date, from_station_code, to_station_code,
+                      from_station_name, to_station_name, trains, seat_types, passenger_names=None,
+                      interactive=True, rule=None):
+        """等待开售并执行订票流程，参数见wait_and_book_async()"""
+        return run_sync(self.wait_and_book_async(
+            order_manager, sale_datetime, train_date, from_station_code, to_station_code,
+            from_station_name, to_station_name, trains, seat_types, passenger_names=passenger_names,
+            interactive=interactive, rule=rule
+        ))
+
+    async def wait_and_book_async(self, order_manager, sale_datetime, train_date, from_station_code,
+                                  to_station_code, from_station_name, to_station_name, trains, seat_types,
+                                  passenger_names=None, interactive=True, rule=None, booking_slot=None):
+        """
+        等待开售并执行订票流程（异步）
+
+        开售前的准备、时钟同步和触发等待都在事件循环中进行，多个任务可以在同一个线程中等待；
+        只有开售触发后的订票流程在单独的线程中执行。
+
+        Args:
+            order_manager: TrainOrderManager实例
+            sale_datetime: 开售时间
+            train_date: 出发日期
+            from_station_code: 出发站代码
+            to_station_code: 到达站代码
+            from_station_name: 出发站名
+            to_station_name: 到达站名
+            trains: 候选车次（按优先级）
+            seat_types: 候选座位类型（按优先级）
+            passenger_names: 乘客姓名
+            interactive: 为True时开售前1小时提示登录并显示倒计时；
+                         为False时只检查登录状态并预先获取乘客，不等待任何输入
+            rule: 车次选择规则（SelectionRule），指定时开售后按规则选择车次
+            booking_slot: 返回异步上下文管理器的函数，开售触发后的订票在其中执行（多任务时限制同时订票的任务数）
+
+        Returns:
+            bool: 抢票是否成功
+        """
+        # 按12306服务器时间触发；时钟可能由多个任务共用，近期同步过的不再重复采样
+        clock = order_manager.server_clock
+        clock_ns = None
+        if CLOCK_SYNC_CONFIG['enabled']:
+            print("\n正在同步12306服务器时间...")
+            estimate = await clock.refresh_async(CLOCK_SYNC_CONFIG['samples'], CLOCK_SYNC_CONFIG['target_error_ms'],
+                                                 max_age=CLOCK_SYNC_CONFIG['max_age_s'])
+            if estimate:
+                print(f"服务器时间比本机{'快' if estimate.offset_ns >= 0 else '慢'} "
+                      f"{abs(estimate.offset_ms):.1f}ms (误差 ±{estimate.error_ms:.1f}ms)")
+                clock_ns = clock.now_ns
+            else:
+                print("同步服务器时间失败，按本机时间触发")
+
+        trigger = SaleTrigger.at(
+            sale_datetime,
+            clock_ns=clock_ns or time.time_ns,
+            lead_ms=SALE_TRIGGER_CONFIG['lead_ms'],
+            coarse_ms=SALE_TRIGGER_CONFIG['coarse_ms'],
+            fine_step_ms=SALE_TRIGGER_CONFIG['fine_step_ms'],
+            spin_ms=SALE_TRIGGER_CONFIG['spin_ms'],
+            record_file=SALE_TRIGGER_CONFIG['record_file'],
+            logger=self.logger
+        )
+
+        # 线路相关的表单开售前构建好，乘客确定后再补上乘客字符串
+        payload = OrderPayload(train_date, from_station_code, to_station_code, from_station_name, to_station_name)
+
+        state = {'prepared': False, 'resynced': clock_ns is None, 'passengers': None,
+                 'offset_ns': clock.offset_ns}
+        # 重新同步最多耗时约samples秒，留出余量
+        resync_margin = CLOCK_SYNC_CONFIG['samples'] + 5
+
+        async def on_tick(time_diff):
+            # 开售前1小时登录并预先选择乘客
+            if time_diff <= 3600 and not state['prepared']:
+                state['prepared'] = True
+                if interactive:
+                    # 等待用户输入，在单独的线程中执行
+                    state['passengers'] = await asyncio.to_thread(
+                        self._prompt_login_before_sale, order_manager, passenger_names)
+                else:
+                    state['passengers'] = await self._prepare_before_sale_async(order_manager, passenger_names)
+                if state['passengers']:
+                    payload.set_passengers(state['passengers'])
+
+            # 开售前重新同步一次服务器时间，修正期间的时钟漂移；
+            # 其他任务正在同步时不等待，同步结果在下面一并生效
+            if (not state['resynced'] and
+                    resync_margin < time_diff <= CLOCK_SYNC_CONFIG['resync_before_s']):
+                state['resynced'] = True
+                await clock.refresh_async(CLOCK_SYNC_CONFIG['samples'], CLOCK_SYNC_CONFIG['target_error_ms'],
+                                          max_age=CLOCK_SYNC_CONFIG['resync_before_s'], blocking=False)
+
+            # 偏差有更新（本任务或共用时钟的其他任务重新同步）时调整触发时刻
+            if clock_ns is not None and clock.offset_ns != state['offset_ns']:
+                trigger.adjust(clock.offset_ns - state['offset_ns'])
+                state['offset_ns'] = clock.offset_ns
+
+            if not interactive:
+                return
+
+            # 格式化时间显示
+            hours = int(time_diff // 3600)
+            minutes = int((time_diff % 3600) // 60)
+            seconds = int(time_diff % 60)
+
+            if hours > 0:
+                time_str = f"{hours}小时{minutes}分{seconds}秒"
+            elif minutes > 0:
+                time_str = f"{minutes}分{seconds}秒"
+            else:
+                time_str = f"{seconds}秒"
+
+            print(f"\r距离开售还有: {time_str}     ", end='', flush=True)
+
+        record = await trigger.wait_async(on_tick=on_tick)
+        print(f"\n\n开始抢票！（触发偏差 {record.offset_ms:.3f}ms）")
+
+        # 开售时间到达，执行完整的订票流程
+        print("\n开始执行订票流程...\n")
+
+        # 将抢票参数设置到查询参数中
+        order_manager.ticket_debugger.query_params['leftTicketDTO.train_date'] = train_date
+        order_manager.ticket_debugger.query_params['leftTicketDTO.from_station'] = from_station_code
+        order_manager.ticket_debugger.query_params['leftTicketDTO.to_station'] = to_station_code
+
+        # 调用完整的订票流程，抢票时不再等待输入；订票期间只保留警告及以上的日志。
+        # 订票流程由各步骤的同步方法组成，在单独的线程中执行（线程数受booking_slot限制）
+        async with booking_slot() if booking_slot else contextlib.nullcontext():
+            with critical_window(LOG_CONFIG['critical_window_level'], enabled=LOG_CONFIG['critical_window']):
+                return await asyncio.to_thread(
+                    order_manager._execute_booking_flow,
+                    from_station_code, to_station_code, train_date,
+                    from_station_name, to_station_name,
+                    trains=trains, seat_types=seat_types,
+                    passenger_names=passenger_names, passengers=state['passengers'],
+                    interactive=False, payload=payload, rule=rule
+                )
+
+    async def _prepare_before_sale_async(self, order_manager, passenger_names=None):
+        """
+        无人值守模式下开售前的准备：检查登录状态并预先获取乘客
+
+        Returns:
+            list: 预先选择的乘客，无法获取时返回None（开售后重新获取）
+        """
+        if not await order_manager.auth_service.check_login_status_async():
+            self.logger.error("登录已失效，无人值守模式无法登录，请更新cookies文件")
+            return None
+
+        success, passengers = await order_manager.order_query_service.get_passengers_async(None)
+        if not success or not passengers:
+            self.logger.warning("无法获取乘客信息，将在抢票时重新获取")
+            return None
+        # 未指定乘客时按登录用户选择，在这里异步取得姓名
+        login_user_name = None if passenger_names else (await order_manager.get_login_user_name_async() or '')
+        return order_manager._select_passengers(passengers, passenger_names, interactive=False,
+                                                login_user_name=login_user_name)
+
+    def _prompt_login_before_sale(self, order_manager, passenger_names=None):
+        """
+        开售前提示登录，登录成功后预先获取乘客信息
+
+        Returns:
+            list: 预先选择的乘客，未登录或无法获取时返回None（开售后重新获取）
+        """
+        print(f"\n{' '*80}")  # 清除倒计时行
+        print("\n=== 距离开售还有1小时，请立即登录获取cookie ===\n")
+
+        while True:
+            choice = input("是否立即登录? (y/n): ").strip().lower()
+            if choice == 'y':
+                if order_manager.login_process():
+                    print("\n登录成功！Cookie已保存")
+
+                    # 获取乘客列表并预选乘客（优先登录用户）
+                    print("正在获取乘客信息...")
+                    selected = None
+                    success, passengers = order_manager.order_query_service.get_passengers(None)
+                    if success and passengers:
+                        selected = order_manager._select_passengers(passengers, passenger_names, interactive=False)
+                    if not selected:
+                        print("警告: 无法获取乘客信息，将在抢票时重新获取")
+
+                    print("\n继续等待开售...")
+                    return selected
+                else:
+                    print("\n登录失败，请重试")
+            elif choice == 'n':
+                print("\n警告: 未登录可能导致抢票失败")
+                confirm = input("确认跳过登录? (y/n): ").strip().lower()
+                if confirm == 'y':
+                    return None
+            else:
+                print("请输入 y 或 n")
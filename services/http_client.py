@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""异步HTTP客户端模块"""
+
+import asyncio
+import contextvars
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from utils.constants import BASE_URL
+
+from .tracing import TimingAdapter
+
+# 默认请求超时（秒）
+DEFAULT_TIMEOUT = 30
+
+# 共享线程池大小，同时也是连接池上限
+DEFAULT_MAX_WORKERS = 16
+
+_shared_executor = None
+_shared_adapter = None
+_executor_lock = threading.Lock()
+
+
+def get_shared_executor(max_workers=DEFAULT_MAX_WORKERS):
+    """获取进程内共享的请求线程池"""
+    global _shared_executor
+    if _shared_executor is None:
+        with _executor_lock:
+            if _shared_executor is None:
+                _shared_executor = ThreadPoolExecutor(
+                    max_workers=max_workers,
+                    thread_name_prefix='12306-http'
+                )
+    return _shared_executor
+
+
+def get_shared_adapter(pool_maxsize=DEFAULT_MAX_WORKERS):
+    """
+    获取进程内共享的连接池
+
+    各会话挂载同一个HTTPAdapter：cookies仍由各自的会话保存，
+    到12306的连接则在所有会话（如多个账号的任务）之间复用。
+    """
+    global _shared_adapter
+    if _shared_adapter is None:
+        with _executor_lock:
+            if _shared_adapter is None:
+                _shared_adapter = TimingAdapter(pool_maxsize=pool_maxsize)
+    return _shared_adapter
+
+
+def run_sync(coro):
+    """在同步代码中运行协程并返回结果"""
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coro)
+
+    coro.close()
+    raise RuntimeError("当前线程已有运行中的事件循环，请直接await对应的*_async方法")
+
+
+class AsyncHttpClient:
+    """
+    异步HTTP客户端
+
+    所有服务共用同一个客户端：cookies仍保存在requests会话中，
+    阻塞的网络调用在共享线程池中执行，因此多个查询或订票任务可以在
+    同一个事件循环中并发，而不需要为每个任务单独开线程。
+    不同会话的客户端共用同一个连接池。
+    """
+
+    def __init__(self, session=None, base_url=BASE_URL, timeout=DEFAULT_TIMEOUT,
+                 executor=None, max_workers=DEFAULT_MAX_WORKERS, adapter=None):
+        """
+        初始化异步客户端
+
+        Args:
+            session: requests会话对象
+            base_url: 12306站点地址，可指向本地替身服务器
+            timeout: 默认请求超时（秒）
+            executor: 执行阻塞请求的线程池，默认使用进程内共享线程池
+            max_workers: 连接池大小
+            adapter: 挂载到会话的HTTPAdapter，默认使用进程内共享连接池
+        """
+        self.session = session if session is not None else requests.Session()
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.executor = executor or get_shared_executor(max_workers)
+        # 请求耗时追踪（SpanRecorder），None表示不追踪
+        self.recorder = None
+        # 调试响应转储（DumpStore），None表示不保存
+        self.dumps = None
+        # 限速与熔断（RequestThrottle），None表示不限速
+        self.throttle = None
+
+        # 连接池与线程池同样大小，避免并发请求时连接被丢弃
+        adapter = adapter or get_shared_adapter(max_workers)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def url(self, path):
+        """拼接完整的请求地址"""
+        return f"{self.base_url}{path}"
+
+    async def call(self, func, *args, **kwargs):
+        """在线程池中执行阻塞函数（带上调用方的上下文变量，如日志关键窗口）"""
+        loop = asyncio.get_running_loop()
+        context = contextvars.copy_context()
+        return await loop.run_in_executor(self.executor, functools.partial(context.run, func, *args, **kwargs))
+
+    async def request(self, method, url, throttle_class=None, **kwargs):
+        """
+        发送请求
+
+        启用限速时先按接口类别取令牌，接口熔断期间抛出CircuitOpenError（RequestException子类）。
+        throttle_class指定限速类别，默认按接口名分类。
+        """
+        kwargs.setdefault('timeout', self.timeout)
+        throttle = self.throttle
+        if throttle is None:
+            return await self._send(method, url, **kwargs)
+
+        name = await throttle.before(method, url, throttle_class)
+        try:
+            response = await self._send(method, url, **kwargs)
+        except BaseException as e:
+            throttle.after(name, error=e)
+            raise
+        throttle.after(name, response, streamed=kwargs.get('stream', False))
+        return response
+
+    async def _send(self, method, url, **kwargs):
+        recorder = self.recorder
+        if recorder is None:
+            return await self.call(self.session.request, method, url, **kwargs)
+        return await self.call(recorder.request, self.session, method, url, **kwargs)
+
+    async def get(self, url, **kwargs):
+        """发送GET请求"""
+        return await self.request('GET', url, **kwargs)
+
+    async def post(self, url, **kwargs):
+        """发送POST请求"""
+        return await self.request('POST', url, **kwargs)
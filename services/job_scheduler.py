@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+多任务调度模块
+
+任务按开售时间放入优先队列（堆），每个任务在开售前wake_before_s秒被唤醒，
+作为同一个事件循环中的协程执行（检查登录、预取乘客、等待开售触发、订票）：
+开售前的准备和等待不占用线程，也不受并发上限限制，每个任务都能按时触发；
+并发上限只作用于触发后的订票阶段（booking_slot()），订票流程在单独的线程中执行，
+因此同时存在的订票线程数不超过并发上限。开售时间相同的任务超过上限时，按触发顺序等待空闲名额。
+"""
+
+import asyncio
+import contextlib
+import contextvars
+import heapq
+import itertools
+import threading
+import time
+
+from utils import get_logger
+
+from .http_client import run_sync
+
+# 默认参数
+DEFAULT_MAX_CONCURRENT = 4
+DEFAULT_WAKE_BEFORE_S = 120
+
+# 当前协程所属任务的执行状态 {'job': BookingJob, 'delayed_s': 等待订票名额的秒数}
+_job_state = contextvars.ContextVar('12306_job_state', default=None)
+
+
+class JobResult:
+    """一个任务的执行结果"""
+
+    __slots__ = ('job', 'success', 'error', 'started_at', 'finished_at', 'delayed_s')
+
+    def __init__(self, job, success, error, started_at, finished_at, delayed_s):
+        self.job = job
+        self.success = success
+        # 任务抛出的异常说明，正常返回时为None
+        self.error = error
+        self.started_at = started_at
+        self.finished_at = finished_at
+        # 开售触发后因并发上限等待订票名额的秒数
+        self.delayed_s = delayed_s
+
+
+class JobScheduler:
+    """
+    多任务调度器
+
+    用法:
+        scheduler = JobScheduler(runner, max_concurrent=4)
+        for job in jobs:
+            scheduler.add(job)
+        results = scheduler.run()
+
+    runner为协程函数，在调度器的事件循环中以 await runner(job) 调用，返回是否成功；
+    开售触发后的订票应在 async with booking_slot() 内执行。
+    每个任务应使用独立的会话（cookies），连接池和服务器时钟可以共用。
+    """
+
+    def __init__(self, runner, max_concurrent=DEFAULT_MAX_CONCURRENT,
+                 wake_before_s=DEFAULT_WAKE_BEFORE_S, logger=None, server_clock=None):
+        """
+        Args:
+            runner: 执行单个任务的协程函数
+            max_concurrent: 同时订票的任务数上限
+            wake_before_s: 开售前多少秒唤醒任务
+            logger: 日志记录器
+            server_clock: 服务器时钟（ServerClock），指定时按估计的服务器时间换算开售时刻，默认按本地时间
+        """
+        self.runner = runner
+        self.server_clock = server_clock
+        self.max_concurrent = max(1, int(max_concurrent))
+        self.wake_before_s = wake_before_s
+        self.logger = logger or get_logger('12306')
+        self.results = []
+        self._heap = []
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+        # 以下在run_async()中按所在的事件循环创建
+        self._loop = None
+        self._wakeup = None
+        self._slots = None
+
+    def add(self, job):
+        """
+        加入任务（可以在运行期间从其他线程调用）
+
+        开售时间在加入时一次性换算为单调时钟上的时刻（有服务器时钟时按估计的服务器时间），
+        队列按开售时间排序；没有开售时间的任务视为此刻开售，立即唤醒。
+        """
+        now = time.monotonic()
+        sale_at = now
+        wake_at = now
+        if job.sale_time is not None:
+            clock_ns = self.server_clock.now_ns() if self.server_clock is not None else time.time_ns()
+            sale_at = now + (job.sale_time.timestamp() - clock_ns / 1e9)
+            # 已过唤醒时刻的任务立即唤醒
+            wake_at = max(now, sale_at - self.wake_before_s)
+
+        with self._lock:
+            # 序号保证开售时间相同的任务按加入顺序执行
+            heapq.heappush(self._heap, (sale_at, next(self._seq), wake_at, job))
+            loop = self._loop
+        if loop is not None:
+            # 期间加入更早的任务时唤醒调度循环重新计算等待时间
+            loop.call_soon_threadsafe(self._wakeup.set)
+
+    def pending(self):
+        """尚未唤醒的任务数"""
+        with self._lock:
+            return len(self._heap)
+
+    def run(self):
+        """
+        执行所有任务，全部结束后返回
+
+        Returns:
+            list: JobResult列表（按完成顺序）
+        """
+        return run_sync(self.run_async())
+
+    async def run_async(self):
+        """
+        执行所有任务（异步），全部结束后返回
+
+        每个任务在唤醒时刻作为一个协程启动，开售前的准备和等待不占用线程和并发名额。
+
+        Returns:
+            list: JobResult列表（按完成顺序）
+        """
+        self._wakeup = asyncio.Event()
+        self._slots = asyncio.Semaphore(self.max_concurrent)
+        with self._lock:
+            self._loop = asyncio.get_running_loop()
+
+        tasks = []
+        try:
+            while True:
+                job = await self._next_job()
+                if job is None:
+                    break
+                tasks.append(asyncio.create_task(self._run_job(job), name=f'12306-job-{len(tasks)}'))
+            await asyncio.gather(*tasks)
+        finally:
+            with self._lock:
+                self._loop = None
+        return self.results
+
+    @contextlib.asynccontextmanager
+    async def booking_slot(self):
+        """
+        占用一个并发名额（开售触发后的订票阶段）
+
+        用法:
+            async with scheduler.booking_slot():
+                await asyncio.to_thread(manager._execute_booking_flow, ...)
+        """
+        start = time.monotonic()
+        async with self._slots:
+            waited_s = time.monotonic() - start
+            state = _job_state.get()
+            if state is not None:
+                state['delayed_s'] = waited_s
+            if waited_s > 1:
+                self.logger.warning("任务 %s 因并发上限延后 %.1fs 开始订票",
+                                    state['job'].name if state else '', waited_s)
+            yield
+
+    async def _next_job(self):
+        """等待到队首任务的唤醒时刻并取出，队列为空时返回None"""
+        while True:
+            with self._lock:
+                if not self._heap:
+                    return None
+                _, _, wake_at, job = self._heap[0]
+                delay = wake_at - time.monotonic()
+                if delay <= 0:
+                    heapq.heappop(self._heap)
+                    return job
+                self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), delay)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _run_job(self, job):
+        self.logger.info("唤醒任务: %s", job.name)
+        # 每个任务是单独的asyncio任务，上下文变量互不影响
+        state = {'job': job, 'delayed_s': 0.0}
+        _job_state.set(state)
+
+        started = time.time()
+        error = None
+        try:
+            success = bool(await self.runner(job))
+        except Exception as e:
+            self.logger.error("任务 %s 执行异常: %s", job.name, e)
+            success, error = False, str(e)
+
+        self.results.append(JobResult(job, success, error, started, time.time(), state['delayed_s']))
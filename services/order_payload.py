@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+订单表单预构建模块
+
+线路、乘客、车次和座位确定后，一次性生成下单各步骤表单中的固定部分
+（submitOrderRequest请求体、passengerTicketStr、oldPassengerStr、getQueueCount的日期字符串等），
+只留下REPEAT_SUBMIT_TOKEN、key_check_isChange、leftTicketStr等开售后才能取得的字段，
+开售后的各步骤只需填入这几个值即可发送。
+"""
+
+import urllib.parse
+from datetime import datetime
+
+from utils import js_escape, SEAT_TYPE_MAPPING
+
+_WEEKDAYS = ('Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun')
+_MONTHS = ('Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec')
+
+# 未知座位类型时使用二等座代码
+DEFAULT_SEAT_CODE = 'O'
+
+
+def js_date_string(train_date):
+    """
+    按浏览器Date.toString()的格式生成日期字符串（getQueueCount使用）
+
+    Args:
+        train_date: YYYY-MM-DD
+
+    Returns:
+        str: 如 'Thu Jan 01 2026 00:00:00 GMT+0800 (中国标准时间)'
+    """
+    date = datetime.strptime(train_date, '%Y-%m-%d')
+    return (f"{_WEEKDAYS[date.weekday()]} {_MONTHS[date.month - 1]} {date.day:02d} {date.year} "
+            f"00:00:00 GMT+0800 (中国标准时间)")
+
+
+class OrderPayload:
+    """
+    一笔订单的预构建表单
+
+    用法:
+        payload = OrderPayload(train_date, from_code, to_code, from_name, to_name)
+        payload.set_passengers(passengers)      # 开售前即可完成
+        payload.set_train(train_info, seat_type)  # 选定车次后
+        data = payload.check_order_form(token)  # 开售后只填动态字段
+    """
+
+    def __init__(self, train_date, from_station, to_station, from_name, to_name):
+        """
+        Args:
+            train_date: 出发日期 YYYY-MM-DD
+            from_station: 出发站代码
+            to_station: 到达站代码
+            from_name: 出发站名
+            to_name: 到达站名
+        """
+        self.train_date = train_date
+        self.from_station = from_station
+        self.to_station = to_station
+        self.from_name = from_name
+        self.to_name = to_name
+
+        from_name_encoded = urllib.parse.quote(from_name)
+        to_name_encoded = urllib.parse.quote(to_name)
+        self.init_path = (f"/otn/leftTicket/init?linktypeid=dc&fs={from_name_encoded},{from_station}"
+                          f"&ts={to_name_encoded},{to_station}&date={train_date}&flag=N,N,Y")
+        # submitOrderRequest请求体中secretStr之后、seat_discount_info之前的部分
+        self._submit_middle = (
+            f'&train_date={train_date}'
+            f'&back_train_date={train_date}'
+            f'&tour_flag=dc'
+            f'&purpose_codes=ADULT'
+            f'&query_from_station_name={from_name_encoded}'
+            f'&query_to_station_name={to_name_encoded}'
+            f'&bed_level_info='
+        )
+        self.js_train_date = js_date_string(train_date)
+        # 浏览器在leftTicket/init页面设置的cookies
+        self.jc_cookies = {
+            '_jc_save_fromStation': js_escape(f'{from_name},{from_station}'),
+            '_jc_save_toStation': js_escape(f'{to_name},{to_station}'),
+            '_jc_save_fromDate': train_date,
+            '_jc_save_toDate': train_date,
+            '_jc_save_wfdc_flag': 'dc',
+            '_jc_save_showIns': 'true',
+            'guidesStatus': 'off',
+            'highContrastMode': 'defaltMode',
+            'cursorStatus': 'off',
+        }
+
+        self.passengers = []
+        self.train_info = None
+        self.seat_type = None
+        self.seat_code = None
+        self.submit_body = None
+        self.old_passenger_str = ''
+        self._passenger_tails = []
+        self._check_form = None
+        self._queue_form = None
+        self._confirm_form = None
+
+    @property
+    def has_passengers(self):
+        return bool(self.passengers)
+
+    @property
+    def ready(self):
+        """乘客和车次是否都已确定"""
+        return bool(self.passengers) and self.train_info is not None
+
+    @property
+    def left_ticket(self):
+        """车次的leftTicket（initDc返回的leftTicketStr会更新到train_info中）"""
+        return self.train_info.get('leftTicket', '') if self.train_info is not None else ''
+
+    def set_passengers(self, passengers):
+        """
+        设置乘客并生成与座位无关的乘客字符串
+
+        Args:
+            passengers: 乘客列表（getPassengerDTOs返回的字典）
+        """
+        self.passengers = list(passengers)
+        tails = []
+        old_parts = []
+        for passenger in self.passengers:
+            name = passenger['passenger_name']
+            id_type = passenger.get('passenger_id_type_code') or '1'
+            id_no = passenger['passenger_id_no']
+            ticket_type = passenger.get('passenger_type') or '1'
+            # passengerTicketStr中座位代码之后的部分
+            tails.append(f"0,{ticket_type},{name},{id_type},{id_no},"
+                         f"{passenger.get('mobile_no', '')},N,{passenger['allEncStr']}")
+            old_parts.append(f"{name},{id_type},{id_no},{ticket_type}_")
+        self._passenger_tails = tails
+        self.old_passenger_str = ''.join(old_parts)
+        self._build_forms()
+
+    def set_train(self, train_info, seat_type):
+        """
+        设置车次和座位类型并生成submitOrderRequest请求体
+
+        Args:
+            train_info: 车次信息（TrainRecord）
+            seat_type: 座位类型名称
+        """
+        self.train_info = train_info
+        self.seat_type = seat_type
+        self.seat_code = SEAT_TYPE_MAPPING.get(seat_type, DEFAULT_SEAT_CODE)
+        self.submit_body = (
+            f"secretStr={train_info.get('secretStr', '')}"
+            f"{self._submit_middle}"
+            f"&seat_discount_info={train_info.get('seat_discount_info', '')}"
+            f"&undefined"
+        )
+        self._build_forms()
+
+    def _build_forms(self):
+        """
+        乘客和车次都已确定时生成各步骤表单的固定部分
+
+        动态字段先以None占位，保持与浏览器一致的字段顺序，发送前原位填入。
+        """
+        if not self.ready:
+            return
+
+        passenger_ticket_str = '_'.join(f"{self.seat_code},{tail}" for tail in self._passenger_tails)
+        train_info = self.train_info
+
+        self._check_form = {
+            'cancel_flag': '2',
+            'bed_level_order_num': '000000000000000000000000000000',
+            'passengerTicketStr': passenger_ticket_str,
+            'oldPassengerStr': self.old_passenger_str,
+            'tour_flag': 'dc',
+            'whatsSelect': '1',
+            'sessionId': '',
+            'sig': '',
+            'scene': 'nc_login',
+            '_json_att': '',
+            'REPEAT_SUBMIT_TOKEN': None,
+        }
+        self._queue_form = {
+            'train_date': self.js_train_date,
+            'train_no': train_info.get('train_no', ''),
+            'stationTrainCode': train_info.get('列车号', ''),
+            'seatType': self.seat_code,
+            'fromStationTelecode': self.from_station,
+            'toStationTelecode': self.to_station,
+            'leftTicket': None,
+            'purpose_codes': '00',
+            'train_location': train_info.get('train_location', ''),
+            '_json_att': '',
+            'REPEAT_SUBMIT_TOKEN': None,
+        }
+        self._confirm_form = {
+            'passengerTicketStr': passenger_ticket_str,
+            'oldPassengerStr': self.old_passenger_str,
+            'purpose_codes': '00',
+            'key_check_isChange': None,
+            'leftTicketStr': None,
+            'train_location': train_info.get('train_location', ''),
+            'choose_seats': '',
+            'seatDetailType': '000',
+            'is_jy': 'N',
+            'is_cj': 'Y',
+            'encryptedData': '',
+            'whatsSelect': '1',
+            'roomType': '00',
+            'dwAll': 'N',
+            '_json_att': '',
+            'REPEAT_SUBMIT_TOKEN': None,
+        }
+
+    def _require_ready(self):
+        if not self.ready:
+            raise ValueError("订单表单未就绪：需要先设置乘客和车次")
+
+    # ---- 开售后填入动态字段 ----
+
+    def check_order_form(self, repeat_submit_token):
+        """checkOrderInfo表单"""
+        self._require_ready()
+        form = dict(self._check_form)
+        form['REPEAT_SUBMIT_TOKEN'] = repeat_submit_token or ''
+        return form
+
+    def queue_count_form(self, repeat_submit_token, left_ticket=None):
+        """getQueueCount表单"""
+        self._require_ready()
+        form = dict(self._queue_form)
+        form['leftTicket'] = left_ticket if left_ticket is not None else self.left_ticket
+        form['REPEAT_SUBMIT_TOKEN'] = repeat_submit_token or ''
+        return form
+
+    def confirm_form(self, repeat_submit_token, key_check_ischange, left_ticket=None):
+        """confirmSingleForQueue表单"""
+        self._require_ready()
+        form = dict(self._confirm_form)
+        form['key_check_isChange'] = key_check_ischange
+        form['leftTicketStr'] = left_ticket if left_ticket is not None else self.left_ticket
+        form['REPEAT_SUBMIT_TOKEN'] = repeat_submit_token
+        return form
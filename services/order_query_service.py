@@ -5,28 +5,46 @@
 
 import json
 import time
-import re
-from datetime import datetime
 import urllib.parse
-from utils import get_logger
+from models import BookingContext
+from utils import get_logger, read_initdc
+
+from .http_client import AsyncHttpClient, run_sync
 
 
 class OrderQueryService:
     """订单查询服务"""
     
-    def __init__(self, session=None, logger=None):
+    def __init__(self, session=None, logger=None, client=None, context=None):
         """
         初始化订单查询服务
         
         Args:
             session: requests会话对象
             logger: 日志记录器
+            client: 异步HTTP客户端
+            context: 订票上下文，与OrderSubmitService共用
         """
-        self.session = session
+        self.client = client or AsyncHttpClient(session)
+        self.session = self.client.session
         self.logger = logger or get_logger('12306')
+        self.context = context or BookingContext()
 
     def get_repeat_submit_token(self, last_leftticket_init_url=None):
         """获取REPEAT_SUBMIT_TOKEN"""
+        return run_sync(self.get_repeat_submit_token_async(last_leftticket_init_url=last_leftticket_init_url))
+
+    async def get_repeat_submit_token_async(self, last_leftticket_init_url=None):
+        """
+        获取REPEAT_SUBMIT_TOKEN（异步）
+
+        订票上下文中token与key_check_isChange都有效时不再请求；只有token时重新访问确认乘客页面，
+        补齐key_check_isChange
+        """
+        if self.context.order_ready:
+            self.logger.info("使用已获取的REPEAT_SUBMIT_TOKEN（来源: %s）", self.context.source('repeat_submit_token'))
+            return self.context.repeat_submit_token
+
         try:
             self.logger.info("获取REPEAT_SUBMIT_TOKEN...")
 
@@ -34,39 +52,52 @@ class OrderQueryService:
             if '_uab_collina' not in self.session.cookies:
                 collina_value = f"{int(time.time() * 1000)}{str(int(time.time() * 10000000))[-14:]}"
                 self.session.cookies.set('_uab_collina', collina_value, domain='kyfw.12306.cn')
-                self.logger.info(f"添加_uab_collina cookie: {collina_value}")
+                self.logger.info("添加_uab_collina cookie: %s", collina_value)
 
             # 第二步：访问确认乘客页面获取token
-            url = "https://kyfw.12306.cn/otn/confirmPassenger/initDc"
+            url = self.client.url("/otn/confirmPassenger/initDc")
 
-            referer = last_leftticket_init_url or 'https://kyfw.12306.cn/otn/leftTicket/init?linktypeid=dc'
+            referer = (last_leftticket_init_url or self.context.init_url or
+                       self.client.url('/otn/leftTicket/init?linktypeid=dc'))
             headers = {
                 'Referer': referer,
                 'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
                 'Accept-Language': 'zh-CN,zh;q=0.9,en;q=0.8',
                 'Cache-Control': 'max-age=0',
-                'Origin': 'https://kyfw.12306.cn',
+                'Origin': self.client.base_url,
                 'Content-Type': 'application/x-www-form-urlencoded',
                 'Upgrade-Insecure-Requests': '1'
             }
-            self.logger.info(f"initDc Referer: {referer}")
+            self.logger.info("initDc Referer: %s", referer)
 
+            # 请求节奏由客户端的限速器（RequestThrottle）统一控制
             data = {'_json_att': ''}
 
-            time.sleep(1)
-
             self.logger.info("访问确认乘客页面(POST initDc)...")
-            response = self.session.post(url, data=data, headers=headers, timeout=30)
+            response = await self.client.post(url, data=data, headers=headers, stream=True)
 
             if response.status_code == 200:
-                content = response.text
+                tokens = await self.client.call(read_initdc, response)
+
+                source = 'initDc(POST)'
+                if tokens.key_check_ischange:
+                    self.context.set('key_check_ischange', tokens.key_check_ischange, source)
+                if tokens.left_ticket_str:
+                    self.context.set('left_ticket_str', tokens.left_ticket_str, source)
+
+                # 保留响应内容用于调试（启用转储时）
+                dumps = self.client.dumps
+                if dumps is not None:
+                    dumps.add('confirm_passenger', tokens.text, url=response.url, status=response.status_code)
 
-                # 保存响应内容用于调试
-                timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-                filename = f'confirm_passenger_{timestamp}.html'
-                with open(filename, 'w', encoding='utf-8') as f:
-                    f.write(content)
-                self.logger.info(f"确认乘客页面已保存到 {filename}")
+                token = tokens.repeat_submit_token
+                if token and len(token) > 10:
+                    self.logger.info("获取到REPEAT_SUBMIT_TOKEN: %s", token)
+                    self.context.set('repeat_submit_token', token, source)
+                    return token
+
+                # 以下为失败路径，才需要解码页面正文
+                content = tokens.text
 
                 # 检查系统繁忙
                 if '系统忙' in content or '系统繁忙' in content:
@@ -81,22 +112,7 @@ class OrderQueryService:
                     self.logger.error("访问确认乘客页面被重定向到登录页面")
                     return None
 
-                # 尝试多种token提取模式
-                patterns = [
-                    r"globalRepeatSubmitToken\s*=\s*['\"]([^'\"]+)['\"]",
-                    r"REPEAT_SUBMIT_TOKEN\s*=\s*['\"]([^'\"]+)['\"]",
-                    r"repeatSubmitToken\s*=\s*['\"]([^'\"]+)['\"]",
-                ]
-
-                for pattern in patterns:
-                    token_match = re.search(pattern, content, re.IGNORECASE)
-                    if token_match:
-                        token = token_match.group(1)
-                        if len(token) > 10:
-                            self.logger.info(f"获取到REPEAT_SUBMIT_TOKEN: {token}")
-                            return token
-
-                if 'globalRepeatSubmitToken = null' in content:
+                if tokens.token_is_null:
                     self.logger.warning("token为null，需要先提交订单请求")
                     return "NEED_SUBMIT_ORDER_FIRST"
 
@@ -108,17 +124,27 @@ class OrderQueryService:
                     return None
 
             else:
-                self.logger.error(f"获取token页面HTTP错误: {response.status_code}")
+                response.close()
+                self.logger.error("获取token页面HTTP错误: %s", response.status_code)
                 return None
 
         except Exception as e:
-            self.logger.error(f"获取REPEAT_SUBMIT_TOKEN异常: {e}")
+            self.logger.error("获取REPEAT_SUBMIT_TOKEN异常: %s", e)
             return None
 
     def get_passengers(self, repeat_submit_token):
         """获取乘客信息"""
+        return run_sync(self.get_passengers_async(repeat_submit_token))
+
+    async def get_passengers_async(self, repeat_submit_token):
+        """获取乘客信息（异步），订票上下文中已有有效的乘客列表时不再请求"""
+        passengers = self.context.passengers
+        if passengers:
+            self.logger.info("使用已获取的乘客列表（来源: %s）", self.context.source('passengers'))
+            return True, passengers
+
         try:
-            url = "https://kyfw.12306.cn/otn/confirmPassenger/getPassengerDTOs"
+            url = self.client.url("/otn/confirmPassenger/getPassengerDTOs")
 
             data = {
                 '_json_att': '',
@@ -126,7 +152,7 @@ class OrderQueryService:
             }
 
             self.logger.info("获取乘客信息...")
-            response = self.session.post(url, data=data, timeout=30)
+            response = await self.client.post(url, data=data)
 
             if response.status_code == 200:
                 result = response.json()
@@ -135,72 +161,68 @@ class OrderQueryService:
                 if result.get('status'):
                     passengers = result.get('data', {}).get('normal_passengers', [])
                     if passengers:
-                        self.logger.info(f"找到 {len(passengers)} 位乘客")
+                        self.logger.info("找到 %s 位乘客", len(passengers))
+                        self.context.set('passengers', passengers, 'getPassengerDTOs')
                         return True, passengers
                     else:
                         self.logger.warning("没有找到乘客信息")
                         return False, None
                 else:
-                    self.logger.error(f"获取乘客信息失败: {result}")
+                    self.logger.error("获取乘客信息失败: %s", result)
                     return False, None
             else:
-                self.logger.error(f"getPassengerDTOs HTTP错误: {response.status_code}")
+                self.logger.error("getPassengerDTOs HTTP错误: %s", response.status_code)
                 return False, None
 
         except Exception as e:
-            self.logger.error(f"获取乘客信息异常: {e}")
+            self.logger.error("获取乘客信息异常: %s", e)
             return False, None
 
-    def get_queue_count(self, train_info, seat_type_code, from_station, to_station, 
-                        train_date, repeat_submit_token):
+    def get_queue_count(self, payload, repeat_submit_token):
         """获取排队人数"""
-        try:
-            url = "https://kyfw.12306.cn/otn/confirmPassenger/getQueueCount"
+        return run_sync(self.get_queue_count_async(payload, repeat_submit_token))
 
-            from datetime import datetime
-            train_date_obj = datetime.strptime(train_date, '%Y-%m-%d')
-            weekdays = ['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun']
-            months = ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec']
-            train_date_str = f"{weekdays[train_date_obj.weekday()]} {months[train_date_obj.month-1]} {train_date_obj.day:02d} {train_date_obj.year} 00:00:00 GMT+0800 (中国标准时间)"
+    async def get_queue_count_async(self, payload, repeat_submit_token):
+        """
+        获取排队人数（异步）
 
-            data = {
-                'train_date': train_date_str,
-                'train_no': train_info.get('train_no', ''),
-                'stationTrainCode': train_info.get('列车号', ''),
-                'seatType': seat_type_code,
-                'fromStationTelecode': from_station,
-                'toStationTelecode': to_station,
-                'leftTicket': train_info.get('leftTicket', ''),
-                'purpose_codes': '00',
-                'train_location': train_info.get('train_location', ''),
-                '_json_att': '',
-                'REPEAT_SUBMIT_TOKEN': repeat_submit_token or ''
-            }
+        Args:
+            payload: OrderPayload，需已设置乘客和车次
+            repeat_submit_token: REPEAT_SUBMIT_TOKEN
+        """
+        try:
+            url = self.client.url("/otn/confirmPassenger/getQueueCount")
+            data = payload.queue_count_form(repeat_submit_token,
+                                            self.context.left_ticket_str or payload.left_ticket)
 
             self.logger.info("获取排队人数...")
-            response = self.session.post(url, data=data, timeout=30)
+            response = await self.client.post(url, data=data)
 
             if response.status_code == 200:
                 result = response.json()
-                self.logger.info(f"getQueueCount响应: {result}")
+                self.logger.info("getQueueCount响应: %s", result)
 
                 if result.get('status'):
                     return True, result
                 else:
-                    self.logger.error(f"获取排队人数失败: {result}")
+                    self.logger.error("获取排队人数失败: %s", result)
                     return False, result
             else:
-                self.logger.error(f"getQueueCount HTTP错误: {response.status_code}")
+                self.logger.error("getQueueCount HTTP错误: %s", response.status_code)
                 return False, None
 
         except Exception as e:
-            self.logger.error(f"获取排队人数异常: {e}")
+            self.logger.error("获取排队人数异常: %s", e)
             return False, None
 
     def query_order_wait_time(self, repeat_submit_token):
         """查询订单等待时间"""
+        return run_sync(self.query_order_wait_time_async(repeat_submit_token))
+
+    async def query_order_wait_time_async(self, repeat_submit_token):
+        """查询订单等待时间（异步）"""
         try:
-            url = "https://kyfw.12306.cn/otn/confirmPassenger/queryOrderWaitTime"
+            url = self.client.url("/otn/confirmPassenger/queryOrderWaitTime")
 
             params = {
                 'random': str(int(time.time() * 1000)),
@@ -209,19 +231,19 @@ class OrderQueryService:
                 'REPEAT_SUBMIT_TOKEN': repeat_submit_token or ''
             }
 
-            response = self.session.get(url, params=params, timeout=30)
+            response = await self.client.get(url, params=params)
 
             if response.status_code == 200:
                 try:
                     result = response.json()
-                    self.logger.info(f"轮询响应: {result}")
+                    self.logger.info("轮询响应: %s", result)
 
                     if result.get('status'):
                         data = result.get('data', {})
                         wait_time = data.get('waitTime', -1)
                         wait_count = data.get('waitCount', 0)
 
-                        self.logger.info(f"waitTime={wait_time}, waitCount={wait_count}")
+                        self.logger.info("waitTime=%s, waitCount=%s", wait_time, wait_count)
 
                         if wait_time == -4:
                             self.logger.error("检测到异常排队状态！waitTime=-4")
@@ -236,33 +258,37 @@ class OrderQueryService:
                             self.logger.warning("订单失败")
                             return 'failed', data
                         elif wait_time == -100:
-                            self.logger.info(f"订单异步处理中... waitTime=-100")
+                            self.logger.info("订单异步处理中... waitTime=-100")
                             return 'waiting', data
                         elif wait_time > 0:
-                            self.logger.info(f"排队中... 等待时间: {wait_time}秒")
+                            self.logger.info("排队中... 等待时间: %s秒", wait_time)
                             return 'waiting', data
                         else:
-                            self.logger.warning(f"未知的waitTime值: {wait_time}")
+                            self.logger.warning("未知的waitTime值: %s", wait_time)
                             return 'waiting', data
                     else:
-                        self.logger.error(f"查询等待时间失败: {result}")
+                        self.logger.error("查询等待时间失败: %s", result)
                         return 'error', result
 
                 except json.JSONDecodeError as e:
-                    self.logger.error(f"解析等待时间响应失败: {e}")
+                    self.logger.error("解析等待时间响应失败: %s", e)
                     return 'error', None
             else:
-                self.logger.error(f"查询等待时间HTTP错误: {response.status_code}")
+                self.logger.error("查询等待时间HTTP错误: %s", response.status_code)
                 return 'error', None
 
         except Exception as e:
-            self.logger.error(f"查询等待时间异常: {e}")
+            self.logger.error("查询等待时间异常: %s", e)
             return 'error', None
 
     def get_order_result(self, order_id, repeat_submit_token):
         """获取订单最终结果"""
+        return run_sync(self.get_order_result_async(order_id, repeat_submit_token))
+
+    async def get_order_result_async(self, order_id, repeat_submit_token):
+        """获取订单最终结果（异步）"""
         try:
-            url = "https://kyfw.12306.cn/otn/confirmPassenger/resultOrderForDcQueue"
+            url = self.client.url("/otn/confirmPassenger/resultOrderForDcQueue")
 
             data = {
                 'orderSequence_no': order_id,
@@ -270,27 +296,27 @@ class OrderQueryService:
                 'REPEAT_SUBMIT_TOKEN': repeat_submit_token or ''
             }
 
-            self.logger.info(f"获取订单结果，订单号: {order_id}")
-            response = self.session.post(url, data=data, timeout=30)
+            self.logger.info("获取订单结果，订单号: %s", order_id)
+            response = await self.client.post(url, data=data)
 
             if response.status_code == 200:
                 try:
                     result = response.json()
-                    self.logger.info(f"订单结果响应: {result}")
+                    self.logger.info("订单结果响应: %s", result)
 
                     if result.get('status') and result.get('data', {}).get('submitStatus'):
                         return result
                     else:
-                        self.logger.warning(f"订单提交状态: {result}")
+                        self.logger.warning("订单提交状态: %s", result)
                         return None
 
                 except json.JSONDecodeError as e:
-                    self.logger.error(f"解析订单结果失败: {e}")
+                    self.logger.error("解析订单结果失败: %s", e)
                     return None
             else:
-                self.logger.error(f"获取订单结果HTTP错误: {response.status_code}")
+                self.logger.error("获取订单结果HTTP错误: %s", response.status_code)
                 return None
 
         except Exception as e:
-            self.logger.error(f"获取订单结果异常: {e}")
+            self.logger.error("获取订单结果异常: %s", e)
             return None
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+车次查询结果缓存模块
+
+同一线路（日期、出发站、到达站）的余票查询在ttl秒内复用上次结果，缓存条数超过上限时
+淘汰最久未使用的线路。同一线路已有请求在途时，其他调用方（包括其他任务线程中的事件循环）
+等待并共用这次请求的结果，而不是各自再发一次（single-flight）。
+
+开售后的订票流程需要最新的secretStr和余票，以bypass=True直接请求，结果仍写入缓存。
+缓存的结果由所有调用方共用，调用方不应修改。
+"""
+
+import asyncio
+import concurrent.futures
+import threading
+import time
+from collections import OrderedDict
+
+# 默认参数
+DEFAULT_TTL_S = 3.0
+DEFAULT_MAX_ENTRIES = 64
+
+_shared_cache = None
+_shared_lock = threading.Lock()
+
+
+def _is_ok_response(data):
+    """只缓存成功的查询响应"""
+    return isinstance(data, dict) and bool(data.get('status'))
+
+
+def get_shared_query_cache(ttl=DEFAULT_TTL_S, max_entries=DEFAULT_MAX_ENTRIES):
+    """获取进程内共享的查询缓存，多个任务监视同一线路时共用结果（参数只在首次创建时生效）"""
+    global _shared_cache
+    if _shared_cache is None:
+        with _shared_lock:
+            if _shared_cache is None:
+                _shared_cache = QueryCache(ttl=ttl, max_entries=max_entries, cacheable=_is_ok_response)
+    return _shared_cache
+
+
+class QueryCache:
+    """
+    带TTL和LRU上限的single-flight缓存
+
+    用法:
+        cache = QueryCache(ttl=3, max_entries=64)
+        data = await cache.get(key, fetch)               # fetch为无参协程函数
+        data = await cache.get(key, fetch, bypass=True)  # 开售后直接请求
+    """
+
+    def __init__(self, ttl=DEFAULT_TTL_S, max_entries=DEFAULT_MAX_ENTRIES, cacheable=None,
+                 clock=time.monotonic):
+        """
+        Args:
+            ttl: 结果有效秒数
+            max_entries: 缓存条数上限
+            cacheable: 判断结果是否可缓存的函数，默认缓存非None的结果
+            clock: 单调时钟
+        """
+        self.ttl = ttl
+        self.max_entries = max(1, int(max_entries))
+        self.cacheable = cacheable or (lambda value: value is not None)
+        self.clock = clock
+        # key -> (过期时刻, 结果)，按最近使用排序
+        self._entries = OrderedDict()
+        # key -> concurrent.futures.Future，跨线程/事件循环共用
+        self._inflight = {}
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        # 等待在途请求的次数
+        self.shared = 0
+        self.bypassed = 0
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+    def stats(self):
+        """命中统计"""
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'shared': self.shared,
+                'bypassed': self.bypassed,
+                'entries': len(self._entries),
+            }
+
+    def invalidate(self, key=None):
+        """删除一条缓存，key为None时清空"""
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+    async def get(self, key, fetch, bypass=False):
+        """
+        获取key对应的结果
+
+        Args:
+            key: 缓存键（可哈希）
+            fetch: 发起请求的无参协程函数
+            bypass: 不读缓存、不等待在途请求，直接请求（结果仍写入缓存）
+
+        Returns:
+            fetch的返回值
+        """
+        if bypass:
+            with self._lock:
+                self.bypassed += 1
+            value = await fetch()
+            self._store(key, value)
+            return value
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > self.clock():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = self._inflight[key] = concurrent.futures.Future()
+                self.misses += 1
+            else:
+                self.shared += 1
+
+        if not leader:
+            return await asyncio.wrap_future(future)
+
+        try:
+            value = await fetch()
+        except BaseException as e:
+            with self._lock:
+                self._inflight.pop(key, None)
+            future.set_exception(e)
+            raise
+
+        self._store(key, value, future)
+        future.set_result(value)
+        return value
+
+    def _store(self, key, value, future=None):
+        with self._lock:
+            if future is not None and self._inflight.get(key) is future:
+                del self._inflight[key]
+            if not self.cacheable(value):
+                return
+            self._entries[key] = (self.clock() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
@@ -0,0 +1,274 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+服务器时钟偏差估计模块
+
+12306的响应头Date只精确到秒。每个样本记录请求发出和收到响应时的本地时间
+t0、t1，服务器生成Date=D时的真实时间位于 [D, D+1)，因此偏差
+（服务器时间 - 本地时间）必然落在 [D - t1, D + 1 - t0] 内。多个样本的区间
+取交集即得到估计值和误差上限。
+
+后续样本安排在按当前估计的服务器整秒跳变时刻附近发出（请求中点对准跳变点），
+每个样本大约把区间缩小一半，几次采样后误差接近最小往返时延的一半。
+按往返时延从小到大合并样本，与已有交集矛盾的样本（如负载均衡后不同服务器
+的时钟不一致）被丢弃。
+"""
+
+import asyncio
+import threading
+import time
+from datetime import datetime
+from email.utils import parsedate_to_datetime
+
+from utils import get_logger
+
+from .http_client import AsyncHttpClient, run_sync
+
+_NS_PER_SECOND = 1_000_000_000
+
+# 默认采样参数
+DEFAULT_SAMPLES = 8
+DEFAULT_TARGET_ERROR_MS = 20
+DEFAULT_RTT_FACTOR = 3.0
+DEFAULT_SYNC_PATH = '/otn/leftTicket/init'
+
+# 其他任务正在同步时，异步等待的轮询间隔（秒）
+_LOCK_POLL_S = 0.05
+
+
+class ClockSample:
+    """一次Date头采样"""
+
+    __slots__ = ('sent_ns', 'received_ns', 'server_second')
+
+    def __init__(self, sent_ns, received_ns, server_second):
+        self.sent_ns = sent_ns
+        self.received_ns = received_ns
+        # Date头对应的Unix秒
+        self.server_second = server_second
+
+    @property
+    def rtt_ns(self):
+        return self.received_ns - self.sent_ns
+
+    @property
+    def bounds_ns(self):
+        """该样本给出的偏差区间 (下限, 上限)"""
+        server_ns = self.server_second * _NS_PER_SECOND
+        return server_ns - self.received_ns, server_ns + _NS_PER_SECOND - self.sent_ns
+
+
+class ClockEstimate:
+    """偏差估计结果"""
+
+    __slots__ = ('offset_ns', 'error_ns', 'min_rtt_ns', 'used', 'rejected')
+
+    def __init__(self, offset_ns, error_ns, min_rtt_ns, used, rejected):
+        # 服务器时间 - 本地时间
+        self.offset_ns = offset_ns
+        # 误差上限（真实偏差在 offset ± error 内）
+        self.error_ns = error_ns
+        self.min_rtt_ns = min_rtt_ns
+        self.used = used
+        self.rejected = rejected
+
+    @property
+    def offset_ms(self):
+        return self.offset_ns / 1_000_000
+
+    @property
+    def error_ms(self):
+        return self.error_ns / 1_000_000
+
+    def __repr__(self):
+        return f"ClockEstimate(offset={self.offset_ms:+.1f}ms, error=±{self.error_ms:.1f}ms, samples={self.used})"
+
+
+def estimate_offset(samples, rtt_factor=DEFAULT_RTT_FACTOR):
+    """
+    由样本估计偏差
+
+    只使用往返时延不超过最小值rtt_factor倍的样本，按往返时延从小到大求区间交集，
+    与已有交集矛盾的样本被丢弃。
+
+    Args:
+        samples: ClockSample列表
+        rtt_factor: 最小往返时延过滤倍数
+
+    Returns:
+        ClockEstimate: 估计结果，没有样本时返回None
+    """
+    if not samples:
+        return None
+
+    ordered = sorted(samples, key=lambda sample: sample.rtt_ns)
+    min_rtt = ordered[0].rtt_ns
+    limit = max(min_rtt * rtt_factor, min_rtt + 1_000_000)
+
+    low, high = ordered[0].bounds_ns
+    used, rejected = 1, 0
+    for sample in ordered[1:]:
+        if sample.rtt_ns > limit:
+            rejected += 1
+            continue
+        sample_low, sample_high = sample.bounds_ns
+        new_low, new_high = max(low, sample_low), min(high, sample_high)
+        if new_low > new_high:
+            rejected += 1
+            continue
+        low, high = new_low, new_high
+        used += 1
+
+    return ClockEstimate((low + high) // 2, (high - low) // 2, min_rtt, used, rejected)
+
+
+class ServerClock:
+    """
+    12306服务器时钟
+
+    sync()采样后，now_ns()返回估计的服务器时间，可直接作为
+    SaleTrigger.at(..., clock_ns=server_clock.now_ns) 的时钟。
+    多个任务可以共用同一个实例：同步过程互斥，估计值在同步完成后才整体替换。
+    """
+
+    def __init__(self, session=None, logger=None, client=None, path=DEFAULT_SYNC_PATH):
+        """
+        Args:
+            session: requests会话对象
+            logger: 日志记录器
+            client: 异步HTTP客户端
+            path: 采样请求的路径（使用HEAD请求，不下载响应体）
+        """
+        self.client = client or AsyncHttpClient(session)
+        self.logger = logger or get_logger('12306')
+        self.path = path
+        self.samples = []
+        self.estimate = None
+        self.synced_at = None
+        self._sync_lock = threading.Lock()
+
+    @property
+    def age(self):
+        """距离上次同步完成的秒数，未同步时为None"""
+        if self.synced_at is None:
+            return None
+        return time.monotonic() - self.synced_at
+
+    @property
+    def offset_ns(self):
+        """当前估计的偏差，未同步时为0"""
+        return self.estimate.offset_ns if self.estimate else 0
+
+    def now_ns(self):
+        """估计的服务器时间（纳秒，Unix纪元）"""
+        return time.time_ns() + self.offset_ns
+
+    def now(self):
+        """估计的服务器时间（本地时区的datetime）"""
+        return datetime.fromtimestamp(self.now_ns() / _NS_PER_SECOND)
+
+    def _sample(self, url):
+        """发送一次采样请求（阻塞，在线程池中执行）"""
+        sent = time.time_ns()
+        response = self.client.session.head(url, timeout=self.client.timeout, allow_redirects=False)
+        received = time.time_ns()
+        response.close()
+
+        date = response.headers.get('Date')
+        if not date:
+            return None
+        try:
+            server_second = int(parsedate_to_datetime(date).timestamp())
+        except (TypeError, ValueError):
+            return None
+        return ClockSample(sent, received, server_second)
+
+    def sync(self, samples=DEFAULT_SAMPLES, target_error_ms=DEFAULT_TARGET_ERROR_MS,
+             max_age=None, blocking=True):
+        """
+        同步服务器时钟
+
+        Args:
+            samples: 最多采样次数
+            target_error_ms: 误差上限低于此值时提前结束
+            max_age: 上次同步距今不超过此秒数时直接返回已有估计
+            blocking: 为False时若其他任务正在同步，不等待，直接返回已有估计
+
+        Returns:
+            ClockEstimate: 估计结果
+        """
+        return run_sync(self.refresh_async(samples, target_error_ms, max_age, blocking))
+
+    async def refresh_async(self, samples=DEFAULT_SAMPLES, target_error_ms=DEFAULT_TARGET_ERROR_MS,
+                            max_age=None, blocking=True):
+        """
+        同步服务器时钟（异步，参数同sync()）
+
+        其他任务正在同步时按blocking等待或直接返回已有估计；等待期间不占用线程，
+        同一事件循环中的其他任务照常运行。
+        """
+        while not self._sync_lock.acquire(False):
+            if not blocking:
+                return self.estimate
+            await asyncio.sleep(_LOCK_POLL_S)
+        try:
+            age = self.age
+            if max_age is not None and age is not None and age <= max_age:
+                return self.estimate
+            return await self.sync_async(samples, target_error_ms)
+        finally:
+            self._sync_lock.release()
+
+    async def sync_async(self, samples=DEFAULT_SAMPLES, target_error_ms=DEFAULT_TARGET_ERROR_MS):
+        """
+        同步服务器时钟（异步）
+
+        Args:
+            samples: 最多采样次数（每次最多等待1秒对准整秒跳变）
+            target_error_ms: 误差上限低于此值时提前结束
+
+        Returns:
+            ClockEstimate: 估计结果，采样全部失败时返回None
+        """
+        url = self.client.url(self.path)
+        collected = []
+        estimate = None
+        target_error_ns = target_error_ms * 1_000_000
+
+        for _ in range(samples):
+            if estimate is not None:
+                await asyncio.sleep(self._delay_to_next_edge(collected, estimate))
+
+            try:
+                sample = await self.client.call(self._sample, url)
+            except Exception as e:
+                self.logger.warning("服务器时间采样失败: %s", e)
+                continue
+            if sample is None:
+                self.logger.warning("服务器响应缺少Date头，无法估计时钟偏差")
+                break
+
+            collected.append(sample)
+            estimate = estimate_offset(collected)
+            if estimate.error_ns <= target_error_ns:
+                break
+
+        if collected:
+            # 采样完成后整体替换，其他任务不会读到只有部分样本的估计
+            self.samples = collected
+            self.estimate = estimate
+            self.synced_at = time.monotonic()
+            self.logger.info("服务器时钟偏差: %+.1fms (±%.1fms, 最小往返%.1fms, %d/%d个样本)",
+                             estimate.offset_ms, estimate.error_ms, estimate.min_rtt_ns / 1e6,
+                             estimate.used, len(self.samples))
+        return self.estimate
+
+    @staticmethod
+    def _delay_to_next_edge(samples, estimate):
+        """距离下一次请求中点对准估计的服务器整秒跳变还需等待的秒数"""
+        half_rtt = min(sample.rtt_ns for sample in samples) // 2
+        # 请求中点 = 发出时刻 + half_rtt，对准服务器时间的下一个整秒
+        server_at_mid = time.time_ns() + half_rtt + estimate.offset_ns
+        wait_ns = _NS_PER_SECOND - server_at_mid % _NS_PER_SECOND
+        return wait_ns / _NS_PER_SECOND
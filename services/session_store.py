@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+登录会话存储模块
+
+按账号（登录手机号）把cookies保存在一个SQLite文件中，每个账号一行：
+- tk、uamtk、JSESSIONID单独成列，检查登录凭据时不需要解析整组cookies
+- 其余cookies以紧凑的JSON数组保存 [[名称, 值, 域, 路径, 过期时间, secure], ...]
+- 每次保存是一个事务，写入中途退出不会留下半个文件
+- 读取时丢弃已过期的cookies；多任务进程启动时可以一次查询取回所有任务账号的会话
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from requests.cookies import RequestsCookieJar, create_cookie
+
+# 单独成列的认证cookies
+AUTH_COOKIES = ('tk', 'uamtk', 'JSESSIONID')
+
+DEFAULT_PATH = 'sessions.db'
+
+# 每次IN查询的账号数（低版本SQLite的参数个数上限为999）
+_QUERY_CHUNK = 500
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    account TEXT PRIMARY KEY,
+    updated_at REAL NOT NULL,
+    expires_at REAL,
+    tk TEXT,
+    uamtk TEXT,
+    jsessionid TEXT,
+    cookies TEXT NOT NULL
+)
+"""
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def get_session_store(path=DEFAULT_PATH):
+    """获取进程内共享的会话存储（同一文件只打开一次）"""
+    key = os.path.abspath(path)
+    with _stores_lock:
+        store = _stores.get(key)
+        if store is None:
+            store = _stores[key] = SessionStore(path)
+        return store
+
+
+class SessionRecord:
+    """一个账号保存的会话"""
+
+    __slots__ = ('account', 'updated_at', 'expires_at', 'auth', 'cookies')
+
+    def __init__(self, account, updated_at, expires_at, auth, cookies):
+        self.account = account
+        self.updated_at = updated_at
+        # 认证cookies中最早的过期时间，均为会话cookie时为None
+        self.expires_at = expires_at
+        # {'tk': ..., 'uamtk': ..., 'JSESSIONID': ...}
+        self.auth = auth
+        # [[名称, 值, 域, 路径, 过期时间, secure], ...]
+        self.cookies = cookies
+
+    def apply(self, jar, now=None):
+        """
+        把未过期的cookies放入cookie jar
+
+        Returns:
+            int: 放入的cookies数
+        """
+        now = time.time() if now is None else now
+        count = 0
+        for name, value, domain, path, expires, secure in self.cookies:
+            if expires is not None and expires <= now:
+                continue
+            jar.set_cookie(create_cookie(name, value, domain=domain, path=path,
+                                         expires=expires, secure=bool(secure)))
+            count += 1
+        return count
+
+    def to_jar(self, now=None):
+        jar = RequestsCookieJar()
+        self.apply(jar, now)
+        return jar
+
+
+class SessionStore:
+    """
+    按账号保存cookies的SQLite存储
+
+    用法:
+        store = get_session_store('sessions.db')
+        store.save('13800000000', session.cookies)
+        record = store.load('13800000000')
+        if record:
+            record.apply(session.cookies)
+    """
+
+    def __init__(self, path=DEFAULT_PATH):
+        """
+        Args:
+            path: SQLite文件路径
+        """
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # 多个任务线程共用一个连接，由锁串行
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.execute(_SCHEMA)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def save(self, account, jar):
+        """
+        保存账号的cookies（已过期的不保存）
+
+        Args:
+            account: 账号
+            jar: cookie jar
+        """
+        now = time.time()
+        cookies = []
+        auth = {}
+        expires_at = None
+        for cookie in jar:
+            if cookie.expires is not None and cookie.expires <= now:
+                continue
+            cookies.append([cookie.name, cookie.value, cookie.domain, cookie.path,
+                            cookie.expires, 1 if cookie.secure else 0])
+            if cookie.name in AUTH_COOKIES:
+                auth[cookie.name] = cookie.value
+                if cookie.expires is not None:
+                    expires_at = cookie.expires if expires_at is None else min(expires_at, cookie.expires)
+
+        data = json.dumps(cookies, ensure_ascii=False, separators=(',', ':'))
+        with self._lock, self._conn:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO sessions (account, updated_at, expires_at, tk, uamtk, jsessionid, cookies) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                (account, now, expires_at, auth.get('tk'), auth.get('uamtk'), auth.get('JSESSIONID'), data)
+            )
+        return len(cookies)
+
+    def load(self, account):
+        """
+        读取账号的会话
+
+        Returns:
+            SessionRecord: 不存在或认证cookies已过期时返回None
+        """
+        return self.load_many([account]).get(account)
+
+    def load_many(self, accounts):
+        """
+        一次查询读取多个账号的会话（跳过认证cookies已过期的）
+
+        Returns:
+            dict: {账号: SessionRecord}
+        """
+        accounts = list(dict.fromkeys(accounts))
+        now = time.time()
+        rows = []
+        with self._lock:
+            for start in range(0, len(accounts), _QUERY_CHUNK):
+                chunk = accounts[start:start + _QUERY_CHUNK]
+                placeholders = ','.join('?' * len(chunk))
+                rows.extend(self._conn.execute(
+                    f'SELECT account, updated_at, expires_at, tk, uamtk, jsessionid, cookies '
+                    f'FROM sessions WHERE account IN ({placeholders}) AND (expires_at IS NULL OR expires_at > ?)',
+                    (*chunk, now)
+                ).fetchall())
+        return {row[0]: self._record(row) for row in rows}
+
+    def auth_cookies(self, account):
+        """
+        只读取认证cookies，不解析整组cookies
+
+        Returns:
+            dict: {'tk', 'uamtk', 'JSESSIONID'}中已保存的项，不存在时为空字典
+        """
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT tk, uamtk, jsessionid FROM sessions WHERE account = ? '
+                'AND (expires_at IS NULL OR expires_at > ?)',
+                (account, time.time())
+            ).fetchone()
+        if row is None:
+            return {}
+        return {name: value for name, value in zip(AUTH_COOKIES, row) if value}
+
+    def latest_account(self):
+        """最近保存的账号，没有时返回None"""
+        with self._lock:
+            row = self._conn.execute('SELECT account FROM sessions ORDER BY updated_at DESC LIMIT 1').fetchone()
+        return row[0] if row else None
+
+    def accounts(self):
+        """所有账号（按最近保存排序）"""
+        with self._lock:
+            rows = self._conn.execute('SELECT account FROM sessions ORDER BY updated_at DESC').fetchall()
+        return [row[0] for row in rows]
+
+    def delete(self, account):
+        with self._lock, self._conn:
+            self._conn.execute('DELETE FROM sessions WHERE account = ?', (account,))
+
+    @staticmethod
+    def _record(row):
+        account, updated_at, expires_at, tk, uamtk, jsessionid, cookies = row
+        auth = {name: value for name, value in zip(AUTH_COOKIES, (tk, uamtk, jsessionid)) if value}
+        return SessionRecord(account, updated_at, expires_at, auth, json.loads(cookies))
@@ -0,0 +1,341 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+请求限速与熔断模块
+
+接口按用途分为几类（查询、下单、下单页面、轮询、页面、登录等），每类一个令牌桶，由进程内所有会话、
+所有任务共用：令牌不足时按预约的时刻等待，多个事件循环（任务线程）之间同样按顺序排队。
+
+每类同时有一个熔断器：连续出现过载信号（HTTP 429/5xx、JSON接口返回HTML页面、
+"系统繁忙"响应、连接超时）达到阈值后熔断，冷却期内该类请求直接抛出CircuitOpenError而不发出；
+冷却期后放行一个探测请求，成功则恢复，仍过载则冷却期加倍。
+
+HEAD请求（服务器时钟采样）不限速也不计入熔断，避免排队时间混入往返时延。
+下单流程中的页面（initDc、提交订单前的leftTicket/init）单独一类：返回HTML是正常的，
+也不与查询前的首页访问共用较小的页面令牌桶。
+"""
+
+import asyncio
+import threading
+import time
+
+import requests
+
+from utils import get_logger
+
+# 接口（路径最后一段） -> 类别
+ENDPOINT_CLASSES = {
+    'query': 'query',
+    'submitOrderRequest': 'order',
+    'initDc': 'order_page',
+    'getPassengerDTOs': 'order',
+    'checkOrderInfo': 'order',
+    'getQueueCount': 'order',
+    'confirmSingleForQueue': 'order',
+    'queryOrderWaitTime': 'poll',
+    'resultOrderForDcQueue': 'poll',
+    'init': 'page',
+    'login.html': 'page',
+    'login': 'auth',
+    'checkLoginVerify': 'auth',
+    'getMessageCode': 'auth',
+    'uamtk': 'auth',
+    'uamauthclient': 'auth',
+    'checkUser': 'auth',
+    'queryLoginUser': 'auth',
+}
+
+DEFAULT_CLASS = 'default'
+
+# 应返回JSON的类别，返回HTML页面视为过载或被拦截
+JSON_CLASSES = frozenset(('query', 'order', 'poll'))
+
+# 类别 -> (每秒令牌数, 桶容量)
+DEFAULT_LIMITS = {
+    'query': (2, 4),
+    'order': (5, 10),
+    'order_page': (5, 10),
+    'poll': (4, 4),
+    'page': (1, 2),
+    'auth': (2, 4),
+    DEFAULT_CLASS: (5, 10),
+}
+
+# 熔断参数
+DEFAULT_FAILURE_THRESHOLD = 3
+DEFAULT_COOLDOWN_S = 2.0
+DEFAULT_MAX_COOLDOWN_S = 30.0
+
+# 只在较短的JSON响应中查找繁忙提示，不扫描大的查询结果
+_BUSY_MARKERS = ('系统繁忙'.encode('utf-8'), '系统忙'.encode('utf-8'))
+_BUSY_SCAN_LIMIT = 4096
+
+_shared_throttle = None
+_shared_lock = threading.Lock()
+
+
+class CircuitOpenError(requests.exceptions.RequestException):
+    """熔断期间的请求，未发出"""
+
+
+def endpoint_of(url):
+    """接口名（路径最后一段）"""
+    path = url.split('?', 1)[0]
+    return path.rstrip('/').rsplit('/', 1)[-1]
+
+
+class TokenBucket:
+    """
+    线程安全的令牌桶
+
+    令牌可以预支为负数：每个调用方在锁内预约自己的发送时刻，再在锁外等待，
+    不同线程、不同事件循环的调用方按预约顺序依次发出。
+    """
+
+    def __init__(self, rate, burst, clock=time.monotonic):
+        """
+        Args:
+            rate: 每秒补充的令牌数
+            burst: 桶容量（允许的突发请求数）
+            clock: 单调时钟
+        """
+        self.rate = float(rate)
+        self.burst = float(max(1, burst))
+        self.clock = clock
+        self._tokens = self.burst
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def reserve(self):
+        """取一个令牌，返回需要等待的秒数"""
+        with self._lock:
+            now = self.clock()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+
+    async def acquire(self):
+        """取一个令牌（异步等待）"""
+        delay = self.reserve()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        return delay
+
+
+class CircuitBreaker:
+    """连续过载后熔断的断路器"""
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold=DEFAULT_FAILURE_THRESHOLD, cooldown_s=DEFAULT_COOLDOWN_S,
+                 max_cooldown_s=DEFAULT_MAX_COOLDOWN_S, clock=time.monotonic):
+        """
+        Args:
+            failure_threshold: 连续过载多少次后熔断
+            cooldown_s: 首次熔断的冷却秒数
+            max_cooldown_s: 冷却秒数上限（探测仍失败时加倍）
+            clock: 单调时钟
+        """
+        self.failure_threshold = max(1, int(failure_threshold))
+        self.base_cooldown_s = cooldown_s
+        self.max_cooldown_s = max(max_cooldown_s, cooldown_s)
+        self.clock = clock
+        self.state = self.CLOSED
+        self.failures = 0
+        self.cooldown_s = cooldown_s
+        self.opened_at = None
+        self.trips = 0
+        self.rejected = 0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        """是否放行本次请求"""
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and self.clock() - self.opened_at >= self.cooldown_s:
+                self.state = self.HALF_OPEN
+                self._probing = False
+            if self.state == self.HALF_OPEN and not self._probing:
+                # 冷却期后只放行一个探测请求
+                self._probing = True
+                return True
+            self.rejected += 1
+            return False
+
+    def retry_after(self):
+        """距冷却结束的秒数"""
+        with self._lock:
+            if self.state != self.OPEN:
+                return 0.0
+            return max(0.0, self.cooldown_s - (self.clock() - self.opened_at))
+
+    def release(self):
+        """探测请求未得到结果（如被取消），允许下一个请求探测"""
+        with self._lock:
+            self._probing = False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            if self.state != self.CLOSED:
+                self.state = self.CLOSED
+                self.cooldown_s = self.base_cooldown_s
+                self._probing = False
+
+    def record_failure(self):
+        """
+        记录一次过载
+
+        Returns:
+            bool: 本次是否触发熔断
+        """
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN:
+                # 探测仍过载，冷却期加倍
+                self.cooldown_s = min(self.max_cooldown_s, self.cooldown_s * 2)
+            elif self.failures < self.failure_threshold or self.state == self.OPEN:
+                return False
+            self.state = self.OPEN
+            self.opened_at = self.clock()
+            self._probing = False
+            self.trips += 1
+            return True
+
+
+def is_overloaded(response, expect_json, streamed=False):
+    """
+    响应是否表示服务器过载或请求被拦截
+
+    Args:
+        response: requests响应
+        expect_json: 接口是否应返回JSON
+        streamed: 是否为流式响应（不读取响应体）
+    """
+    status = response.status_code
+    if status == 429 or status >= 500:
+        return True
+    # 页面类接口和流式响应（initDc）只看状态码，不检查Content-Type和响应体
+    if not expect_json or streamed or status != 200:
+        return False
+    if 'json' not in response.headers.get('Content-Type', ''):
+        return True
+    content = response.content
+    return len(content) <= _BUSY_SCAN_LIMIT and any(marker in content for marker in _BUSY_MARKERS)
+
+
+class RequestThrottle:
+    """
+    按接口类别限速和熔断
+
+    用法:
+        client.throttle = get_shared_throttle()
+        # AsyncHttpClient.request在发送前调用 before()，收到响应后调用 after()
+    """
+
+    def __init__(self, limits=None, failure_threshold=DEFAULT_FAILURE_THRESHOLD,
+                 cooldown_s=DEFAULT_COOLDOWN_S, max_cooldown_s=DEFAULT_MAX_COOLDOWN_S, logger=None):
+        """
+        Args:
+            limits: {类别: (每秒令牌数, 桶容量)}，覆盖DEFAULT_LIMITS
+            failure_threshold: 连续过载多少次后熔断
+            cooldown_s: 首次熔断的冷却秒数
+            max_cooldown_s: 冷却秒数上限
+            logger: 日志记录器
+        """
+        merged = dict(DEFAULT_LIMITS)
+        merged.update(limits or {})
+        self.buckets = {name: TokenBucket(rate, burst) for name, (rate, burst) in merged.items()}
+        self.breakers = {
+            name: CircuitBreaker(failure_threshold, cooldown_s, max_cooldown_s) for name in merged
+        }
+        self.logger = logger or get_logger('12306')
+        self.waited_s = 0.0
+
+    def classify(self, url, name=None):
+        """接口类别，name指定时优先使用（同一接口在不同流程中可以归入不同类别）"""
+        name = name or ENDPOINT_CLASSES.get(endpoint_of(url), DEFAULT_CLASS)
+        return name if name in self.buckets else DEFAULT_CLASS
+
+    async def before(self, method, url, name=None):
+        """
+        发送前检查熔断并取令牌
+
+        Args:
+            method: 请求方法
+            url: 请求地址
+            name: 指定的接口类别，默认按接口名分类
+
+        Returns:
+            str: 接口类别，不受控的请求（HEAD）返回None
+
+        Raises:
+            CircuitOpenError: 该类接口处于熔断期
+        """
+        if method == 'HEAD':
+            return None
+        name = self.classify(url, name)
+        breaker = self.breakers[name]
+        if not breaker.allow():
+            raise CircuitOpenError(
+                f"{name}类接口熔断中，{breaker.retry_after():.1f}s后重试: {endpoint_of(url)}"
+            )
+        delay = await self.buckets[name].acquire()
+        if delay:
+            self.waited_s += delay
+        return name
+
+    def after(self, name, response=None, error=None, streamed=False):
+        """
+        记录请求结果
+
+        Args:
+            name: before()返回的类别
+            response: 响应，请求异常时为None
+            error: 请求异常
+            streamed: 是否为流式响应
+        """
+        if name is None:
+            return
+        breaker = self.breakers[name]
+        if error is not None and not isinstance(error, requests.exceptions.RequestException):
+            breaker.release()
+            return
+        if error is not None:
+            overloaded = isinstance(error, (requests.exceptions.Timeout, requests.exceptions.ConnectionError))
+        else:
+            overloaded = is_overloaded(response, name in JSON_CLASSES, streamed)
+
+        if not overloaded:
+            breaker.record_success()
+        elif breaker.record_failure():
+            self.logger.warning("%s类接口连续过载，熔断 %.1fs", name, breaker.cooldown_s)
+
+    def stats(self):
+        """各类别的熔断统计和累计限速等待时间"""
+        return {
+            'waited_s': round(self.waited_s, 3),
+            'breakers': {
+                name: {'state': breaker.state, 'trips': breaker.trips, 'rejected': breaker.rejected}
+                for name, breaker in self.breakers.items()
+            },
+        }
+
+
+def get_shared_throttle(limits=None, failure_threshold=DEFAULT_FAILURE_THRESHOLD,
+                        cooldown_s=DEFAULT_COOLDOWN_S, max_cooldown_s=DEFAULT_MAX_COOLDOWN_S):
+    """获取进程内共享的限速器，所有会话和任务共用（参数只在首次创建时生效）"""
+    global _shared_throttle
+    if _shared_throttle is None:
+        with _shared_lock:
+            if _shared_throttle is None:
+                _shared_throttle = RequestThrottle(limits, failure_threshold, cooldown_s, max_cooldown_s)
+    return _shared_throttle
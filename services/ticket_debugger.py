@@ -7,32 +7,48 @@ import json
 import requests
 import urllib.parse
 from datetime import datetime
-import time
 import re
 import logging
 
+from models import TrainRecord, SessionWarmState, train_code_of
+from utils.logger import is_enabled_for
+from utils.station_index import StationIndex, get_station_index
+
+from .http_client import AsyncHttpClient, run_sync
+
 
 class TrainTicketDebugger:
     """12306火车票查询调试器"""
     
-    def __init__(self, config=None, session=None, station_mapping=None, logger=None):
+    def __init__(self, config=None, session=None, station_mapping=None, logger=None, client=None,
+                 station_index=None, cache=None, warm_state=None):
         """
         初始化调试器
         
         Args:
             config: API配置字典
             session: requests会话对象
-            station_mapping: 车站代码映射
+            station_mapping: 车站代码映射 {站名: 车站代码}，未提供station_index时用于构建索引
             logger: 日志记录器
+            client: 异步HTTP客户端
+            station_index: 车站索引，默认使用共享索引
+            cache: 查询结果缓存（QueryCache），None表示每次都请求
+            warm_state: 会话预热状态，决定查询前是否访问首页，默认新建
         """
+        # 使用传入的客户端或基于session创建新的
+        self.client = client or AsyncHttpClient(session)
+        self.session = self.client.session
+
         self.config = config or {}
-        self.base_url = self.config.get('base_url', 'https://kyfw.12306.cn/otn/leftTicket/query')
+        self.base_url = self.config.get('base_url', self.client.url('/otn/leftTicket/query'))
         self.headers = self.config.get('headers', {})
         self.query_params = self.config.get('query_params', {})
-        self.station_mapping = station_mapping or {}
-        
-        # 使用传入的session或创建新的
-        self.session = session if session is not None else requests.Session()
+        if station_index is None:
+            station_index = StationIndex.from_mapping(station_mapping) if station_mapping else get_station_index()
+        self.station_index = station_index
+        self.cache = cache
+        self.warm_state = warm_state or SessionWarmState()
+
         self.session.headers.update(self.headers)
 
         # 使用传入的logger或创建新的
@@ -40,46 +56,96 @@ class TrainTicketDebugger:
 
     def visit_homepage(self):
         """访问12306首页获取cookies"""
+        return run_sync(self.visit_homepage_async())
+
+    async def visit_homepage_async(self):
+        """访问12306首页获取cookies（异步）"""
         try:
             self.logger.info("正在访问12306首页获取cookies...")
-            homepage_url = "https://kyfw.12306.cn/otn/leftTicket/init?linktypeid=dc"
-
-            response = self.session.get(homepage_url, timeout=30)
-            self.logger.info(f"首页访问状态码: {response.status_code}")
-            self.logger.info(f"获取到的cookies: {dict(self.session.cookies)}")
+            homepage_url = self.client.url("/otn/leftTicket/init?linktypeid=dc")
 
-            # 缩短等待时间
-            time.sleep(0.5)
+            response = await self.client.get(homepage_url)
+            self.logger.info("首页访问状态码: %s", response.status_code)
+            if self.logger.isEnabledFor(logging.INFO):
+                self.logger.info("获取到的cookies: %s", dict(self.session.cookies))
 
-            return response.status_code == 200
+            if response.status_code != 200:
+                return False
+            self.warm_state.mark_visited()
+            return True
         except Exception as e:
-            self.logger.error(f"访问首页失败: {e}")
+            self.logger.error("访问首页失败: %s", e)
             return False
 
-    def make_request(self):
+    def make_request(self, bypass_cache=False):
         """发送API请求"""
+        return run_sync(self.make_request_async(bypass_cache=bypass_cache))
+
+    async def make_request_async(self, bypass_cache=False):
+        """
+        发送API请求（异步）
+
+        启用缓存时同一线路ttl秒内复用结果，并与在途的相同查询共用一次请求。
+
+        Args:
+            bypass_cache: 不使用缓存直接请求（开售后的订票流程）
+        """
+        return await self._query_async(dict(self.query_params), bypass_cache)
+
+    async def query_route_async(self, train_date, from_station, to_station, bypass_cache=False):
+        """
+        查询指定日期和线路的余票（异步），不修改query_params，可并发调用
+
+        Args:
+            train_date: 出发日期 YYYY-MM-DD
+            from_station: 出发站代码
+            to_station: 到达站代码
+            bypass_cache: 不使用缓存直接请求
+        """
+        params = dict(self.query_params)
+        params['leftTicketDTO.train_date'] = train_date
+        params['leftTicketDTO.from_station'] = from_station
+        params['leftTicketDTO.to_station'] = to_station
+        return await self._query_async(params, bypass_cache)
+
+    async def _query_async(self, params, bypass_cache):
+        if self.cache is None:
+            return await self._request_async(params)
+
+        key = (self.base_url, tuple(sorted(params.items())))
+        return await self.cache.get(key, lambda: self._request_async(params), bypass=bypass_cache)
+
+    async def ensure_warm_async(self):
+        """引导cookies缺失、过期或上次返回了非JSON页面时访问首页"""
+        reason = self.warm_state.bootstrap_reason(self.session.cookies)
+        if not reason:
+            self.warm_state.mark_skipped()
+            return True
+        self.logger.info("需要访问首页: %s", reason)
+        return await self.visit_homepage_async()
+
+    async def _request_async(self, query_params):
+        """请求余票查询接口"""
         try:
-            # 先访问首页获取cookies
-            if not self.visit_homepage():
+            if not await self.ensure_warm_async():
                 self.logger.warning("访问首页失败，继续尝试直接请求API...")
 
-            self.logger.info(f"请求URL: {self.base_url}")
-            self.logger.info(f"请求参数: {self.query_params}")
+            self.logger.info("请求URL: %s", self.base_url)
+            self.logger.info("请求参数: %s", query_params)
 
-            # 构建完整URL
-            full_url = f"{self.base_url}?{urllib.parse.urlencode(self.query_params)}"
-            self.logger.info(f"完整URL: {full_url}")
+            # 完整URL只用于日志，INFO日志不记录时（如关键窗口内）不拼接
+            if is_enabled_for(self.logger, logging.INFO):
+                self.logger.info("完整URL: %s?%s", self.base_url, urllib.parse.urlencode(query_params))
 
-            response = self.session.get(
+            response = await self.client.get(
                 self.base_url,
-                params=self.query_params,
-                timeout=30,
+                params=query_params,
                 allow_redirects=True
             )
 
-            self.logger.info(f"响应状态码: {response.status_code}")
-            self.logger.info(f"响应Content-Type: {response.headers.get('Content-Type', 'Unknown')}")
-            self.logger.info(f"响应大小: {len(response.content)} bytes")
+            self.logger.info("响应状态码: %s", response.status_code)
+            self.logger.info("响应Content-Type: %s", response.headers.get('Content-Type', 'Unknown'))
+            self.logger.info("响应大小: %s bytes", len(response.content))
 
             if response.status_code == 200:
                 content_type = response.headers.get('Content-Type', '')
@@ -91,34 +157,36 @@ class TrainTicketDebugger:
                         self.logger.info("成功获取JSON响应")
                         return json_data
                     except json.JSONDecodeError as e:
-                        self.logger.error(f"JSON解析失败: {e}")
+                        self.logger.error("JSON解析失败: %s", e)
                         self._debug_response_content(response)
                         return None
                 else:
-                    self.logger.warning(f"返回的不是JSON格式，Content-Type: {content_type}")
+                    self.logger.warning("返回的不是JSON格式，Content-Type: %s", content_type)
                     self.logger.warning("可能被重定向到登录页面或被反爬虫拦截")
                     self._debug_response_content(response)
                     return None
             else:
-                self.logger.error(f"请求失败: {response.status_code}")
-                self.logger.error(f"响应内容: {response.text[:500]}...")
+                self.logger.error("请求失败: %s", response.status_code)
+                self.logger.error("响应内容: %s...", response.text[:500])
                 return None
 
         except requests.exceptions.RequestException as e:
-            self.logger.error(f"请求异常: {e}")
+            self.logger.error("请求异常: %s", e)
             return None
 
     def _debug_response_content(self, response):
         """调试响应内容"""
+        # 多为会话失效或被拦截，下次查询前重新访问首页
+        self.warm_state.mark_stale("上次查询返回了非JSON页面")
         content = response.text
         self.logger.info("响应内容分析:")
-        self.logger.info(f"- 内容长度: {len(content)} 字符")
+        self.logger.info("- 内容长度: %s 字符", len(content))
 
         # 检查是否包含常见的12306页面元素
         if '<title>' in content:
             title_match = re.search(r'<title>(.*?)</title>', content, re.IGNORECASE)
             if title_match:
-                self.logger.info(f"- 页面标题: {title_match.group(1)}")
+                self.logger.info("- 页面标题: %s", title_match.group(1))
 
         if '登录' in content or 'login' in content.lower():
             self.logger.warning("- 检测到登录相关内容，可能需要登录")
@@ -129,56 +197,55 @@ class TrainTicketDebugger:
         if 'script' in content.lower():
             self.logger.info("- 检测到JavaScript代码，这是HTML页面")
 
-        # 保存响应内容到文件以便分析
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        filename = f'response_debug_{timestamp}.html'
-        with open(filename, 'w', encoding='utf-8') as f:
-            f.write(content)
-        self.logger.info(f"- 完整响应已保存到 {filename}")
+        # 保留完整响应以便分析（启用转储时）
+        dumps = self.client.dumps
+        if dumps is not None:
+            dumps.add('response_debug', content, url=response.url, status=response.status_code)
+            self.logger.info("- 完整响应已加入转储缓冲区")
 
         # 记录前500字符到日志
-        self.logger.debug(f"响应内容前500字符: {content[:500]}")
+        self.logger.debug("响应内容前500字符: %s", content[:500])
         if len(content) > 500:
             self.logger.debug("...")
 
     def decode_train_info(self, encoded_string):
         """解码火车信息字符串"""
         try:
-            decoded = urllib.parse.unquote(encoded_string)
-            parts = decoded.split('|')
-
-            if len(parts) >= 35:
-                train_info = {
-                    '列车号': parts[3],
-                    '出发站代码': parts[6],
-                    '到达站代码': parts[7],
-                    '出发时间': parts[8],
-                    '到达时间': parts[9],
-                    '历时': parts[10],
-                    '出发站': self.station_mapping.get(parts[6], parts[6]),
-                    '到达站': self.station_mapping.get(parts[7], parts[7]),
-                    '日期': parts[13],
-                    '商务座': parts[32].split('#')[0] if '#' in parts[32] else parts[32],
-                    '一等座': parts[31].split('#')[0] if '#' in parts[31] else parts[31],
-                    '二等座': parts[30].split('#')[0] if '#' in parts[30] else parts[30],
-                    '硬卧': parts[28].split('#')[0] if '#' in parts[28] else parts[28],
-                    '软卧': parts[23].split('#')[0] if '#' in parts[23] else parts[23],
-                    '硬座': parts[29].split('#')[0] if '#' in parts[29] else parts[29],
-                    '无座': parts[26].split('#')[0] if '#' in parts[26] else parts[26],
-                    # 添加订单提交需要的字段
-                    'train_no': parts[2],  # 车次编号
-                    'leftTicket': parts[12],  # 剩余票信息
-                    'train_location': parts[15] if len(parts) > 15 else '',  # 车次位置信息
-                }
-                return train_info
-            else:
-                self.logger.warning(f"数据格式异常，字段数量: {len(parts)}")
-                return None
-
+            return TrainRecord.from_raw(encoded_string, self.station_index.code_to_name)
+        except ValueError as e:
+            self.logger.warning(str(e))
+            return None
         except Exception as e:
-            self.logger.error(f"解码失败: {e}")
+            self.logger.error("解码失败: %s", e)
             return None
 
+    def iter_trains(self, response_data, train_codes=None, accept=None):
+        """
+        逐条解码查询结果中的车次（生成器）
+
+        按result数组的顺序解码，调用方找到需要的车次后停止迭代即可跳过其余行的解码。
+
+        Args:
+            response_data: leftTicket/query的响应
+            train_codes: 只解码这些车次号，其余行只取出车次号比较，为空时解码全部
+            accept: 原始车次字符串的预筛选函数（如TrainSelector.accepts_raw），返回False的行不解码
+
+        Yields:
+            TrainRecord: 车次记录（跳过解码失败的行）
+        """
+        if not response_data or not response_data.get('status'):
+            return
+        if train_codes is not None:
+            train_codes = frozenset(train_codes)
+        for raw in response_data.get('data', {}).get('result', []):
+            if train_codes is not None and train_code_of(raw) not in train_codes:
+                continue
+            if accept is not None and not accept(raw):
+                continue
+            record = self.decode_train_info(raw)
+            if record is not None:
+                yield record
+
     def parse_response(self, response_data):
         """解析响应数据"""
         if not response_data:
@@ -189,40 +256,36 @@ class TrainTicketDebugger:
 
         if response_data.get('status'):
             data = response_data.get('data', {})
-            results = data.get('result', [])
-
-            self.logger.info(f"查询状态: 成功")
-            self.logger.info(f"找到 {len(results)} 趟列车")
-            self.logger.info(f"站点映射: {data.get('map', {})}")
-
-            for i, result in enumerate(results, 1):
-                self.logger.info(f"\n第 {i} 趟列车:")
-                train_info = self.decode_train_info(result)
-
-                if train_info:
-                    for key, value in train_info.items():
-                        if value and value != '无' and value != '':
-                            self.logger.info(f"  {key}: {value}")
-
-                    # 同时在控制台显示简要信息
-                    seat_status = train_info.get('二等座', '无')
-                    if seat_status == '*':
-                        seat_status = '未开售'
-                    print(f"第{i}趟: {train_info.get('列车号', '')} {train_info.get('出发站', '')}->{train_info.get('到达站', '')} {train_info.get('出发时间', '')}-{train_info.get('到达时间', '')} 二等座:{seat_status}")
-                else:
-                    self.logger.warning(f"  解码失败，原始数据: {result[:100]}...")
+            self.logger.info("查询状态: 成功")
+            self.logger.info("找到 %s 趟列车", len(data.get('result', [])))
+            self.logger.debug("站点映射: %s", data.get('map', {}))
+
+            # 每趟列车的完整字段只在DEBUG级别记录
+            log_fields = self.logger.isEnabledFor(logging.DEBUG)
+            for i, train_info in enumerate(self.iter_trains(response_data), 1):
+                if log_fields:
+                    self.logger.debug("第 %s 趟列车: %s", i, {
+                        key: value for key, value in train_info.items() if value and value != '无'
+                    })
+
+                # 在控制台显示简要信息
+                print(f"第{i}趟: {train_info.get('列车号', '')} {train_info.get('出发站', '')}->{train_info.get('到达站', '')} {train_info.get('出发时间', '')}-{train_info.get('到达时间', '')} 二等座:{train_info.seat_display('二等座')}")
 
         else:
-            self.logger.error(f"查询失败: {response_data.get('messages', '未知错误')}")
+            self.logger.error("查询失败: %s", response_data.get('messages', '未知错误'))
 
     def debug(self):
         """执行调试"""
+        return run_sync(self.debug_async())
+
+    async def debug_async(self):
+        """执行调试（异步）"""
         self.logger.info("开始调试 12306 API...")
-        self.logger.info(f"当前时间: {datetime.now()}")
+        self.logger.info("当前时间: %s", datetime.now())
         print(f"\n正在查询火车票信息...")
         print(f"查询参数: {self.query_params}")
 
-        response_data = self.make_request()
+        response_data = await self.make_request_async()
         self.parse_response(response_data)
 
         return response_data
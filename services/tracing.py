@@ -0,0 +1,295 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+请求耗时追踪模块
+
+为AsyncHttpClient发出的每个请求记录一个Span：步骤名（接口路径最后一段）、接口、
+DNS解析、建立连接（含TLS握手）、首字节、总耗时、收发字节数和结果。
+同一任务的Span收集在一个SpanRecorder中，流程结束后以JSON Lines追加写入文件并打印汇总表。
+
+未启用时客户端上的recorder为None，请求路径只多一次属性判断；
+新建连接时的计时钩子只在当前线程有活动Span时才生效。
+"""
+
+import json
+import math
+import os
+import socket
+import threading
+import time
+from urllib.parse import urlsplit
+
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.exceptions import ConnectTimeoutError
+from urllib3.util.connection import allowed_gai_family
+
+_NS_PER_MS = 1_000_000
+
+# 当前线程正在执行的请求的Span，供连接钩子写入DNS/连接耗时
+_active = threading.local()
+
+
+def current_span():
+    """当前线程正在执行的请求的Span，没有时返回None"""
+    return getattr(_active, 'span', None)
+
+
+class Span:
+    """一次请求的耗时记录"""
+
+    __slots__ = ('job', 'step', 'method', 'endpoint', 'started_at', 'dns_ns', 'connect_ns',
+                 'ttfb_ns', 'total_ns', 'bytes_out', 'bytes_in', 'status', 'outcome')
+
+    def __init__(self, job, step, method, endpoint):
+        self.job = job
+        self.step = step
+        self.method = method
+        self.endpoint = endpoint
+        self.started_at = time.time()
+        # 复用连接时DNS和连接耗时为0
+        self.dns_ns = 0
+        self.connect_ns = 0
+        self.ttfb_ns = 0
+        self.total_ns = 0
+        self.bytes_out = 0
+        self.bytes_in = 0
+        self.status = None
+        # 'ok'、'http_<状态码>' 或异常类名
+        self.outcome = None
+
+    def to_dict(self):
+        return {
+            'job': self.job,
+            'step': self.step,
+            'method': self.method,
+            'endpoint': self.endpoint,
+            'started_at': round(self.started_at, 6),
+            'dns_ms': round(self.dns_ns / _NS_PER_MS, 3),
+            'connect_ms': round(self.connect_ns / _NS_PER_MS, 3),
+            'ttfb_ms': round(self.ttfb_ns / _NS_PER_MS, 3),
+            'total_ms': round(self.total_ns / _NS_PER_MS, 3),
+            'bytes_out': self.bytes_out,
+            'bytes_in': self.bytes_in,
+            'status': self.status,
+            'outcome': self.outcome,
+        }
+
+
+def _request_size(request):
+    """请求行、请求头和请求体的近似字节数"""
+    if request is None:
+        return 0
+    size = len(request.method or '') + len(request.path_url or '') + 12
+    size += sum(len(name) + len(str(value)) + 4 for name, value in request.headers.items())
+    body = request.body
+    if body:
+        size += len(body.encode('utf-8')) if isinstance(body, str) else len(body)
+    return size
+
+
+def _response_size(response):
+    """已从网络读取的响应体字节数（压缩前），流式响应只统计到响应头为止"""
+    raw = getattr(response, 'raw', None)
+    try:
+        return raw.tell() if raw is not None else 0
+    except (AttributeError, OSError, ValueError):
+        return 0
+
+
+class SpanRecorder:
+    """
+    一个任务的Span集合
+
+    用法:
+        client.recorder = SpanRecorder(job='张三-春运')
+        ...  # 执行订票流程
+        client.recorder.flush('spans.jsonl')
+    """
+
+    def __init__(self, job=None):
+        """
+        Args:
+            job: 任务名称，写入每个Span
+        """
+        self.job = job
+        self.spans = []
+        self._lock = threading.Lock()
+
+    def request(self, session, method, url, **kwargs):
+        """
+        发送请求并记录Span（阻塞，在线程池中执行）
+
+        参数与requests.Session.request相同。
+        """
+        path = urlsplit(url).path
+        span = Span(self.job, path.rstrip('/').rsplit('/', 1)[-1] or '/', method, path)
+        _active.span = span
+        start = time.perf_counter_ns()
+        try:
+            response = session.request(method, url, **kwargs)
+        except Exception as e:
+            span.total_ns = time.perf_counter_ns() - start
+            span.outcome = type(e).__name__
+            raise
+        finally:
+            _active.span = None
+            with self._lock:
+                self.spans.append(span)
+
+        span.total_ns = time.perf_counter_ns() - start
+        # requests在读取响应体之前计算elapsed，即从发送到收到响应头
+        span.ttfb_ns = int(response.elapsed.total_seconds() * 1_000_000_000)
+        span.bytes_out = _request_size(response.request)
+        span.bytes_in = _response_size(response)
+        span.status = response.status_code
+        span.outcome = 'ok' if response.status_code < 400 else f'http_{response.status_code}'
+        return response
+
+    def summary(self):
+        """
+        按步骤汇总
+
+        Returns:
+            list: [{'step', 'count', 'p50_ms', 'p95_ms', 'connect_ms', 'bytes_in', 'bytes_out', 'errors'}]
+        """
+        with self._lock:
+            spans = list(self.spans)
+
+        groups = {}
+        for span in spans:
+            groups.setdefault(span.step, []).append(span)
+
+        rows = []
+        for step, items in groups.items():
+            totals = sorted(span.total_ns for span in items)
+            rows.append({
+                'step': step,
+                'count': len(items),
+                'p50_ms': round(_percentile(totals, 50) / _NS_PER_MS, 2),
+                'p95_ms': round(_percentile(totals, 95) / _NS_PER_MS, 2),
+                'connect_ms': round(sum(span.dns_ns + span.connect_ns for span in items) / _NS_PER_MS, 2),
+                'bytes_in': sum(span.bytes_in for span in items),
+                'bytes_out': sum(span.bytes_out for span in items),
+                'errors': sum(1 for span in items if span.outcome != 'ok'),
+            })
+        return rows
+
+    def print_summary(self):
+        """打印汇总表（按首次出现的顺序）"""
+        rows = self.summary()
+        if not rows:
+            return
+        title = f"请求耗时汇总 - {self.job}" if self.job else "请求耗时汇总"
+        print(f"\n{title}")
+        print(f"{'步骤':<26}{'次数':>6}{'p50(ms)':>10}{'p95(ms)':>10}{'建连(ms)':>10}"
+              f"{'收(B)':>10}{'发(B)':>10}{'失败':>6}")
+        print("-" * 88)
+        for row in rows:
+            print(f"{row['step']:<26}{row['count']:>6}{row['p50_ms']:>10.2f}{row['p95_ms']:>10.2f}"
+                  f"{row['connect_ms']:>10.2f}{row['bytes_in']:>10}{row['bytes_out']:>10}{row['errors']:>6}")
+        print("-" * 88)
+
+    def flush(self, path=None, summary=True):
+        """
+        写出并清空已收集的Span
+
+        Args:
+            path: JSON Lines文件（追加写入），None表示不写文件
+            summary: 是否打印汇总表
+
+        Returns:
+            int: 写出的Span数
+        """
+        if summary:
+            self.print_summary()
+        with self._lock:
+            spans, self.spans = self.spans, []
+        if path and spans:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(path, 'a', encoding='utf-8') as f:
+                for span in spans:
+                    f.write(json.dumps(span.to_dict(), ensure_ascii=False) + '\n')
+        return len(spans)
+
+
+def _percentile(ordered, pct):
+    """最近秩法百分位数，ordered需已排序"""
+    if not ordered:
+        return 0
+    return ordered[max(1, math.ceil(pct / 100 * len(ordered))) - 1]
+
+
+class _TimedConnectionMixin:
+    """新建连接时把DNS解析和建连耗时写入当前Span"""
+
+    def connect(self):
+        span = current_span()
+        if span is None:
+            return super().connect()
+        start = time.perf_counter_ns()
+        try:
+            return super().connect()
+        finally:
+            span.connect_ns = time.perf_counter_ns() - start - span.dns_ns
+
+    def _new_conn(self):
+        span = current_span()
+        if span is None:
+            return super()._new_conn()
+
+        # 单独计时DNS解析，再按解析结果的顺序逐个地址建连，某个地址连不上时换下一个，
+        # 与urllib3自己解析时的行为一致（TLS仍按原主机名校验证书）
+        dns_host = self._dns_host
+        start = time.perf_counter_ns()
+        try:
+            infos = socket.getaddrinfo(dns_host.strip('[]'), self.port, allowed_gai_family(), socket.SOCK_STREAM)
+        except OSError:
+            infos = None
+        span.dns_ns = time.perf_counter_ns() - start
+
+        if not infos:
+            return super()._new_conn()
+        addresses = list(dict.fromkeys(info[4][0] for info in infos))
+        try:
+            for index, address in enumerate(addresses):
+                self._dns_host = address
+                try:
+                    return super()._new_conn()
+                except ConnectTimeoutError:
+                    # NewConnectionError也是其子类；最后一个地址仍失败时抛出
+                    if index == len(addresses) - 1:
+                        raise
+        finally:
+            self._dns_host = dns_host
+
+
+class TimedHTTPConnection(_TimedConnectionMixin, HTTPConnection):
+    pass
+
+
+class TimedHTTPSConnection(_TimedConnectionMixin, HTTPSConnection):
+    pass
+
+
+class _TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = TimedHTTPConnection
+
+
+class _TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = TimedHTTPSConnection
+
+
+class TimingAdapter(HTTPAdapter):
+    """新建连接时记录DNS和建连耗时的HTTPAdapter，没有活动Span时与HTTPAdapter相同"""
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            'http': _TimedHTTPConnectionPool,
+            'https': _TimedHTTPSConnectionPool,
+        }
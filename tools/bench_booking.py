@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+订票关键路径延迟基准测试
+
+在本地替身服务器上重复执行完整的 查询→提交→排队→轮询 流程，
+统计每个步骤和整体的p50/p95/p99延迟。设置 --max-p95 后可作为
+热路径改动的回归门槛：总耗时p95超出预算时以非零状态退出。
+默认保留THROTTLE_CONFIG的请求限速与熔断；未注入失败时任何一类接口熔断也以非零状态退出
+（正常的initDc→提交→确认流程不应被判为过载）。
+
+用法:
+    python -m tools.bench_booking --runs 20 --latency 0.02
+    python -m tools.bench_booking --runs 50 --max-p95 1.5 --json bench.json
+    python -m tools.bench_booking --runs 10 --trace spans.jsonl
+    python -m tools.bench_booking --runs 10 --queue-time 2.5
+    python -m tools.bench_booking --runs 20 --no-throttle
+"""
+
+import argparse
+import contextlib
+import functools
+import io
+import json
+import logging
+import math
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tools.stub_server import StubServer, StubConfig
+
+# (步骤名, 服务属性名, 方法名)，按流程顺序排列
+BOOKING_STEPS = [
+    ('query', None, 'iter_available_trains'),
+    ('check_login', 'auth_service', 'check_login_status'),
+    ('submit', 'order_submit_service', 'submit_order_request'),
+    ('passengers', 'order_query_service', 'get_passengers'),
+    ('login_user', 'auth_service', 'get_login_user_name'),
+    ('check_order', 'order_submit_service', 'check_order_info'),
+    ('queue_count', 'order_query_service', 'get_queue_count'),
+    ('confirm', 'order_submit_service', 'confirm_order_queue'),
+    ('poll', 'order_submit_service', 'poll_order_status'),
+]
+
+
+def percentile(values, pct):
+    """计算百分位数（最近秩法）"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def _instrument(manager, timings):
+    """包装流程中各步骤的方法，记录耗时"""
+    for step, service_name, method_name in BOOKING_STEPS:
+        owner = getattr(manager, service_name) if service_name else manager
+        method = getattr(owner, method_name)
+
+        @functools.wraps(method)
+        def timed(*args, _method=method, _step=step, **kwargs):
+            start = time.perf_counter()
+            try:
+                return _method(*args, **kwargs)
+            finally:
+                timings.setdefault(_step, []).append(time.perf_counter() - start)
+
+        setattr(owner, method_name, timed)
+
+
+def run_benchmark(runs=20, config=None, train_index=0, seat_type='二等座', trace_file=None, throttle=True):
+    """
+    执行基准测试
+
+    Args:
+        runs: 执行次数
+        config: 替身服务器配置
+        train_index: 目标车次在查询结果中的序号
+        seat_type: 座位类型
+        trace_file: 请求耗时追踪文件（JSON Lines），None表示不追踪
+        throttle: 是否保留THROTTLE_CONFIG的请求限速与熔断（默认保留，测量实际发布的配置）
+
+    Returns:
+        dict: {'steps': {步骤名: [耗时]}, 'total': [耗时], 'failures': 失败次数, 'requests': 请求计数,
+               'polls': [每次订票的轮询次数], 'notice_lag': [订单完成到察觉的秒数],
+               'warm': 首页访问/跳过次数, 'breaker_trips': {类别: 熔断次数}}
+    """
+    # 基准测试只关心延迟，关闭日志输出
+    logging.basicConfig(level=logging.CRITICAL)
+
+    from main import TrainOrderManager
+
+    timings = {}
+    totals = []
+    failures = 0
+    polls = []
+    notice_lag = []
+
+    with StubServer(config) as server:
+        manager = TrainOrderManager(base_url=server.base_url, trace_file=trace_file,
+                                    restore_session=False)
+        manager.session.cookies.set('tk', 'stub-apptk')
+        if not throttle:
+            manager.client.throttle = None
+        _instrument(manager, timings)
+
+        for _ in range(runs):
+            start = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                success = manager._execute_booking_flow(
+                    'BJP', 'SHH', '2026-01-01', '北京', '上海',
+                    trains=[f'G{train_index + 1}'], seat_types=[seat_type], interactive=False
+                )
+            elapsed = time.perf_counter() - start
+
+            if success:
+                totals.append(elapsed)
+            else:
+                failures += 1
+
+            stats = manager.order_submit_service.last_poll_stats
+            if stats is not None and stats.finished_at is not None:
+                polls.append(stats.polls)
+                # 替身服务器按queue_time排队时记录了订单的实际完成时刻（同一进程的单调时钟）
+                finished = server.finished_orders
+                if len(finished) > len(notice_lag):
+                    notice_lag.append(stats.finished_at - finished[-1])
+
+        request_counts = server.request_counts
+        warm = manager.ticket_debugger.warm_state.stats()
+        breaker_trips = {}
+        if manager.client.throttle is not None:
+            breaker_trips = {name: breaker.trips for name, breaker in manager.client.throttle.breakers.items()
+                             if breaker.trips}
+
+    return {'steps': timings, 'total': totals, 'failures': failures, 'requests': request_counts,
+            'polls': polls, 'notice_lag': notice_lag, 'warm': warm, 'breaker_trips': breaker_trips}
+
+
+def summarize(result):
+    """汇总每个步骤和总耗时的百分位数（毫秒）"""
+    rows = []
+    names = [step for step, _, _ in BOOKING_STEPS if step in result['steps']]
+    for name in names + ['total']:
+        values = result['total'] if name == 'total' else result['steps'][name]
+        rows.append({
+            'step': name,
+            'count': len(values),
+            'p50_ms': round(percentile(values, 50) * 1000, 2),
+            'p95_ms': round(percentile(values, 95) * 1000, 2),
+            'p99_ms': round(percentile(values, 99) * 1000, 2),
+        })
+    return rows
+
+
+def summarize_polling(result):
+    """汇总订单状态轮询：轮询次数和订单完成到察觉的延迟（毫秒）"""
+    lag = result['notice_lag']
+    return {
+        'polls_p50': percentile(result['polls'], 50),
+        'polls_max': max(result['polls'], default=0),
+        'notice_lag_p50_ms': round(percentile(lag, 50) * 1000, 2),
+        'notice_lag_p95_ms': round(percentile(lag, 95) * 1000, 2),
+        'notice_lag_count': len(lag),
+    }
+
+
+def print_summary(rows, failures):
+    """打印汇总表"""
+    print(f"{'步骤':<14}{'次数':>6}{'p50(ms)':>12}{'p95(ms)':>12}{'p99(ms)':>12}")
+    print("-" * 56)
+    for row in rows:
+        print(f"{row['step']:<14}{row['count']:>6}{row['p50_ms']:>12.2f}{row['p95_ms']:>12.2f}{row['p99_ms']:>12.2f}")
+    print("-" * 56)
+    print(f"失败次数: {failures}")
+
+
+def main():
+    """命令行入口"""
+    parser = argparse.ArgumentParser(description='订票关键路径延迟基准测试')
+    parser.add_argument('--runs', type=int, default=20, help='执行次数')
+    parser.add_argument('--latency', type=float, default=0.0, help='替身服务器接口延迟（秒）')
+    parser.add_argument('--jitter', type=float, default=0.0, help='延迟随机抖动上限（秒）')
+    parser.add_argument('--failure-rate', type=float, default=0.0, help='失败注入概率')
+    parser.add_argument('--queue-polls', type=int, default=0, help='订单完成前的排队轮询次数')
+    parser.add_argument('--queue-time', type=float, default=0.0,
+                        help='订单提交后多少秒完成（大于0时代替--queue-polls，统计完成到察觉的延迟）')
+    parser.add_argument('--trains', type=int, default=20, help='查询返回的车次数量')
+    parser.add_argument('--json', dest='json_path', help='将结果写入JSON文件')
+    parser.add_argument('--trace', metavar='FILE', help='记录每个请求的耗时（JSON Lines）')
+    parser.add_argument('--no-throttle', dest='throttle', action='store_false',
+                        help='关闭请求限速与熔断，只测量代码路径本身的延迟')
+    parser.add_argument('--max-p95', type=float, help='总耗时p95预算（秒），超出时返回非零状态')
+    args = parser.parse_args()
+
+    config = StubConfig(
+        latency=args.latency,
+        jitter=args.jitter,
+        failure_rate=args.failure_rate,
+        queue_polls=args.queue_polls,
+        queue_time=args.queue_time,
+        train_count=args.trains
+    )
+    result = run_benchmark(args.runs, config, trace_file=args.trace, throttle=args.throttle)
+    rows = summarize(result)
+    print_summary(rows, result['failures'])
+    print(f"首页访问: {result['warm']['visits']} 次，跳过 {result['warm']['skipped']} 次")
+    if result['breaker_trips']:
+        # 替身服务器正常响应时不应熔断，熔断说明过载判断把正常响应当成了过载
+        print(f"熔断: {result['breaker_trips']}")
+    polling = summarize_polling(result)
+    if polling['notice_lag_count']:
+        print(f"订单轮询: 次数p50 {polling['polls_p50']}，最多 {polling['polls_max']}；"
+              f"完成到察觉 p50 {polling['notice_lag_p50_ms']:.2f}ms，p95 {polling['notice_lag_p95_ms']:.2f}ms")
+
+    if args.json_path:
+        with open(args.json_path, 'w', encoding='utf-8') as f:
+            json.dump({'summary': rows, 'failures': result['failures'], 'requests': result['requests'],
+                       'polling': polling, 'warm': result['warm'], 'breaker_trips': result['breaker_trips']},
+                      f, ensure_ascii=False, indent=2)
+
+    if result['breaker_trips'] and not args.failure_rate:
+        return 1
+    if args.max_p95 is not None:
+        total_p95 = percentile(result['total'], 95)
+        if not result['total'] or total_p95 > args.max_p95:
+            print(f"总耗时p95 {total_p95:.3f}s 超出预算 {args.max_p95:.3f}s")
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+日志调用开销测量
+
+以订票过程中典型的日志调用（记录一个接口响应字典）为例，比较同步handler、
+队列模式和关键窗口下每次调用在调用方线程上的耗时，以及f-string与%风格的差别。
+
+用法:
+    python -m tools.bench_logging --calls 20000
+"""
+
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tools.bench_booking import percentile
+from utils import logger as log_utils
+
+# 与confirmSingleForQueue响应大小相当的字典
+SAMPLE_RESULT = {
+    'validateMessagesShowId': '_validatorMessage',
+    'status': True,
+    'httpstatus': 200,
+    'data': {'isAsync': '1', 'submitStatus': True},
+    'messages': [],
+    'validateMessages': {},
+}
+
+
+def _reset_logging():
+    log_utils.stop_logging()
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+        handler.close()
+
+
+def _measure(calls, lazy):
+    """逐次计时，返回每次调用的耗时（ns）"""
+    logger = logging.getLogger('12306')
+    result = SAMPLE_RESULT
+    clock = time.perf_counter_ns
+    durations = []
+    for _ in range(calls):
+        start = clock()
+        if lazy:
+            logger.info("confirmSingleForQueue响应: %s", result)
+        else:
+            logger.info(f"confirmSingleForQueue响应: {result}")
+        durations.append(clock() - start)
+    return durations
+
+
+def run(calls):
+    """
+    依次测量各模式
+
+    Returns:
+        list: [(模式, [每次调用耗时ns])]
+    """
+    rows = []
+    log_file = os.path.join(tempfile.mkdtemp(prefix='12306-log-'), 'bench.log')
+    stderr = sys.stderr
+    with open(os.devnull, 'w', encoding='utf-8') as devnull:
+        # 控制台输出丢弃，只测调用方开销
+        sys.stderr = devnull
+        try:
+            for use_queue in (False, True):
+                _reset_logging()
+                log_utils.setup_logging(log_file, use_queue=use_queue)
+                mode = '队列' if use_queue else '同步'
+                rows.append((f'{mode} f-string', _measure(calls, lazy=False)))
+                rows.append((f'{mode} %风格', _measure(calls, lazy=True)))
+
+                with log_utils.critical_window():
+                    rows.append((f'{mode} 关键窗口 f-string', _measure(calls, lazy=False)))
+                    rows.append((f'{mode} 关键窗口 %风格', _measure(calls, lazy=True)))
+            _reset_logging()
+        finally:
+            sys.stderr = stderr
+    return rows
+
+
+def main():
+    """命令行入口"""
+    parser = argparse.ArgumentParser(description='日志调用开销测量')
+    parser.add_argument('--calls', type=int, default=20000, help='每种模式的调用次数')
+    args = parser.parse_args()
+
+    rows = run(args.calls)
+    # 队列模式下后台线程与调用方争用GIL，逐次计时的p50反映调用方线程上的开销
+    print(f"{'模式':<24}{'p50(us)':>10}{'p99(us)':>10}")
+    print("-" * 44)
+    for name, durations in rows:
+        print(f"{name:<24}{percentile(durations, 50) / 1000:>10.2f}{percentile(durations, 99) / 1000:>10.2f}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+余票查询结果解码耗时测量
+
+用合成的leftTicket/query响应（默认5000行）比较：全部解码为车次列表，与逐条解码、
+找到目标车次即停止的流式选择（目标位于首行/中间/末行，以及不按车次号预过滤时）。
+
+用法:
+    python -m tools.bench_parse --rows 5000 --repeat 50
+"""
+
+import argparse
+import logging
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from main import TrainOrderManager
+from models import TrainRecordList
+from services import AsyncHttpClient, TrainTicketDebugger
+from tools.bench_booking import percentile
+from tools.stub_server import build_train_row, DEFAULT_FROM_STATION, DEFAULT_TO_STATION
+from utils import StationIndex
+
+SEAT_TYPES = ['二等座', '一等座']
+
+
+def build_response(rows):
+    """生成含rows行车次的查询响应"""
+    return {
+        'status': True,
+        'httpstatus': 200,
+        'data': {
+            'result': [build_train_row(index) for index in range(rows)],
+            'flag': '1',
+            'map': {DEFAULT_FROM_STATION: '北京', DEFAULT_TO_STATION: '上海'},
+        },
+    }
+
+
+def _create_debugger():
+    index = StationIndex.from_mapping({'北京': DEFAULT_FROM_STATION, '上海': DEFAULT_TO_STATION})
+    logger = logging.getLogger('bench_parse')
+    logger.addHandler(logging.NullHandler())
+    logger.propagate = False
+    return TrainTicketDebugger(client=AsyncHttpClient(), station_index=index, logger=logger)
+
+
+def _measure(repeat, func):
+    """重复执行func，返回每次耗时（秒）"""
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        durations.append(time.perf_counter() - start)
+    return durations
+
+
+def run(rows, repeat):
+    """
+    依次测量各场景
+
+    Returns:
+        list: [(场景, [每次耗时秒])]
+    """
+    debugger = _create_debugger()
+    response = build_response(rows)
+    select = TrainOrderManager._select_candidate_train
+
+    def full_list():
+        return TrainRecordList(debugger.iter_trains(response))
+
+    def streamed(position, prefilter=True):
+        code = f'G{position + 1}'
+
+        def pick():
+            records = debugger.iter_trains(response, [code] if prefilter else None)
+            train, _ = select(records, [code], SEAT_TYPES)
+            assert train is not None and train.train_code == code
+        return pick
+
+    middle = rows // 2
+    scenarios = [
+        ('全部解码为列表', full_list),
+        ('流式 目标在首行', streamed(0)),
+        (f'流式 目标在第{middle + 1}行', streamed(middle)),
+        (f'流式 目标在第{rows}行', streamed(rows - 1)),
+        (f'流式 第{middle + 1}行 不预过滤', streamed(middle, prefilter=False)),
+    ]
+    return [(name, _measure(repeat, func)) for name, func in scenarios]
+
+
+def main():
+    """命令行入口"""
+    parser = argparse.ArgumentParser(description='余票查询结果解码耗时测量')
+    parser.add_argument('--rows', type=int, default=5000, help='合成响应的车次行数')
+    parser.add_argument('--repeat', type=int, default=50, help='每个场景的执行次数')
+    args = parser.parse_args()
+
+    rows = run(max(1, args.rows), max(1, args.repeat))
+    print(f"{'场景':<28}{'p50(ms)':>10}{'p95(ms)':>10}")
+    print("-" * 48)
+    for name, durations in rows:
+        print(f"{name:<28}{percentile(durations, 50) * 1000:>10.3f}{percentile(durations, 95) * 1000:>10.3f}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
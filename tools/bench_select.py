@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+车次选择规则耗时测量
+
+用合成的查询结果（默认500趟车次，已解码）测量：编译规则、直接对全部车次选出最优N个，
+以及先按出发时刻建立索引、只在出发时段内选择（索引建立一次，可供多条规则复用）。
+另外比较订票流程中从原始查询响应逐条解码并选择时，按规则预筛选原始行（不满足条件的行不解码）的效果。
+
+用法:
+    python -m tools.bench_select --rows 500 --repeat 2000 --limit 3
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models import DepartureIndex, SelectionRule, TrainRecord
+from tools.bench_booking import percentile
+from tools.bench_parse import build_response, _create_debugger
+from tools.stub_server import build_train_row
+
+RULES = {
+    '不限时段': dict(),
+    '出发07:00-12:00 历时06:00': dict(depart='07:00-12:00', max_duration='06:00'),
+    '出发22:00-02:00 按历时': dict(depart='22:00-02:00', order_by='duration'),
+}
+
+
+def _measure(repeat, func):
+    """重复执行func，返回每次耗时（秒）"""
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        durations.append(time.perf_counter() - start)
+    return durations
+
+
+def run(rows, repeat, limit):
+    """
+    依次测量各规则
+
+    Returns:
+        list: [(场景, [每次耗时秒])]
+    """
+    records = [TrainRecord.from_raw(build_train_row(index)) for index in range(rows)]
+    results = [('建立出发时刻索引', _measure(max(1, repeat // 10), lambda: DepartureIndex(records)))]
+    index = DepartureIndex(records)
+    for name, spec in RULES.items():
+        rule = SelectionRule(seat_types=['二等座', '一等座'], min_seats=2, **spec)
+        selector = rule.compile()
+        assert selector.best(records, limit) == index.best(selector, limit)
+        results.append((f'{name} 编译', _measure(repeat, rule.compile)))
+        results.append((f'{name} 全部车次', _measure(repeat, lambda: selector.best(records, limit))))
+        results.append((f'{name} 按索引', _measure(repeat, lambda: index.best(selector, limit))))
+
+    # 从原始响应解码并选择
+    debugger = _create_debugger()
+    response = build_response(rows)
+    selector = SelectionRule(seat_types=['二等座', '一等座'], min_seats=2,
+                             **RULES['出发07:00-12:00 历时06:00']).compile()
+    decode_repeat = max(1, repeat // 20)
+    results.append(('解码后选择', _measure(
+        decode_repeat, lambda: selector.best(debugger.iter_trains(response), limit))))
+    results.append(('预筛选原始行后解码并选择', _measure(
+        decode_repeat, lambda: selector.best(debugger.iter_trains(response, accept=selector.accepts_raw), limit))))
+    return results
+
+
+def main():
+    """命令行入口"""
+    parser = argparse.ArgumentParser(description='车次选择规则耗时测量')
+    parser.add_argument('--rows', type=int, default=500, help='合成的车次数')
+    parser.add_argument('--repeat', type=int, default=2000, help='每个场景的执行次数')
+    parser.add_argument('--limit', type=int, default=3, help='选出的候选车次数')
+    args = parser.parse_args()
+
+    rows = run(max(1, args.rows), max(1, args.repeat), max(1, args.limit))
+    print(f"{'场景':<36}{'p50(us)':>10}{'p95(us)':>10}")
+    print("-" * 56)
+    for name, durations in rows:
+        print(f"{name:<36}{percentile(durations, 50) * 1e6:>10.1f}{percentile(durations, 95) * 1e6:>10.1f}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+启动导入耗时基准测试
+
+在子进程中以 python -X importtime 重复导入入口模块，统计入口模块的累计导入耗时、
+进程从启动到导入完成的总耗时，以及累计耗时最多的模块。设置 --budget-ms 后可作为
+启动路径改动的回归门槛：入口模块导入耗时的中位数超出预算，或导入了应按需加载的模块
+（--lazy，默认 requests、gmssl、sqlite3 等）时以非零状态退出。
+
+用法:
+    python -m tools.bench_startup --runs 10
+    python -m tools.bench_startup --runs 10 --budget-ms 60 --json startup.json
+    python -m tools.bench_startup --module services.ticket_debugger --lazy gmssl,sqlite3
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 启动时不应导入、应在首次使用时才加载的模块
+DEFAULT_LAZY_MODULES = ('requests', 'gmssl', 'sqlite3', 'numpy', 'utils.station_mapping', 'services.auth_service')
+
+
+def parse_importtime(stderr):
+    """
+    解析 -X importtime 的输出
+
+    Returns:
+        dict: {模块名: (自身耗时us, 累计耗时us)}，同名模块取第一次出现
+    """
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        parts = line[len('import time:'):].split('|')
+        if len(parts) != 3:
+            continue
+        try:
+            self_us, cumulative_us = int(parts[0]), int(parts[1])
+        except ValueError:
+            # 表头行
+            continue
+        modules.setdefault(parts[2].strip(), (self_us, cumulative_us))
+    return modules
+
+
+def measure_once(module):
+    """
+    在新进程中导入一次模块
+
+    Returns:
+        tuple: (进程耗时秒, {模块名: (自身耗时us, 累计耗时us)})
+    """
+    start = time.perf_counter()
+    completed = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=ROOT, capture_output=True, text=True
+    )
+    elapsed = time.perf_counter() - start
+    if completed.returncode != 0:
+        raise RuntimeError(f"导入 {module} 失败:\n{completed.stderr[-2000:]}")
+    return elapsed, parse_importtime(completed.stderr)
+
+
+def run_benchmark(module, runs):
+    """
+    重复测量导入耗时（先导入一次预热，确保.pyc已生成）
+
+    Returns:
+        dict: 每次的进程耗时、入口模块累计耗时，以及各模块累计耗时的中位数
+    """
+    measure_once(module)
+    process_s = []
+    module_ms = []
+    cumulative = {}
+    imported = set()
+    for _ in range(runs):
+        elapsed, modules = measure_once(module)
+        process_s.append(elapsed)
+        module_ms.append(modules.get(module, (0, 0))[1] / 1000)
+        imported.update(modules)
+        for name, (_, cumulative_us) in modules.items():
+            cumulative.setdefault(name, []).append(cumulative_us / 1000)
+    return {
+        'module': module,
+        'process_ms': [value * 1000 for value in process_s],
+        'module_ms': module_ms,
+        'cumulative_ms': {name: statistics.median(values) for name, values in cumulative.items()},
+        'imported': sorted(imported),
+    }
+
+
+def print_summary(result, top, lazy_imported):
+    """打印汇总"""
+    module_ms = result['module_ms']
+    process_ms = result['process_ms']
+    print(f"\n导入 {result['module']}（{len(module_ms)} 次）")
+    print(f"  模块导入累计耗时: 中位数 {statistics.median(module_ms):.1f}ms，最大 {max(module_ms):.1f}ms")
+    print(f"  进程启动到导入完成: 中位数 {statistics.median(process_ms):.1f}ms，最大 {max(process_ms):.1f}ms")
+
+    print(f"\n累计耗时最多的模块（前{top}个）:")
+    print(f"{'模块':<40}{'累计(ms)':>10}")
+    print('-' * 50)
+    ranked = sorted(result['cumulative_ms'].items(), key=lambda item: item[1], reverse=True)
+    for name, value in ranked[:top]:
+        print(f"{name:<40}{value:>10.2f}")
+    print('-' * 50)
+
+    if lazy_imported:
+        print(f"启动时导入了应按需加载的模块: {', '.join(lazy_imported)}")
+
+
+def main():
+    """命令行入口"""
+    parser = argparse.ArgumentParser(description='启动导入耗时基准测试')
+    parser.add_argument('--module', default='main', help='入口模块')
+    parser.add_argument('--runs', type=int, default=10, help='测量次数')
+    parser.add_argument('--top', type=int, default=15, help='列出累计耗时最多的模块数')
+    parser.add_argument('--lazy', default=','.join(DEFAULT_LAZY_MODULES),
+                        help='启动时不应导入的模块（逗号分隔，空字符串表示不检查）')
+    parser.add_argument('--json', dest='json_path', help='将结果写入JSON文件')
+    parser.add_argument('--budget-ms', type=float, help='入口模块导入耗时中位数的预算（毫秒），超出时返回非零状态')
+    args = parser.parse_args()
+
+    result = run_benchmark(args.module, max(1, args.runs))
+    lazy_modules = [name.strip() for name in args.lazy.split(',') if name.strip()]
+    lazy_imported = [name for name in lazy_modules if name in result['imported']]
+    print_summary(result, args.top, lazy_imported)
+
+    if args.json_path:
+        with open(args.json_path, 'w', encoding='utf-8') as f:
+            json.dump({
+                'module': result['module'],
+                'module_ms': result['module_ms'],
+                'process_ms': result['process_ms'],
+                'cumulative_ms': result['cumulative_ms'],
+                'lazy_imported': lazy_imported,
+            }, f, ensure_ascii=False, indent=2)
+
+    status = 1 if lazy_imported else 0
+    if args.budget_ms is not None:
+        median_ms = statistics.median(result['module_ms'])
+        if median_ms > args.budget_ms:
+            print(f"导入耗时中位数 {median_ms:.1f}ms 超出预算 {args.budget_ms:.1f}ms")
+            status = 1
+    return status
+
+
+if __name__ == '__main__':
+    sys.exit(main())
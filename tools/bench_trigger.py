@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+开售触发偏差测量
+
+重复创建在若干毫秒后触发的SaleTrigger，统计实际触发时刻相对截止时间的偏差；
+也可以汇总抢票时写入的触发记录文件。
+
+用法:
+    python -m tools.bench_trigger --runs 50 --delay 0.3
+    python -m tools.bench_trigger --spin-ms 0 --fine-step-ms 1000
+    python -m tools.bench_trigger --records trigger_records.jsonl
+"""
+
+import argparse
+import logging
+import os
+import sys
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tools.bench_booking import percentile
+from utils.sale_trigger import (
+    SaleTrigger, load_trigger_records,
+    DEFAULT_COARSE_MS, DEFAULT_FINE_STEP_MS, DEFAULT_SPIN_MS
+)
+
+
+def measure(runs, delay, coarse_ms=DEFAULT_COARSE_MS, fine_step_ms=DEFAULT_FINE_STEP_MS,
+            spin_ms=DEFAULT_SPIN_MS):
+    """
+    测量触发偏差
+
+    Returns:
+        list: 每次触发的偏差（微秒）
+    """
+    offsets = []
+    for _ in range(runs):
+        target = datetime.now() + timedelta(seconds=delay)
+        trigger = SaleTrigger.at(target, coarse_ms=coarse_ms, fine_step_ms=fine_step_ms, spin_ms=spin_ms)
+        record = trigger.wait()
+        offsets.append(record.offset_ns / 1000)
+    return offsets
+
+
+def print_offsets(offsets):
+    """打印偏差分布"""
+    print(f"{'次数':<8}{'p50(us)':>12}{'p95(us)':>12}{'p99(us)':>12}{'max(us)':>12}")
+    print("-" * 56)
+    print(f"{len(offsets):<8}{percentile(offsets, 50):>12.1f}{percentile(offsets, 95):>12.1f}"
+          f"{percentile(offsets, 99):>12.1f}{max(offsets, default=0.0):>12.1f}")
+
+
+def main():
+    """命令行入口"""
+    parser = argparse.ArgumentParser(description='开售触发偏差测量')
+    parser.add_argument('--runs', type=int, default=20, help='触发次数')
+    parser.add_argument('--delay', type=float, default=0.3, help='每次触发距创建的时间（秒）')
+    parser.add_argument('--coarse-ms', type=float, default=DEFAULT_COARSE_MS, help='粗粒度睡眠窗口（毫秒）')
+    parser.add_argument('--fine-step-ms', type=float, default=DEFAULT_FINE_STEP_MS, help='细粒度单次睡眠上限（毫秒）')
+    parser.add_argument('--spin-ms', type=float, default=DEFAULT_SPIN_MS, help='忙等窗口（毫秒）')
+    parser.add_argument('--records', help='汇总触发记录文件而不是重新测量')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.CRITICAL)
+
+    if args.records:
+        offsets = [record['offset_us'] for record in load_trigger_records(args.records)]
+        if not offsets:
+            print(f"{args.records} 中没有触发记录")
+            return 1
+    else:
+        offsets = measure(args.runs, args.delay, args.coarse_ms, args.fine_step_ms, args.spin_ms)
+
+    print_offsets(offsets)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
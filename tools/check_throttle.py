@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+请求限速与熔断的过载判断检查
+
+在本地替身服务器上用默认配置的RequestThrottle执行下单流程中的请求序列：
+连续多次获取确认乘客页面（initDc，流式读取的HTML页面，每笔订单或token补取时各一次），
+随后提交订单确认（confirmSingleForQueue）。正常响应不应被判为过载，
+任何一类接口熔断或确认请求被CircuitOpenError拦下时以非零状态退出。
+
+用法:
+    python -m tools.check_throttle --repeat 5
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tools.stub_server import StubServer, StubConfig
+
+
+async def _order_sequence(client, query_service, repeat):
+    """按下单流程的顺序发出请求，返回confirmSingleForQueue的响应"""
+    for _ in range(repeat):
+        # 每笔新订单都重新获取token，与OrderSubmitService.submit_order_request_async一致
+        query_service.context.start_order()
+        await query_service.get_repeat_submit_token_async()
+    url = client.url('/otn/confirmPassenger/confirmSingleForQueue')
+    return await client.post(url, data={'REPEAT_SUBMIT_TOKEN': query_service.context.repeat_submit_token or ''})
+
+
+def run(repeat):
+    """
+    执行检查
+
+    Returns:
+        tuple: (是否通过, 说明)
+    """
+    logging.basicConfig(level=logging.CRITICAL)
+
+    from services import AsyncHttpClient, CircuitOpenError, OrderQueryService, RequestThrottle
+
+    with StubServer(StubConfig()) as server:
+        client = AsyncHttpClient(base_url=server.base_url)
+        client.throttle = throttle = RequestThrottle()
+        query_service = OrderQueryService(client=client)
+        try:
+            response = asyncio.run(_order_sequence(client, query_service, repeat))
+        except CircuitOpenError as e:
+            return False, f"确认请求被熔断拦下: {e}"
+
+    tripped = {name: breaker.trips for name, breaker in throttle.breakers.items() if breaker.trips}
+    if tripped:
+        return False, f"正常响应触发了熔断: {tripped}"
+    if response.status_code != 200:
+        return False, f"确认请求HTTP错误: {response.status_code}"
+    return True, f"initDc {repeat} 次后确认请求正常发出，未熔断"
+
+
+def main():
+    """命令行入口"""
+    parser = argparse.ArgumentParser(description='请求限速与熔断的过载判断检查')
+    parser.add_argument('--repeat', type=int, default=5, help='连续获取initDc的次数（熔断阈值默认为3）')
+    args = parser.parse_args()
+
+    ok, message = run(max(1, args.repeat))
+    print(f"{'通过' if ok else '失败'}: {message}")
+    return 0 if ok else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
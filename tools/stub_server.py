@@ -0,0 +1,532 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+本地12306替身服务器
+
+实现订票流程用到的全部接口，支持按接口配置延迟和失败注入，
+用于离线调试和基准测试。
+
+用法:
+    python -m tools.stub_server --port 8306 --latency 0.05
+"""
+
+import argparse
+import json
+import math
+import random
+import threading
+import time
+import urllib.parse
+import uuid
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+# 默认车站（出发站、到达站）
+DEFAULT_FROM_STATION = 'BJP'
+DEFAULT_TO_STATION = 'SHH'
+
+# 失败注入方式
+FAILURE_BUSY = 'busy'      # 返回"系统繁忙"JSON
+FAILURE_HTML = 'html'      # 返回HTML页面（模拟被重定向或拦截）
+FAILURE_HTTP = 'http'      # 返回HTTP 502
+
+BUSY_PAGE = '<html><head><title>系统繁忙</title></head><body>系统忙，请稍后重试</body></html>'
+
+LOGIN_PAGE = '<html><head><title>登录 | 客运服务</title></head><body>请登录</body></html>'
+
+INIT_PAGE = '<html><head><title>车票预订 | 客运服务</title></head><body></body></html>'
+
+INITDC_PAGE = """<!DOCTYPE html>
+<html>
+<head>
+<title>确认乘客信息 | 客运服务</title>
+<script type="text/javascript">
+var ctx = '/otn/';
+var globalRepeatSubmitToken = '{token}';
+var global_lang = 'zh_CN';
+</script>
+</head>
+<body>
+{padding}
+<script type="text/javascript">
+var ticketInfoForPassengerForm={{'cardTypes':[],'isAsync':'1','key_check_isChange':'{key_check}','leftDetails':[],'leftTicketStr':'{left_ticket}','purpose_codes':'00','train_location':'P2'}};
+</script>
+</body>
+</html>
+"""
+
+
+def build_train_row(index, from_station=DEFAULT_FROM_STATION, to_station=DEFAULT_TO_STATION,
+                    train_date='20260101', seats=None):
+    """
+    生成一条leftTicket/query格式的车次记录
+
+    Args:
+        index: 车次序号
+        from_station: 出发站代码
+        to_station: 到达站代码
+        train_date: 出发日期 (YYYYMMDD)
+        seats: 覆盖座位余票 {字段下标: 值}
+
+    Returns:
+        str: 以|分隔的原始车次字符串
+    """
+    parts = [''] * 40
+    depart_minutes = (6 * 60 + index * 17) % (24 * 60)
+    duration_minutes = 270 + (index * 7) % 120
+    arrive_minutes = (depart_minutes + duration_minutes) % (24 * 60)
+
+    parts[0] = urllib.parse.quote(f'stub{index:04d}+secret/str=', safe='')
+    parts[1] = '预订'
+    parts[2] = f'24000G{index:04d}0C'
+    parts[3] = f'G{index + 1}'
+    parts[4] = from_station
+    parts[5] = to_station
+    parts[6] = from_station
+    parts[7] = to_station
+    parts[8] = f'{depart_minutes // 60:02d}:{depart_minutes % 60:02d}'
+    parts[9] = f'{arrive_minutes // 60:02d}:{arrive_minutes % 60:02d}'
+    parts[10] = f'{duration_minutes // 60:02d}:{duration_minutes % 60:02d}'
+    parts[11] = 'Y'
+    parts[12] = f'stubLeftTicket{index:04d}'
+    parts[13] = train_date
+    parts[14] = '3'
+    parts[15] = 'P2'
+    parts[16] = '01'
+    parts[17] = '05'
+    parts[18] = '1'
+    parts[19] = '0'
+    parts[23] = '--'
+    parts[26] = '无'
+    parts[28] = '--'
+    parts[29] = '--'
+    parts[30] = '有' if index % 3 else str(index % 20 + 1)
+    parts[31] = str(index % 10) if index % 4 else '无'
+    parts[32] = '*' if index % 5 == 0 else '2'
+    parts[34] = 'O0M090'
+    parts[35] = 'OM9'
+
+    for pos, value in (seats or {}).items():
+        parts[pos] = value
+
+    return '|'.join(parts)
+
+
+class StubConfig:
+    """替身服务器配置"""
+
+    def __init__(self, latency=0.0, endpoint_latency=None, jitter=0.0, failure_rate=0.0,
+                 endpoint_failure_rate=None, failure_mode=FAILURE_BUSY, queue_polls=0,
+                 train_count=20, initdc_padding=0, clock_offset=0.0, queue_time=0.0):
+        """
+        初始化配置
+
+        Args:
+            latency: 默认接口延迟（秒）
+            endpoint_latency: 按接口覆盖的延迟 {接口名: 秒}，接口名为路径最后一段
+            jitter: 延迟的随机抖动上限（秒）
+            failure_rate: 默认失败概率
+            endpoint_failure_rate: 按接口覆盖的失败概率 {接口名: 概率}
+            failure_mode: 失败方式，busy/html/http
+            queue_polls: 订单完成前queryOrderWaitTime返回排队中的次数
+            train_count: 查询返回的车次数量
+            initdc_padding: initDc页面填充的字节数，用于模拟真实页面大小
+            clock_offset: 服务器时钟相对本机的偏差（秒），体现在响应头Date中
+            queue_time: 订单在confirmSingleForQueue之后多少秒完成（大于0时代替queue_polls），
+                排队中返回的waitTime为剩余秒数
+        """
+        self.latency = latency
+        self.endpoint_latency = endpoint_latency or {}
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self.endpoint_failure_rate = endpoint_failure_rate or {}
+        self.failure_mode = failure_mode
+        self.queue_polls = queue_polls
+        self.train_count = train_count
+        self.initdc_padding = initdc_padding
+        self.clock_offset = clock_offset
+        self.queue_time = queue_time
+
+    def latency_for(self, endpoint):
+        """获取接口延迟"""
+        delay = self.endpoint_latency.get(endpoint, self.latency)
+        if self.jitter:
+            delay += random.uniform(0, self.jitter)
+        return delay
+
+    def should_fail(self, endpoint):
+        """判断本次请求是否注入失败"""
+        rate = self.endpoint_failure_rate.get(endpoint, self.failure_rate)
+        return rate > 0 and random.random() < rate
+
+
+class _StubState:
+    """替身服务器运行状态"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.request_counts = {}
+        self.polls = {}
+        # 按queue_time排队的订单: {token: 完成时刻(monotonic)}
+        self.orders = {}
+        # 已被轮询察觉完成的订单的完成时刻（monotonic），按察觉顺序
+        self.finished = []
+
+    def count(self, endpoint):
+        with self.lock:
+            self.request_counts[endpoint] = self.request_counts.get(endpoint, 0) + 1
+
+    def next_poll(self, token):
+        with self.lock:
+            self.polls[token] = self.polls.get(token, 0) + 1
+            return self.polls[token]
+
+    def start_order(self, token, queue_time):
+        with self.lock:
+            self.orders[token] = time.monotonic() + queue_time
+
+    def order_remaining(self, token):
+        """订单剩余排队秒数，完成时返回0并记录完成时刻"""
+        with self.lock:
+            done_at = self.orders.get(token)
+            if done_at is None:
+                return 0.0
+            remaining = done_at - time.monotonic()
+            if remaining <= 0:
+                del self.orders[token]
+                self.finished.append(done_at)
+                return 0.0
+            return remaining
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    """替身服务器请求处理"""
+
+    protocol_version = 'HTTP/1.1'
+    server_version = 'StubServer/1.0'
+
+    # 响应头和响应体分两次写出，关闭Nagle避免与延迟确认叠加产生约40ms的额外延迟
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def date_time_string(self, timestamp=None):
+        if timestamp is None:
+            timestamp = time.time() + self.server.config.clock_offset
+        return super().date_time_string(timestamp)
+
+    # ---- 通用工具 ----
+
+    def _endpoint(self):
+        return urllib.parse.urlsplit(self.path).path.rstrip('/').rsplit('/', 1)[-1] or 'index'
+
+    def _query(self):
+        return dict(urllib.parse.parse_qsl(urllib.parse.urlsplit(self.path).query, keep_blank_values=True))
+
+    def _form(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        body = self.rfile.read(length).decode('utf-8') if length else ''
+        return dict(urllib.parse.parse_qsl(body, keep_blank_values=True))
+
+    def _cookies(self):
+        cookies = {}
+        for item in (self.headers.get('Cookie') or '').split(';'):
+            if '=' in item:
+                name, value = item.strip().split('=', 1)
+                cookies[name] = value
+        return cookies
+
+    def _send(self, status, body, content_type, cookies=None):
+        data = body.encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(data)))
+        for name, value in (cookies or {}).items():
+            self.send_header('Set-Cookie', f'{name}={value}; Path=/')
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _json(self, payload, cookies=None):
+        self._send(200, json.dumps(payload, ensure_ascii=False), 'application/json;charset=UTF-8', cookies)
+
+    def _html(self, page, cookies=None):
+        self._send(200, page, 'text/html;charset=utf-8', cookies)
+
+    def _fail(self):
+        mode = self.server.config.failure_mode
+        if mode == FAILURE_HTML:
+            self._html(BUSY_PAGE)
+        elif mode == FAILURE_HTTP:
+            self._send(502, 'Bad Gateway', 'text/plain')
+        else:
+            self._json({'status': False, 'messages': ['系统繁忙，请稍后重试'], 'data': None})
+
+    def _dispatch(self, method):
+        endpoint = self._endpoint()
+        self.server.state.count(endpoint)
+
+        delay = self.server.config.latency_for(endpoint)
+        if delay > 0:
+            time.sleep(delay)
+
+        handler = getattr(self, f'_handle_{endpoint}', None)
+        if handler is None:
+            self._send(404, 'Not Found', 'text/plain')
+            return
+
+        # 页面类接口不注入失败，保证流程可以走到目标接口
+        if endpoint not in ('index', 'init', 'login.html') and self.server.config.should_fail(endpoint):
+            self._fail()
+            return
+
+        params = self._query()
+        if method == 'POST':
+            params.update(self._form())
+        handler(params)
+
+    def do_GET(self):
+        self._dispatch('GET')
+
+    def do_POST(self):
+        self._dispatch('POST')
+
+    def do_HEAD(self):
+        endpoint = self._endpoint()
+        self.server.state.count(endpoint)
+        delay = self.server.config.latency_for(endpoint)
+        if delay > 0:
+            time.sleep(delay)
+        self.send_response(200)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    # ---- 页面 ----
+
+    def _handle_index(self, params):
+        self._html(INIT_PAGE, {'BIGipServerotn': 'stub.0000', 'route': uuid.uuid4().hex})
+
+    def _handle_init(self, params):
+        cookies = {'route': uuid.uuid4().hex, 'BIGipServerotn': 'stub.0000'}
+        if 'JSESSIONID' not in self._cookies():
+            cookies['JSESSIONID'] = uuid.uuid4().hex.upper()
+        self._html(INIT_PAGE, cookies)
+
+    def _handle_login_html(self, params):
+        self._html(LOGIN_PAGE)
+
+    # ---- 查询 ----
+
+    def _handle_query(self, params):
+        from_station = params.get('leftTicketDTO.from_station') or DEFAULT_FROM_STATION
+        to_station = params.get('leftTicketDTO.to_station') or DEFAULT_TO_STATION
+        train_date = (params.get('leftTicketDTO.train_date') or '2026-01-01').replace('-', '')
+        results = [build_train_row(i, from_station, to_station, train_date)
+                   for i in range(self.server.config.train_count)]
+        self._json({
+            'httpstatus': 200,
+            'status': True,
+            'messages': '',
+            'data': {'flag': '1', 'map': {from_station: from_station, to_station: to_station}, 'result': results}
+        })
+
+    # ---- 登录 ----
+
+    def _handle_checkLoginVerify(self, params):
+        self._json({'result_code': 0, 'result_message': '', 'login_check_code': '3'})
+
+    def _handle_getMessageCode(self, params):
+        self._json({'result_code': 0, 'result_message': '获取手机验证码成功！'})
+
+    def _handle_login(self, params):
+        self._json({'result_code': 0, 'result_message': '登录成功', 'uamtk': 'stub-uamtk'},
+                   {'uamtk': 'stub-uamtk'})
+
+    def _handle_uamtk(self, params):
+        self._json({'result_code': 0, 'result_message': '验证通过', 'newapptk': 'stub-apptk'})
+
+    def _handle_uamauthclient(self, params):
+        self._json({'result_code': 0, 'result_message': '验证通过', 'username': '测试用户', 'apptk': 'stub-apptk'},
+                   {'tk': 'stub-apptk'})
+
+    def _handle_checkUser(self, params):
+        flag = 'tk' in self._cookies()
+        self._json({'status': True, 'data': {'flag': flag}, 'messages': []})
+
+    def _handle_queryLoginUser(self, params):
+        self._json({'status': True, 'data': {'name': '测试用户', 'user_name': 'stub'}})
+
+    # ---- 下单 ----
+
+    def _handle_submitOrderRequest(self, params):
+        if not params.get('secretStr'):
+            self._json({'status': False, 'messages': ['车次信息无效'], 'data': None})
+            return
+        self._json({'status': True, 'data': '0', 'messages': []})
+
+    def _handle_initDc(self, params):
+        page = INITDC_PAGE.format(
+            token=uuid.uuid4().hex,
+            key_check=uuid.uuid4().hex.upper() * 2,
+            left_ticket='stubLeftTicketStr%3D%3D',
+            padding='<!--' + 'x' * self.server.config.initdc_padding + '-->'
+        )
+        self._html(page)
+
+    def _handle_getPassengerDTOs(self, params):
+        self._json({'status': True, 'data': {'normal_passengers': [
+            {
+                'passenger_name': '测试用户',
+                'passenger_id_type_code': '1',
+                'passenger_id_type_name': '居民身份证',
+                'passenger_id_no': '1101**********0011',
+                'mobile_no': '138****0000',
+                'allEncStr': 'stubAllEncStr',
+            },
+            {
+                'passenger_name': '同行乘客',
+                'passenger_id_type_code': '1',
+                'passenger_id_type_name': '居民身份证',
+                'passenger_id_no': '3101**********0022',
+                'mobile_no': '139****0000',
+                'allEncStr': 'stubAllEncStr2',
+            }
+        ]}})
+
+    def _handle_checkOrderInfo(self, params):
+        self._json({'status': True, 'data': {'submitStatus': True, 'ifShowPassCode': 'N'}})
+
+    def _handle_getQueueCount(self, params):
+        self._json({'status': True, 'data': {'count': '0', 'ticket': '20,0', 'op_2': 'false', 'op_1': 'false'}})
+
+    def _handle_confirmSingleForQueue(self, params):
+        if not params.get('key_check_isChange') or not params.get('REPEAT_SUBMIT_TOKEN'):
+            self._json({'status': True, 'data': '缺少必要参数'})
+            return
+        if self.server.config.queue_time > 0:
+            self.server.state.start_order(params['REPEAT_SUBMIT_TOKEN'], self.server.config.queue_time)
+        self._json({'status': True, 'data': {'submitStatus': True, 'isAsync': '1'}})
+
+    def _handle_queryOrderWaitTime(self, params):
+        token = params.get('REPEAT_SUBMIT_TOKEN', '')
+        if self.server.config.queue_time > 0:
+            remaining = self.server.state.order_remaining(token)
+            if remaining > 0:
+                self._json({'status': True, 'data': {'queryOrderWaitTimeStatus': True,
+                                                     'waitTime': math.ceil(remaining),
+                                                     'waitCount': 1, 'orderId': None}})
+                return
+        elif self.server.state.next_poll(token) <= self.server.config.queue_polls:
+            self._json({'status': True, 'data': {'queryOrderWaitTimeStatus': True, 'waitTime': 4,
+                                                 'waitCount': 1, 'orderId': None}})
+            return
+        self._json({'status': True, 'data': {'queryOrderWaitTimeStatus': True, 'waitTime': -1,
+                                             'waitCount': 0, 'orderId': 'E' + uuid.uuid4().hex[:9].upper()}})
+
+    def _handle_resultOrderForDcQueue(self, params):
+        self._json({'status': True, 'data': {'submitStatus': True}})
+
+
+# 路径最后一段含点号的接口单独映射
+setattr(_StubHandler, '_handle_login.html', _StubHandler._handle_login_html)
+
+
+class StubServer:
+    """本地12306替身服务器"""
+
+    def __init__(self, config=None, host='127.0.0.1', port=0):
+        """
+        初始化替身服务器
+
+        Args:
+            config: StubConfig配置
+            host: 监听地址
+            port: 监听端口，0表示自动分配
+        """
+        self.config = config or StubConfig()
+        self.state = _StubState()
+        self.httpd = ThreadingHTTPServer((host, port), _StubHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.config = self.config
+        self.httpd.state = self.state
+        self._thread = None
+
+    @property
+    def base_url(self):
+        """服务器地址，可直接传给TrainOrderManager(base_url=...)"""
+        host, port = self.httpd.server_address[:2]
+        return f'http://{host}:{port}'
+
+    @property
+    def finished_orders(self):
+        """已被察觉完成的订单的实际完成时刻（time.monotonic），按察觉顺序"""
+        with self.state.lock:
+            return list(self.state.finished)
+
+    @property
+    def request_counts(self):
+        """各接口请求次数"""
+        with self.state.lock:
+            return dict(self.state.request_counts)
+
+    def start(self):
+        """在后台线程中启动服务器"""
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name='12306-stub', daemon=True)
+        self._thread.start()
+        return self.base_url
+
+    def stop(self):
+        """停止服务器"""
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+
+def main():
+    """命令行入口"""
+    parser = argparse.ArgumentParser(description='本地12306替身服务器')
+    parser.add_argument('--host', default='127.0.0.1', help='监听地址')
+    parser.add_argument('--port', type=int, default=8306, help='监听端口')
+    parser.add_argument('--latency', type=float, default=0.0, help='接口延迟（秒）')
+    parser.add_argument('--jitter', type=float, default=0.0, help='延迟随机抖动上限（秒）')
+    parser.add_argument('--failure-rate', type=float, default=0.0, help='失败概率')
+    parser.add_argument('--failure-mode', choices=[FAILURE_BUSY, FAILURE_HTML, FAILURE_HTTP],
+                        default=FAILURE_BUSY, help='失败方式')
+    parser.add_argument('--queue-polls', type=int, default=0, help='订单完成前的排队轮询次数')
+    parser.add_argument('--queue-time', type=float, default=0.0,
+                        help='订单在提交后多少秒完成（大于0时代替--queue-polls）')
+    parser.add_argument('--trains', type=int, default=20, help='查询返回的车次数量')
+    parser.add_argument('--clock-offset', type=float, default=0.0, help='服务器时钟偏差（秒）')
+    args = parser.parse_args()
+
+    config = StubConfig(
+        latency=args.latency,
+        jitter=args.jitter,
+        failure_rate=args.failure_rate,
+        failure_mode=args.failure_mode,
+        queue_polls=args.queue_polls,
+        queue_time=args.queue_time,
+        train_count=args.trains,
+        clock_offset=args.clock_offset
+    )
+    server = StubServer(config, host=args.host, port=args.port)
+    print(f"替身服务器已启动: {server.base_url}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        print("\n替身服务器已停止")
+    finally:
+        server.httpd.server_close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+下载12306全国车站列表并编译缓存
+
+用法:
+    python -m tools.update_stations
+    python -m tools.update_stations --source /path/to/station_name.js
+"""
+
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import STATION_CONFIG
+from utils.constants import BASE_URL, DEFAULT_HEADERS
+from utils.station_data import load_station_table, resolve_data_path
+
+STATION_JS_PATH = '/otn/resources/js/framework/station_name.js'
+
+
+def download_station_js(target_path, base_url=BASE_URL):
+    """下载station_name.js到指定路径"""
+    import requests
+
+    response = requests.get(f"{base_url}{STATION_JS_PATH}", headers=DEFAULT_HEADERS, timeout=30)
+    response.raise_for_status()
+
+    directory = os.path.dirname(target_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(target_path, 'wb') as f:
+        f.write(response.content)
+
+
+def main():
+    """命令行入口"""
+    parser = argparse.ArgumentParser(description='下载12306全国车站列表并编译缓存')
+    parser.add_argument('--source', help='使用本地已有的station_name.js，不下载')
+    args = parser.parse_args()
+
+    target_path = resolve_data_path(STATION_CONFIG['source'])
+    cache_path = resolve_data_path(STATION_CONFIG['cache'])
+
+    if args.source:
+        with open(args.source, 'rb') as src:
+            content = src.read()
+        os.makedirs(os.path.dirname(target_path), exist_ok=True)
+        with open(target_path, 'wb') as f:
+            f.write(content)
+    else:
+        print(f"正在下载车站列表到 {target_path} ...")
+        download_station_js(target_path)
+
+    table = load_station_table(target_path, cache_path)
+    print(f"已编译 {len(table)} 个车站到 {cache_path}")
+    table.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,20 +1,51 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
-"""Utils package"""
-
-from .logger import setup_logging, get_logger
-from .constants import STATION_MAPPING, SEAT_TYPE_MAPPING, DEFAULT_HEADERS
-from .helpers import encrypt_password, js_escape, format_seat_display, decode_train_info
-
-__all__ = [
-    'setup_logging',
-    'get_logger',
-    'STATION_MAPPING',
-    'SEAT_TYPE_MAPPING',
-    'DEFAULT_HEADERS',
-    'encrypt_password',
-    'js_escape',
-    'format_seat_display',
-    'decode_train_info'
-]
+"""
+Utils package
+
+导出的名称在首次访问时才导入所在的子模块：例如 helpers 依赖的 gmssl 只在登录加密密码时需要，
+内置车站表只在没有车站数据文件时使用，不必在启动时加载。
+"""
+
+import importlib
+
+# 导出名称 -> 所在子模块
+_EXPORTS = {
+    'setup_logging': 'logger',
+    'get_logger': 'logger',
+    'stop_logging': 'logger',
+    'critical_window': 'logger',
+    'is_enabled_for': 'logger',
+    'STATION_MAPPING': 'station_mapping',
+    'SEAT_TYPE_MAPPING': 'constants',
+    'DEFAULT_HEADERS': 'constants',
+    'encrypt_password': 'helpers',
+    'js_escape': 'helpers',
+    'format_seat_display': 'helpers',
+    'decode_train_info': 'helpers',
+    'StationIndex': 'station_index',
+    'get_station_index': 'station_index',
+    'InitDcTokens': 'initdc_parser',
+    'parse_initdc': 'initdc_parser',
+    'read_initdc': 'initdc_parser',
+    'SaleTrigger': 'sale_trigger',
+    'TriggerRecord': 'sale_trigger',
+    'PollSchedule': 'poll_schedule',
+    'PollStats': 'poll_schedule',
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f'.{module}', __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+确认乘客页面（initDc）解析模块
+
+用一个预编译的正则一次扫描页面，同时提取globalRepeatSubmitToken、
+key_check_isChange和leftTicketStr。支持边读边扫描流式响应，
+三个字段都找到后立即返回，剩余内容由后台线程读完。
+"""
+
+import codecs
+import re
+import threading
+
+# 一次扫描匹配三个字段；以字段名开头，正则引擎可以按首字符快速跳过无关内容
+_INITDC_PATTERN = re.compile(
+    r"(?P<key>globalRepeatSubmitToken|REPEAT_SUBMIT_TOKEN|repeatSubmitToken"
+    r"|key_check_isChange|leftTicketStr)['\"]?\s*[=:]\s*"
+    r"(?:['\"](?P<value>[^'\"]+)['\"]|(?P<null>null))"
+)
+
+# 分块扫描时保留的上一块末尾长度，保证跨块的字段也能完整匹配
+_OVERLAP = 4096
+
+# 默认读取块大小
+DEFAULT_CHUNK_SIZE = 16 * 1024
+
+# 字段找齐后后台为复用连接而继续读完的最大字节数，超过则直接关闭连接
+DEFAULT_DRAIN_LIMIT = 512 * 1024
+
+
+def _is_hex(value):
+    return all(char in '0123456789ABCDEF' for char in value)
+
+
+class InitDcTokens:
+    """initDc页面提取结果"""
+
+    __slots__ = ('repeat_submit_token', 'key_check_ischange', 'left_ticket_str',
+                 'token_is_null', 'truncated', '_chunks', '_encoding', '_text')
+
+    def __init__(self, encoding='utf-8'):
+        self.repeat_submit_token = None
+        self.key_check_ischange = None
+        self.left_ticket_str = None
+        # 页面中 globalRepeatSubmitToken = null
+        self.token_is_null = False
+        # 字段找齐后未读取的剩余内容交给了后台线程，text只包含已读取的部分
+        self.truncated = False
+        self._chunks = []
+        self._encoding = encoding
+        self._text = None
+
+    @property
+    def complete(self):
+        """三个字段是否都已找到"""
+        return (self.repeat_submit_token is not None and
+                self.key_check_ischange is not None and
+                self.left_ticket_str is not None)
+
+    @property
+    def text(self):
+        """已读取的页面内容，首次访问时才解码"""
+        if self._text is None:
+            self._text = b''.join(self._chunks).decode(self._encoding, errors='replace')
+            self._chunks = [self._text.encode(self._encoding, errors='replace')]
+        return self._text
+
+    def _feed(self, text):
+        """扫描一段文本，已找到的字段保持第一次出现的值"""
+        for match in _INITDC_PATTERN.finditer(text):
+            key, value = match.group('key', 'value')
+            if value is None:
+                if key.endswith('Token') or key.endswith('TOKEN'):
+                    self.token_is_null = True
+                continue
+            if key == 'key_check_isChange':
+                if self.key_check_ischange is None and _is_hex(value):
+                    self.key_check_ischange = value
+            elif key == 'leftTicketStr':
+                if self.left_ticket_str is None:
+                    self.left_ticket_str = value
+            elif self.repeat_submit_token is None:
+                self.repeat_submit_token = value
+            if self.complete:
+                return
+
+    def __repr__(self):
+        return (f"InitDcTokens(token={self.repeat_submit_token!r}, "
+                f"key_check_isChange={self.key_check_ischange!r}, "
+                f"leftTicketStr={'...' if self.left_ticket_str else None})")
+
+
+def parse_initdc(content, encoding='utf-8'):
+    """
+    解析已完整读取的initDc页面
+
+    Args:
+        content: 页面内容（str或bytes）
+
+    Returns:
+        InitDcTokens: 提取结果
+    """
+    tokens = InitDcTokens(encoding)
+    if isinstance(content, bytes):
+        tokens._chunks.append(content)
+        content = content.decode(encoding, errors='replace')
+    tokens._text = content
+    tokens._feed(content)
+    return tokens
+
+
+def _drain(response, chunk_size, limit):
+    """原样读完剩余内容后把连接放回连接池，剩余超过limit时直接关闭连接"""
+    drained = 0
+    try:
+        for chunk in response.raw.stream(chunk_size, decode_content=False):
+            drained += len(chunk)
+            if drained > limit:
+                response.close()
+                return
+        response.raw.release_conn()
+    except Exception:
+        response.close()
+
+
+def read_initdc(response, chunk_size=DEFAULT_CHUNK_SIZE, drain_limit=DEFAULT_DRAIN_LIMIT):
+    """
+    边读边扫描流式的initDc响应（阻塞，需在线程池中调用）
+
+    三个字段找齐后立即返回，不再读取、解码和扫描剩余内容；剩余内容交给后台线程原样读完，
+    以便连接放回连接池（超过drain_limit时直接关闭连接），调用方不必等待。
+
+    Args:
+        response: 以 stream=True 发出的requests响应
+        chunk_size: 读取块大小
+        drain_limit: 字段找齐后后台最多继续读取的字节数
+
+    Returns:
+        InitDcTokens: 提取结果
+    """
+    encoding = response.encoding or 'utf-8'
+    tokens = InitDcTokens(encoding)
+    decoder = codecs.getincrementaldecoder(encoding)(errors='replace')
+    tail = ''
+    pending = []
+    pending_size = 0
+
+    try:
+        for chunk in response.iter_content(chunk_size):
+            tokens._chunks.append(chunk)
+            # 攒够一段再扫描，避免小块读取时反复扫描重叠部分
+            text = decoder.decode(chunk)
+            pending.append(text)
+            pending_size += len(text)
+            if pending_size >= _OVERLAP:
+                window = tail + ''.join(pending)
+                tokens._feed(window)
+                if tokens.complete:
+                    break
+                tail = window[-_OVERLAP:]
+                pending.clear()
+                pending_size = 0
+        else:
+            pending.append(decoder.decode(b'', final=True))
+            tokens._feed(tail + ''.join(pending))
+            response.close()
+            return tokens
+    except BaseException:
+        response.close()
+        raise
+
+    tokens.truncated = True
+    threading.Thread(target=_drain, args=(response, chunk_size, drain_limit),
+                     name='12306-initdc-drain', daemon=True).start()
+    return tokens
@@ -1,38 +1,181 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
-"""日志记录工具模块"""
+"""
+日志记录工具模块
 
+队列模式下根记录器只挂一个QueueHandler：调用方线程只把日志记录放入队列，
+格式化和写文件/控制台都在后台线程中完成。日志参数（%s风格）也在后台线程中格式化，
+因此记录之后被修改的可变参数可能以修改后的值写出。
+
+开售触发后的订票过程中可以进入"关键窗口"：进入窗口的任务（线程/协程上下文）中
+INFO等详细日志在'12306'记录器的过滤器处即被丢弃，不进入队列、不格式化，
+同时运行的其它任务的日志不受影响。
+"""
+
+import atexit
+import contextvars
 import logging
+import logging.handlers
+import queue
+import threading
+from contextlib import contextmanager
 from datetime import datetime
 
+DEFAULT_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+
+# 关键窗口内保留的最低级别
+DEFAULT_CRITICAL_WINDOW_LEVEL = logging.WARNING
+
+_listener = None
+_window_lock = threading.Lock()
+_window_filtered = set()
+# 当前上下文所在关键窗口的级别，0表示不在窗口内
+_window_level = contextvars.ContextVar('12306_critical_window_level', default=0)
+
+
+class LazyQueueHandler(logging.handlers.QueueHandler):
+    """不在调用方线程格式化的QueueHandler"""
+
+    def prepare(self, record):
+        # 默认实现会在调用方线程格式化消息并清空args，这里原样入队，由后台线程格式化
+        return record
+
 
-def setup_logging(log_filename="12306.log"):
-    """设置日志记录"""
+def _skip_unused_record_fields(fmt):
+    """
+    日志格式用不到的字段不再在调用方线程收集（logging文档"Optimization"一节列出的公开开关）
+    """
+    if '%(thread' not in fmt:
+        logging.logThreads = False
+    if '%(process' not in fmt:
+        logging.logProcesses = False
+        logging.logMultiprocessing = False
+
+
+def setup_logging(log_filename="12306.log", level=logging.INFO, fmt=DEFAULT_FORMAT, use_queue=False):
+    """
+    设置日志记录
+
+    Args:
+        log_filename: 日志文件
+        level: 日志级别（级别名或数值）
+        fmt: 日志格式
+        use_queue: 是否使用队列模式（后台线程写日志）
+    """
+    global _listener
     root_logger = logging.getLogger()
 
     # 检查是否已经配置过
     if not root_logger.handlers:
-        root_logger.setLevel(logging.INFO)
+        if isinstance(level, str):
+            level = logging.getLevelName(level.upper())
+        root_logger.setLevel(level)
+        formatter = logging.Formatter(fmt)
 
-        # 添加文件handler
+        # 文件handler
         file_handler = logging.FileHandler(log_filename, encoding='utf-8')
-        file_handler.setLevel(logging.INFO)
-        formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
+        file_handler.setLevel(level)
         file_handler.setFormatter(formatter)
-        root_logger.addHandler(file_handler)
 
-        # 添加控制台handler
+        # 控制台handler
         console_handler = logging.StreamHandler()
-        console_handler.setLevel(logging.INFO)
+        console_handler.setLevel(level)
         console_handler.setFormatter(formatter)
-        root_logger.addHandler(console_handler)
+
+        if use_queue:
+            _skip_unused_record_fields(fmt)
+            log_queue = queue.SimpleQueue()
+            root_logger.addHandler(LazyQueueHandler(log_queue))
+            _listener = logging.handlers.QueueListener(
+                log_queue, file_handler, console_handler, respect_handler_level=True
+            )
+            _listener.start()
+            # 退出前写完队列中剩余的日志
+            atexit.register(stop_logging)
+        else:
+            root_logger.addHandler(file_handler)
+            root_logger.addHandler(console_handler)
 
     logger = logging.getLogger('12306')
     logger.info("12306订票工具启动")
     return logger
 
 
+def stop_logging():
+    """停止队列模式的后台线程，写完队列中剩余的日志"""
+    global _listener
+    listener, _listener = _listener, None
+    if listener is not None:
+        listener.stop()
+
+
+class _CriticalWindowFilter(logging.Filter):
+    """丢弃当前上下文所在关键窗口级别以下的日志记录"""
+
+    def filter(self, record):
+        return record.levelno >= _window_level.get()
+
+
+def _install_window_filter(name):
+    """在记录器上安装关键窗口过滤器（只安装一次）"""
+    logger = logging.getLogger(name)
+    with _window_lock:
+        if name not in _window_filtered:
+            logger.addFilter(_CriticalWindowFilter())
+            _window_filtered.add(name)
+
+
+def enter_critical_window(level=DEFAULT_CRITICAL_WINDOW_LEVEL, name='12306'):
+    """
+    进入关键窗口，当前上下文中低于level的日志直接丢弃
+
+    只作用于调用方所在的线程/协程上下文，其它任务的日志不受影响；可以嵌套。
+
+    Returns:
+        contextvars.Token: 传给exit_critical_window以恢复进入前的级别
+    """
+    if isinstance(level, str):
+        level = logging.getLevelName(level.upper())
+    _install_window_filter(name)
+    return _window_level.set(max(level, _window_level.get()))
+
+
+def exit_critical_window(token):
+    """退出关键窗口，恢复进入前的级别"""
+    _window_level.reset(token)
+
+
+@contextmanager
+def critical_window(level=DEFAULT_CRITICAL_WINDOW_LEVEL, enabled=True):
+    """
+    关键窗口上下文
+
+    用法:
+        with critical_window():
+            order_manager._execute_booking_flow(...)
+    """
+    if not enabled:
+        yield
+        return
+    token = enter_critical_window(level)
+    try:
+        yield
+    finally:
+        exit_critical_window(token)
+
+
+def is_enabled_for(logger, level):
+    """
+    该级别的日志是否会被记录（同时考虑当前上下文所在的关键窗口）
+
+    只在构造日志参数本身有开销时使用，如拼接完整URL：
+        if is_enabled_for(logger, logging.INFO):
+            logger.info("完整URL: %s", build_url())
+    """
+    return level >= _window_level.get() and logger.isEnabledFor(level)
+
+
 def get_logger(name='12306'):
     """获取日志记录器"""
     return logging.getLogger(name)
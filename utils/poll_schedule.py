@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+订单状态轮询调度模块
+
+queryOrderWaitTime返回的waitTime是服务器估计的剩余排队秒数。调度规则：
+- 开始后的fast_phase_s秒内按fast_interval快速轮询，多数订单在这段时间内完成
+- 之后间隔按backoff倍数增长到max_interval，并加入随机抖动，避免多个任务同步轮询
+- 服务器给出正的waitTime时，下次轮询不早于waitTime * wait_time_factor（不超过max_interval）
+- 所有等待都截断在总截止时间之内
+
+PollStats记录每次轮询，订单完成时给出"服务器完成到本地察觉"的延迟上限：
+服务器在最后一次返回排队中之后、返回完成之前的某一时刻完成订单。
+"""
+
+import random
+import time
+
+from .logger import get_logger
+
+# 默认参数（秒）
+DEFAULT_DEADLINE_S = 300
+DEFAULT_FAST_INTERVAL = 0.25
+DEFAULT_FAST_PHASE_S = 3.0
+DEFAULT_MAX_INTERVAL = 5.0
+DEFAULT_BACKOFF = 1.5
+DEFAULT_WAIT_TIME_FACTOR = 0.5
+DEFAULT_JITTER = 0.2
+
+
+class PollSchedule:
+    """
+    轮询间隔调度
+
+    用法:
+        schedule = PollSchedule(deadline_s=300)
+        while True:
+            status, data = poll()
+            ...
+            delay = schedule.next_delay(data.get('waitTime'))
+            if delay is None:
+                break  # 已到截止时间
+            sleep(delay)
+    """
+
+    def __init__(self, deadline_s=DEFAULT_DEADLINE_S, fast_interval=DEFAULT_FAST_INTERVAL,
+                 fast_phase_s=DEFAULT_FAST_PHASE_S, max_interval=DEFAULT_MAX_INTERVAL,
+                 backoff=DEFAULT_BACKOFF, wait_time_factor=DEFAULT_WAIT_TIME_FACTOR,
+                 jitter=DEFAULT_JITTER, clock=time.monotonic, rng=None):
+        """
+        Args:
+            deadline_s: 总截止时间（从创建起算）
+            fast_interval: 快速阶段的轮询间隔
+            fast_phase_s: 快速阶段时长
+            max_interval: 轮询间隔上限
+            backoff: 快速阶段之后每次间隔的增长倍数
+            wait_time_factor: 按服务器waitTime推迟下次轮询的比例，0表示忽略waitTime
+            jitter: 快速阶段之后间隔的随机抖动比例（±）
+            clock: 单调时钟
+            rng: 随机数生成器
+        """
+        self.deadline_s = deadline_s
+        self.fast_interval = fast_interval
+        self.fast_phase_s = fast_phase_s
+        self.max_interval = max(max_interval, fast_interval)
+        self.backoff = max(1.0, backoff)
+        self.wait_time_factor = wait_time_factor
+        self.jitter = jitter
+        self.clock = clock
+        self.rng = rng or random.Random()
+        self.started = clock()
+        self._interval = fast_interval
+
+    def elapsed(self):
+        return self.clock() - self.started
+
+    def remaining(self):
+        """距截止时间的秒数"""
+        return self.deadline_s - self.elapsed()
+
+    def next_delay(self, wait_time=None):
+        """
+        计算到下次轮询的等待秒数
+
+        Args:
+            wait_time: 本次轮询服务器返回的waitTime
+
+        Returns:
+            float: 等待秒数，已到截止时间时返回None
+        """
+        remaining = self.remaining()
+        if remaining <= 0:
+            return None
+
+        if self.elapsed() < self.fast_phase_s:
+            delay = self.fast_interval
+        else:
+            self._interval = min(self.max_interval, self._interval * self.backoff)
+            delay = self._interval
+            if self.jitter:
+                delay *= 1 + self.rng.uniform(-self.jitter, self.jitter)
+
+        # 服务器估计还要排队较久时不必按快速间隔轮询
+        if self.wait_time_factor and isinstance(wait_time, (int, float)) and wait_time > 0:
+            delay = max(delay, min(wait_time * self.wait_time_factor, self.max_interval))
+
+        return max(0.0, min(delay, remaining))
+
+
+class PollStats:
+    """一次订单状态轮询的统计"""
+
+    def __init__(self, clock=time.monotonic):
+        self.clock = clock
+        self.started = clock()
+        self.polls = 0
+        self.errors = 0
+        # 最近一次返回排队中的时刻和waitTime
+        self.last_waiting_at = None
+        self.last_wait_time = None
+        # 察觉订单完成/失败的时刻
+        self.finished_at = None
+        self.outcome = None
+
+    def record(self, status, wait_time=None):
+        """
+        记录一次轮询结果（在收到响应后立即调用）
+
+        Args:
+            status: query_order_wait_time的状态
+            wait_time: 服务器返回的waitTime
+        """
+        now = self.clock()
+        self.polls += 1
+        if status == 'waiting':
+            self.last_waiting_at = now
+            self.last_wait_time = wait_time
+        elif status == 'error':
+            self.errors += 1
+        else:
+            self.finished_at = now
+            self.outcome = status
+
+    def finish(self, outcome):
+        """以超时等原因结束"""
+        if self.outcome is None:
+            self.finished_at = self.clock()
+            self.outcome = outcome
+
+    @property
+    def duration_s(self):
+        """从开始轮询到察觉结果的秒数"""
+        end = self.finished_at if self.finished_at is not None else self.clock()
+        return end - self.started
+
+    @property
+    def notice_lag_bound_s(self):
+        """
+        服务器完成订单到本地察觉的延迟上限
+
+        即最后一次返回排队中到返回完成之间的间隔；第一次轮询即完成时为从开始轮询起算。
+        """
+        if self.outcome not in ('completed', 'failed'):
+            return None
+        since = self.last_waiting_at if self.last_waiting_at is not None else self.started
+        return self.finished_at - since
+
+    def to_dict(self):
+        lag = self.notice_lag_bound_s
+        return {
+            'polls': self.polls,
+            'errors': self.errors,
+            'outcome': self.outcome,
+            'duration_s': round(self.duration_s, 3),
+            'notice_lag_bound_s': round(lag, 3) if lag is not None else None,
+            'last_wait_time': self.last_wait_time,
+        }
+
+    def log_summary(self, logger=None):
+        logger = logger or get_logger('12306')
+        lag = self.notice_lag_bound_s
+        logger.info("订单轮询结束: 结果=%s, 轮询%d次（出错%d次）, 耗时%.2fs, 完成到察觉不超过%s",
+                    self.outcome, self.polls, self.errors, self.duration_s,
+                    f"{lag:.2f}s" if lag is not None else '-')
@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+开售时间触发器模块
+
+开售时刻在创建时一次性换算为单调时钟（time.monotonic_ns）上的截止时间，
+之后的等待不受系统时间调整影响。等待分三段：距离较远时粗粒度睡眠，
+接近时细粒度睡眠，最后几毫秒忙等，触发后记录实际偏差。
+wait_async()在事件循环中等待，多个任务的触发可以共用一个线程。
+"""
+
+import asyncio
+import json
+import os
+import time
+from datetime import datetime
+
+from .logger import get_logger
+
+_NS_PER_MS = 1_000_000
+_NS_PER_SECOND = 1_000_000_000
+
+# 默认参数（毫秒）
+DEFAULT_LEAD_MS = 0
+DEFAULT_COARSE_MS = 1000
+DEFAULT_FINE_STEP_MS = 10
+DEFAULT_SPIN_MS = 2
+
+
+class TriggerRecord:
+    """一次触发的结果"""
+
+    __slots__ = ('target', 'lead_ms', 'deadline_ns', 'fired_ns', 'fired_at')
+
+    def __init__(self, target, lead_ms, deadline_ns, fired_ns, fired_at):
+        self.target = target
+        self.lead_ms = lead_ms
+        self.deadline_ns = deadline_ns
+        self.fired_ns = fired_ns
+        # 触发时的本地时间（秒）
+        self.fired_at = fired_at
+
+    @property
+    def offset_ns(self):
+        """实际触发时刻相对截止时间的偏差，正数表示晚于截止时间"""
+        return self.fired_ns - self.deadline_ns
+
+    @property
+    def offset_ms(self):
+        return self.offset_ns / _NS_PER_MS
+
+    def to_dict(self):
+        return {
+            'target': self.target.isoformat(timespec='milliseconds') if self.target else None,
+            'lead_ms': self.lead_ms,
+            'fired_at': datetime.fromtimestamp(self.fired_at).isoformat(timespec='microseconds'),
+            'offset_us': round(self.offset_ns / 1000, 1),
+        }
+
+
+class SaleTrigger:
+    """
+    开售时间触发器
+
+    用法:
+        trigger = SaleTrigger.at(sale_datetime, lead_ms=50)
+        record = trigger.wait(on_tick=show_countdown)
+    """
+
+    def __init__(self, deadline_ns, target=None, lead_ms=DEFAULT_LEAD_MS,
+                 coarse_ms=DEFAULT_COARSE_MS, fine_step_ms=DEFAULT_FINE_STEP_MS,
+                 spin_ms=DEFAULT_SPIN_MS, record_file=None, logger=None):
+        """
+        Args:
+            deadline_ns: 单调时钟上的触发时刻（已扣除提前量）
+            target: 原始的开售时间，仅用于记录
+            lead_ms: 提前触发的毫秒数
+            coarse_ms: 距离触发多于此值时粗粒度睡眠（每次最多1秒）
+            fine_step_ms: 细粒度睡眠的单次上限
+            spin_ms: 最后多少毫秒忙等
+            record_file: 触发偏差记录文件（JSON Lines），None表示不记录
+            logger: 日志记录器
+        """
+        self.deadline_ns = deadline_ns
+        self.target = target
+        self.lead_ms = lead_ms
+        self.coarse_ns = int(coarse_ms * _NS_PER_MS)
+        self.fine_step_ns = int(fine_step_ms * _NS_PER_MS)
+        self.spin_ns = int(spin_ms * _NS_PER_MS)
+        self.record_file = record_file
+        self.logger = logger or get_logger('12306')
+
+    @classmethod
+    def at(cls, target, lead_ms=DEFAULT_LEAD_MS, clock_ns=time.time_ns, **kwargs):
+        """
+        按时间点创建触发器
+
+        Args:
+            target: 开售时间（datetime，本地时间）
+            lead_ms: 提前触发的毫秒数
+            clock_ns: 返回当前时间（纳秒，Unix纪元）的函数，target按此时钟解释
+
+        Returns:
+            SaleTrigger: 触发器
+        """
+        # 两个时钟连续读取，换算只做一次
+        now_ns = clock_ns()
+        mono_ns = time.monotonic_ns()
+        target_ns = int(target.timestamp() * _NS_PER_SECOND)
+        deadline_ns = mono_ns + (target_ns - now_ns) - int(lead_ms * _NS_PER_MS)
+        return cls(deadline_ns, target=target, lead_ms=lead_ms, **kwargs)
+
+    @classmethod
+    def after(cls, seconds, **kwargs):
+        """创建在若干秒后触发的触发器"""
+        return cls(time.monotonic_ns() + int(seconds * _NS_PER_SECOND), **kwargs)
+
+    def adjust(self, delta_ns):
+        """
+        时钟偏差更新后调整截止时间
+
+        Args:
+            delta_ns: 新偏差 - 旧偏差（纳秒），参考时钟变快时为正，触发相应提前
+        """
+        self.deadline_ns -= delta_ns
+
+    def remaining_ns(self):
+        """距离触发的纳秒数"""
+        return self.deadline_ns - time.monotonic_ns()
+
+    def remaining(self):
+        """距离触发的秒数"""
+        return self.remaining_ns() / _NS_PER_SECOND
+
+    def wait(self, on_tick=None):
+        """
+        等待到触发时刻
+
+        Args:
+            on_tick: 粗粒度等待阶段大约每秒调用一次，参数为剩余秒数；
+                     回调可以阻塞（如等待用户输入），返回后按单调时钟重新计算剩余时间
+
+        Returns:
+            TriggerRecord: 触发记录
+        """
+        monotonic_ns = time.monotonic_ns
+
+        # 粗粒度：每次最多睡1秒，直到进入coarse窗口；回调中可能调用adjust()，每次重新读取截止时间
+        remaining = self.deadline_ns - monotonic_ns()
+        while remaining > self.coarse_ns:
+            if on_tick:
+                on_tick(remaining / _NS_PER_SECOND)
+                remaining = self.deadline_ns - monotonic_ns()
+                if remaining <= self.coarse_ns:
+                    break
+            step = min(remaining - self.coarse_ns, _NS_PER_SECOND)
+            time.sleep(step / _NS_PER_SECOND)
+            remaining = self.deadline_ns - monotonic_ns()
+
+        deadline = self.deadline_ns
+
+        # 细粒度：每次最多睡fine_step，保留spin窗口
+        while remaining > self.spin_ns:
+            step = min(remaining - self.spin_ns, self.fine_step_ns)
+            time.sleep(step / _NS_PER_SECOND)
+            remaining = deadline - monotonic_ns()
+
+        # 忙等最后几毫秒
+        fired = monotonic_ns()
+        while fired < deadline:
+            fired = monotonic_ns()
+
+        return self._fired(deadline, fired)
+
+    async def wait_async(self, on_tick=None):
+        """
+        等待到触发时刻（异步）
+
+        与wait()相同的三段等待，睡眠期间不占用线程；最后spin_ms毫秒在事件循环中忙等，
+        同一时刻到期的多个任务依次触发，后触发的不再忙等。
+
+        Args:
+            on_tick: 粗粒度等待阶段大约每秒调用一次的协程函数，参数为剩余秒数
+
+        Returns:
+            TriggerRecord: 触发记录
+        """
+        monotonic_ns = time.monotonic_ns
+
+        remaining = self.deadline_ns - monotonic_ns()
+        while remaining > self.coarse_ns:
+            if on_tick:
+                await on_tick(remaining / _NS_PER_SECOND)
+                remaining = self.deadline_ns - monotonic_ns()
+                if remaining <= self.coarse_ns:
+                    break
+            step = min(remaining - self.coarse_ns, _NS_PER_SECOND)
+            await asyncio.sleep(step / _NS_PER_SECOND)
+            remaining = self.deadline_ns - monotonic_ns()
+
+        deadline = self.deadline_ns
+
+        while remaining > self.spin_ns:
+            step = min(remaining - self.spin_ns, self.fine_step_ns)
+            await asyncio.sleep(step / _NS_PER_SECOND)
+            remaining = deadline - monotonic_ns()
+
+        fired = monotonic_ns()
+        while fired < deadline:
+            fired = monotonic_ns()
+
+        # 先让同一时刻到期的其他任务触发，再记录本次触发（写日志、保存记录）
+        await asyncio.sleep(0)
+        return self._fired(deadline, fired)
+
+    def _fired(self, deadline, fired):
+        """记录一次触发"""
+        record = TriggerRecord(self.target, self.lead_ms, deadline, fired, time.time())
+        self.logger.info("开售触发: 偏差 %.3fms，提前量 %sms", record.offset_ms, self.lead_ms)
+        if self.record_file:
+            self._save_record(record)
+        return record
+
+    def _save_record(self, record):
+        try:
+            directory = os.path.dirname(self.record_file)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(self.record_file, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(record.to_dict(), ensure_ascii=False) + '\n')
+        except OSError as e:
+            self.logger.warning("保存触发记录失败: %s", e)
+
+
+def load_trigger_records(record_file):
+    """读取触发偏差记录"""
+    records = []
+    if not os.path.exists(record_file):
+        return records
+    with open(record_file, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                records.append(json.loads(line))
+    return records
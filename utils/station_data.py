@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+车站数据加载模块
+
+读取12306的station_name.js（@简拼|站名|代码|全拼|首字母|序号|...），编译为
+以数组为索引的紧凑二进制表，并按源文件哈希缓存。缓存通过mmap打开，
+查找时直接在映射内存上二分，不需要在启动时解析或建字典。
+
+缓存文件格式（小端）:
+    头部    4s魔数 H版本 H字段数 20s源文件SHA1 I车站数
+    偏移表  (车站数*字段数+1) 个uint32，指向字符串区
+    站名序  车站数个uint32，按站名UTF-8字节排序的记录下标
+    代码序  车站数个uint32，按车站代码排序的记录下标
+    字符串区 所有字段的UTF-8字节
+"""
+
+import hashlib
+import mmap
+import os
+import struct
+import sys
+from array import array
+
+_MAGIC = b'STN1'
+_FORMAT_VERSION = 1
+_HEADER = struct.Struct('<4sHH20sI')
+
+# 每条记录的字段: 站名、车站代码、全拼、拼音首字母
+_FIELD_NAME = 0
+_FIELD_CODE = 1
+_FIELD_PINYIN = 2
+_FIELD_ABBR = 3
+_FIELD_COUNT = 4
+
+_PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class StationDataError(Exception):
+    """车站数据文件无效"""
+
+
+def parse_station_js(text):
+    """
+    解析station_name.js
+
+    Args:
+        text: 文件内容
+
+    Returns:
+        list: [(站名, 车站代码, 全拼, 拼音首字母)]，按文件顺序去重
+    """
+    start = text.find("'")
+    end = text.rfind("'")
+    if 0 <= start < end:
+        text = text[start + 1:end]
+
+    records = []
+    seen = set()
+    for chunk in text.split('@'):
+        fields = chunk.split('|')
+        if len(fields) < 5 or not fields[1] or not fields[2]:
+            continue
+        name = fields[1]
+        if name in seen:
+            continue
+        seen.add(name)
+        records.append((name, fields[2], fields[3].lower(), fields[4].lower()))
+    return records
+
+
+def compile_station_table(records, source_digest):
+    """
+    将车站记录编译为二进制表
+
+    Args:
+        records: parse_station_js返回的记录
+        source_digest: 源文件SHA1（20字节）
+
+    Returns:
+        bytes: 二进制表内容
+    """
+    blob = bytearray()
+    offsets = array('I', [0])
+    for record in records:
+        for field in record:
+            blob += field.encode('utf-8')
+            offsets.append(len(blob))
+
+    count = len(records)
+    names = [record[_FIELD_NAME].encode('utf-8') for record in records]
+    codes = [record[_FIELD_CODE].encode('utf-8') for record in records]
+    name_order = array('I', sorted(range(count), key=names.__getitem__))
+    code_order = array('I', sorted(range(count), key=codes.__getitem__))
+
+    if sys.byteorder != 'little':
+        for arr in (offsets, name_order, code_order):
+            arr.byteswap()
+
+    header = _HEADER.pack(_MAGIC, _FORMAT_VERSION, _FIELD_COUNT, source_digest, count)
+    return b''.join([header, offsets.tobytes(), name_order.tobytes(), code_order.tobytes(), bytes(blob)])
+
+
+def _uint32_array(view, start, count):
+    """从缓冲区读取uint32数组，小端机器上直接映射不复制"""
+    section = view[start:start + count * 4]
+    if sys.byteorder == 'little' and array('I').itemsize == 4:
+        return section.cast('I')
+    values = array('I')
+    if values.itemsize != 4:
+        values = array('L')
+    values.frombytes(bytes(section))
+    if sys.byteorder != 'little':
+        values.byteswap()
+    return values
+
+
+class StationTable:
+    """只读的紧凑车站表"""
+
+    def __init__(self, buffer):
+        """
+        Args:
+            buffer: compile_station_table生成的内容（bytes或mmap）
+        """
+        if len(buffer) < _HEADER.size:
+            raise StationDataError("车站数据文件过短")
+        magic, version, field_count, digest, count = _HEADER.unpack_from(buffer, 0)
+        if magic != _MAGIC or version != _FORMAT_VERSION or field_count != _FIELD_COUNT:
+            raise StationDataError("车站数据文件格式不匹配")
+
+        self._buffer = buffer
+        self.digest = digest
+        self.count = count
+
+        view = memoryview(buffer)
+        pos = _HEADER.size
+        self._offsets = _uint32_array(view, pos, count * _FIELD_COUNT + 1)
+        pos += (count * _FIELD_COUNT + 1) * 4
+        self._name_order = _uint32_array(view, pos, count)
+        pos += count * 4
+        self._code_order = _uint32_array(view, pos, count)
+        pos += count * 4
+        self._blob = view[pos:]
+
+        if len(self._blob) != self._offsets[-1]:
+            raise StationDataError("车站数据文件已损坏")
+
+    def __len__(self):
+        return self.count
+
+    def _raw(self, index, field):
+        key = index * _FIELD_COUNT + field
+        return self._blob[self._offsets[key]:self._offsets[key + 1]]
+
+    def field(self, index, field):
+        return str(self._raw(index, field), 'utf-8')
+
+    def record(self, index):
+        """返回 (站名, 车站代码, 全拼, 拼音首字母)"""
+        return tuple(self.field(index, field) for field in range(_FIELD_COUNT))
+
+    def _bisect(self, order, field, target):
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if bytes(self._raw(order[mid], field)) < target:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < self.count and bytes(self._raw(order[lo], field)) == target:
+            return order[lo]
+        return None
+
+    def code_of(self, name):
+        """站名 -> 车站代码"""
+        index = self._bisect(self._name_order, _FIELD_NAME, name.encode('utf-8'))
+        return None if index is None else self.field(index, _FIELD_CODE)
+
+    def name_of(self, code):
+        """车站代码 -> 站名"""
+        index = self._bisect(self._code_order, _FIELD_CODE, code.encode('utf-8'))
+        return None if index is None else self.field(index, _FIELD_NAME)
+
+    def close(self):
+        """释放映射"""
+        for arr in (self._offsets, self._name_order, self._code_order, self._blob):
+            if isinstance(arr, memoryview):
+                arr.release()
+        if isinstance(self._buffer, mmap.mmap):
+            self._buffer.close()
+
+
+def _map_file(path):
+    with open(path, 'rb') as f:
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def _write_atomic(path, data):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def load_station_table(source_path, cache_path=None):
+    """
+    加载车站表
+
+    缓存存在且源文件哈希一致时直接映射缓存；否则解析源文件、重新编译并写入缓存。
+
+    Args:
+        source_path: station_name.js路径
+        cache_path: 二进制缓存路径，默认与源文件同目录的 .bin 文件
+
+    Returns:
+        StationTable: 车站表
+
+    Raises:
+        OSError: 源文件无法读取
+        StationDataError: 源文件中没有有效的车站记录
+    """
+    cache_path = cache_path or os.path.splitext(source_path)[0] + '.bin'
+
+    with open(source_path, 'rb') as f:
+        raw = f.read()
+    digest = hashlib.sha1(raw).digest()
+
+    if os.path.exists(cache_path):
+        try:
+            mapped = _map_file(cache_path)
+        except (OSError, ValueError):
+            mapped = None
+        if mapped is not None:
+            try:
+                table = StationTable(mapped)
+            except StationDataError:
+                mapped.close()
+            else:
+                if table.digest == digest:
+                    return table
+                table.close()
+
+    records = parse_station_js(raw.decode('utf-8', errors='replace'))
+    if not records:
+        raise StationDataError(f"{source_path} 中没有有效的车站记录")
+
+    data = compile_station_table(records, digest)
+    try:
+        _write_atomic(cache_path, data)
+        return StationTable(_map_file(cache_path))
+    except OSError:
+        # 缓存目录不可写时直接使用内存中的表
+        return StationTable(data)
+
+
+def resolve_data_path(path):
+    """相对路径按项目根目录解析"""
+    if os.path.isabs(path):
+        return path
+    return os.path.join(_PROJECT_ROOT, path)
@@ -0,0 +1,359 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""车站索引模块"""
+
+import bisect
+import difflib
+import os
+import threading
+
+from .logger import get_logger
+
+# GB2312一级汉字按拼音排序，各声母首字的区位码
+_GB2312_INITIAL_STARTS = (
+    0xB0A1, 0xB0C5, 0xB2C1, 0xB4EE, 0xB6EA, 0xB7A2, 0xB8C1, 0xB9FE, 0xBBF7,
+    0xBFA6, 0xC0AC, 0xC2E8, 0xC4C3, 0xC5B6, 0xC5BE, 0xC6DA, 0xC8BB, 0xC8F6,
+    0xCBFA, 0xCDDA, 0xCEF4, 0xD1B9, 0xD4D1,
+)
+_GB2312_INITIALS = 'abcdefghjklmnopqrstwxyz'
+_GB2312_LEVEL1_END = 0xD7F9
+
+# 站名中常见的多音字
+_POLYPHONE_INITIALS = {
+    '重': 'c',
+    '长': 'c',
+    '厦': 'x',
+    '蚌': 'b',
+    '六': 'l',
+}
+
+
+def pinyin_initial(char):
+    """获取单个汉字的拼音首字母，无法识别时返回None"""
+    if char.isascii():
+        return char.lower() if char.isalnum() else None
+
+    initial = _POLYPHONE_INITIALS.get(char)
+    if initial:
+        return initial
+
+    try:
+        encoded = char.encode('gb2312')
+    except UnicodeEncodeError:
+        return None
+    if len(encoded) != 2:
+        return None
+
+    code = (encoded[0] << 8) | encoded[1]
+    if code < _GB2312_INITIAL_STARTS[0] or code > _GB2312_LEVEL1_END:
+        return None
+    return _GB2312_INITIALS[bisect.bisect_right(_GB2312_INITIAL_STARTS, code) - 1]
+
+
+def pinyin_initials(name):
+    """获取站名的拼音首字母缩写，含无法识别的字时返回None"""
+    initials = []
+    for char in name:
+        initial = pinyin_initial(char)
+        if initial is None:
+            return None
+        initials.append(initial)
+    return ''.join(initials)
+
+
+class _TrieNode:
+    """前缀树节点"""
+
+    __slots__ = ('children', 'names')
+
+    def __init__(self):
+        self.children = {}
+        self.names = []
+
+
+class StationIndex:
+    """
+    车站索引
+
+    提供站名与车站代码的双向常数时间查找，站名/拼音/拼音首字母的前缀搜索，
+    以及输错站名时的模糊候选。
+
+    可以由StationTable支撑：此时站名与代码的查找直接在映射的表上进行，
+    字典和前缀树在第一次需要时才构建，启动开销与车站数量无关。
+    """
+
+    def __init__(self, table=None):
+        """
+        Args:
+            table: StationTable车站表，可选
+        """
+        self._table = table
+        self._name_to_code = {}
+        self._code_to_name = {}
+        self._materialized = table is None
+        # 多个任务线程可能同时第一次查询，展开字典和构建前缀树在锁内进行
+        self._lock = threading.RLock()
+        # 尚未加入前缀树的 (站名, 全拼, 拼音首字母)
+        self._pending = []
+        self._root = _TrieNode()
+        # 拼音首字母/全拼 -> 站名列表，用于模糊匹配
+        self._aliases = {}
+
+    @classmethod
+    def from_mapping(cls, mapping):
+        """从 {站名: 车站代码} 映射构建索引"""
+        index = cls()
+        for name, code in mapping.items():
+            index.add(name, code)
+        return index
+
+    def _materialize(self):
+        """将车站表展开为字典（字典填充完成后才置位，其他线程此前仍直接查表）"""
+        if self._materialized:
+            return
+        with self._lock:
+            if self._materialized:
+                return
+            for idx in range(len(self._table)):
+                name, code, pinyin, abbr = self._table.record(idx)
+                self._add_entry(name, code, pinyin, abbr)
+            self._materialized = True
+
+    def _add_entry(self, name, code, pinyin, abbr):
+        if name in self._name_to_code:
+            return
+        self._name_to_code[name] = code
+        self._code_to_name.setdefault(code, name)
+        self._pending.append((name, pinyin, abbr))
+
+    def add(self, name, code, pinyin=None, abbr=None):
+        """
+        添加车站
+
+        Args:
+            name: 站名
+            code: 车站代码
+            pinyin: 全拼（如 beijingnan），可选
+            abbr: 拼音首字母（如 bjn），未提供时按汉字推算
+        """
+        with self._lock:
+            self._materialize()
+            self._add_entry(name, code, pinyin, abbr)
+
+    def _ensure_trie(self):
+        """把新增的车站加入前缀树"""
+        self._materialize()
+        if not self._pending:
+            return
+        with self._lock:
+            for name, pinyin, abbr in self._pending:
+                abbr = abbr or pinyin_initials(name)
+                keys = {name}
+                for alias in (abbr, pinyin):
+                    if alias:
+                        alias = alias.lower()
+                        keys.add(alias)
+                        self._aliases.setdefault(alias, []).append(name)
+
+                for key in keys:
+                    self._insert(key, name)
+            self._pending.clear()
+
+    def _insert(self, key, name):
+        node = self._root
+        for char in key:
+            child = node.children.get(char)
+            if child is None:
+                child = node.children[char] = _TrieNode()
+            node = child
+        node.names.append(name)
+
+    @property
+    def name_to_code(self):
+        """{站名: 车站代码}"""
+        self._materialize()
+        return self._name_to_code
+
+    @property
+    def code_to_name(self):
+        """{车站代码: 站名}"""
+        self._materialize()
+        return self._code_to_name
+
+    def code_of(self, name):
+        """站名 -> 车站代码"""
+        if not self._materialized:
+            return self._table.code_of(name)
+        return self._name_to_code.get(name)
+
+    def name_of(self, code):
+        """车站代码 -> 站名"""
+        if not self._materialized:
+            return self._table.name_of(code)
+        return self._code_to_name.get(code)
+
+    def __len__(self):
+        if not self._materialized:
+            return len(self._table)
+        return len(self._name_to_code)
+
+    def __contains__(self, name):
+        return self.code_of(name) is not None
+
+    def search(self, prefix, limit=10):
+        """
+        前缀搜索
+
+        Args:
+            prefix: 站名、全拼或拼音首字母前缀
+            limit: 最多返回的数量
+
+        Returns:
+            list: 站名列表，完整匹配的键越短越靠前
+        """
+        prefix = prefix.strip().lower()
+        if not prefix:
+            return []
+
+        self._ensure_trie()
+        node = self._root
+        for char in prefix:
+            node = node.children.get(char)
+            if node is None:
+                return []
+
+        # 按层遍历，较短的键（更接近输入）排在前面
+        results = []
+        seen = set()
+        level = [node]
+        while level and len(results) < limit:
+            next_level = []
+            for current in level:
+                for name in current.names:
+                    if name not in seen:
+                        seen.add(name)
+                        results.append(name)
+                next_level.extend(current.children[char] for char in sorted(current.children))
+            level = next_level
+        return results[:limit]
+
+    def suggest(self, query, limit=5, cutoff=0.5):
+        """
+        模糊候选
+
+        先取前缀匹配，再按相似度补充，用于站名输错时给出建议。
+
+        Args:
+            query: 用户输入
+            limit: 最多返回的数量
+            cutoff: 相似度下限 (0-1)
+
+        Returns:
+            list: 按相关度排序的站名列表
+        """
+        query = query.strip()
+        if not query:
+            return []
+
+        results = self.search(query, limit)
+        if len(results) >= limit:
+            return results
+
+        key = query.lower()
+        if key.isascii():
+            pool = self._aliases
+        else:
+            pool = self._name_to_code
+
+        matcher = difflib.SequenceMatcher()
+        matcher.set_seq2(key)
+        scored = []
+        for candidate in pool:
+            matcher.set_seq1(candidate)
+            if (matcher.real_quick_ratio() >= cutoff and
+                    matcher.quick_ratio() >= cutoff):
+                ratio = matcher.ratio()
+                if ratio >= cutoff:
+                    scored.append((-ratio, len(candidate), candidate))
+        scored.sort()
+
+        seen = set(results)
+        for _, _, candidate in scored:
+            names = pool[candidate] if pool is self._aliases else (candidate,)
+            for name in names:
+                if name not in seen:
+                    seen.add(name)
+                    results.append(name)
+            if len(results) >= limit:
+                break
+        return results[:limit]
+
+    def resolve(self, query):
+        """
+        解析用户输入的车站
+
+        依次尝试：完整站名、车站代码、唯一匹配的全拼或拼音首字母。
+
+        Returns:
+            tuple: (站名, 车站代码)，无法唯一确定时返回 (None, None)
+        """
+        query = query.strip()
+        code = self.code_of(query)
+        if code:
+            return query, code
+
+        name = self.name_of(query.upper())
+        if name:
+            return name, query.upper()
+
+        self._ensure_trie()
+        names = self._aliases.get(query.lower())
+        if names and len(names) == 1:
+            return names[0], self._name_to_code[names[0]]
+
+        return None, None
+
+
+_shared_index = None
+_shared_lock = threading.Lock()
+
+
+def load_station_index(source_path=None, cache_path=None):
+    """
+    加载车站索引
+
+    优先使用全国车站数据文件（station_name.js），文件不存在或无效时
+    退回内置的常用车站映射。
+
+    Args:
+        source_path: station_name.js路径，默认取STATION_CONFIG配置
+        cache_path: 二进制缓存路径，默认取STATION_CONFIG配置
+
+    Returns:
+        StationIndex: 车站索引
+    """
+    from config import STATION_CONFIG
+    from .station_data import load_station_table, resolve_data_path, StationDataError
+
+    source_path = resolve_data_path(source_path or STATION_CONFIG['source'])
+    cache_path = resolve_data_path(cache_path or STATION_CONFIG['cache'])
+
+    if os.path.exists(source_path):
+        try:
+            return StationIndex(load_station_table(source_path, cache_path))
+        except (OSError, StationDataError) as e:
+            get_logger('12306').warning(f"加载车站数据失败，使用内置车站列表: {e}")
+
+    from .station_mapping import STATION_MAPPING
+    return StationIndex.from_mapping(STATION_MAPPING)
+
+
+def get_station_index():
+    """获取进程内共享的车站索引（首次调用时加载）"""
+    global _shared_index
+    if _shared_index is None:
+        with _shared_lock:
+            if _shared_index is None:
+                _shared_index = load_station_index()
+    return _shared_index
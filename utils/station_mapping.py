@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+内置车站代码表
+
+只在没有车站数据文件（STATION_CONFIG['source']）时用于构建车站索引，按需导入。
+"""
+
+# 全国车站代码映射表
+STATION_MAPPING = {
+    "北京北": "VAP", "北京东": "BOP", "北京": "BJP", "北京南": "VNP", "北京西": "BXP",
+    "广州南": "IZQ", "重庆北": "CUW", "重庆": "CQW", "重庆南": "CRW", "重庆西": "CXW",
+    "广州东": "GGQ", "上海": "SHH", "上海南": "SNH", "上海虹桥": "AOH", "上海西": "SXH",
+    "天津北": "TBP", "天津": "TJP", "天津南": "TIP", "天津西": "TXP", "香港西九龙": "XJA",
+    "长春": "CCT", "长春南": "CET", "长春西": "CRT", "成都东": "ICW", "成都南": "CNW",
+    "成都": "CDW", "长沙": "CSQ", "长沙南": "CWQ", "大明湖": "JAK", "福州": "FZS",
+    "福州南": "FYS", "贵阳": "GIW", "广州": "GZQ", "广州西": "GXQ", "哈尔滨": "HBB",
+    "哈尔滨东": "VBB", "哈尔滨西": "VAB", "合肥": "HFH", "合肥西": "HTH", "呼和浩特东": "NDC",
+    "呼和浩特": "HHC", "海口东": "HMQ", "海口": "VUQ", "杭州东": "HGH", "杭州": "HZH",
+    "杭州南": "XHH", "济南": "JNK", "济南西": "JGK", "昆明": "KMM", "昆明西": "KXM",
+    "拉萨": "LSO", "兰州东": "LVJ", "兰州": "LZJ", "兰州西": "LAJ", "南昌": "NCG",
+    "南京": "NJH", "南京南": "NKH", "南宁": "NNZ", "石家庄北": "VVP", "石家庄": "SJP",
+    "沈阳": "SYT", "沈阳北": "SBT", "沈阳东": "SDT", "沈阳南": "SOT", "太原北": "TBV",
+    "太原东": "TDV", "太原": "TYV", "武汉": "WHN", "王家营西": "KNM", "乌鲁木齐": "WAR",
+    "西安北": "EAY", "西安": "XAY", "西安南": "CAY", "西宁": "XNO", "银川": "YIJ",
+    "郑州": "ZZF", "阿尔山": "ART", "安康": "AKY", "阿克苏": "ASR", "阿里河": "AHX",
+    "阿拉山口": "AKR", "安平": "APT", "安庆": "AQH", "安顺": "ASW", "鞍山": "AST",
+    "安阳": "AYF", "北安": "BAB", "蚌埠": "BBH", "白城": "BCT", "北海": "BHZ",
+    "白河": "BEL", "白涧": "BAP", "宝鸡": "BJY", "滨江": "BJB", "博克图": "BKX",
+    "百色": "BIZ", "白山市": "HJL", "北台": "BTT", "包头东": "BDC", "包头": "BTC",
+    "北屯市": "BXR", "本溪": "BXT", "白云鄂博": "BEC", "白银西": "BXJ", "亳州": "BZH",
+    "赤壁": "CBN", "常德": "VGQ", "承德": "CDP", "长甸": "CDT", "赤峰南": "CFD",
+    "茶陵": "CDG", "苍南": "CEH", "昌平": "CPP", "崇仁": "CRG", "昌图": "CTT",
+    "长汀镇": "CDB", "曹县": "CXK", "楚雄南": "COM", "陈相屯": "CXT", "长治北": "CBF",
+    "池州": "IYH", "长征": "CZJ", "常州": "CZH", "郴州": "CZQ", "长治": "CZF",
+    "沧州": "COP", "崇左": "CZZ", "大安北": "RNT", "大成": "DCT", "丹东": "DUT",
+    "东方红": "DFB", "东莞东": "DMQ", "大虎山": "DHD", "敦化": "DHL", "敦煌": "DHJ",
+    "德惠": "DHT", "东京城": "DJB", "大涧": "DFP", "都江堰": "DDW", "大连北": "DFT",
+    "大理": "DKM", "大连": "DLT", "定南": "DNG", "大庆": "DZX", "东胜": "DOC",
+    "大石桥": "DQT", "大同": "DTV", "东营": "DPK", "大杨树": "DUX", "都匀": "RYW",
+    "邓州": "DOF", "达州": "RXW", "德州": "DZP", "额济纳": "EJC", "二连": "RLC",
+    "恩施": "ESN", "福鼎": "FES", "凤凰机场": "FJQ", "风陵渡": "FLV", "涪陵": "FLW",
+    "富拉尔基": "FRX", "抚顺北": "FET", "佛山": "FSQ", "阜新南": "FXD", "阜阳": "FYH",
+    "格尔木": "GRO", "广汉": "GHW", "古交": "GJV", "桂林北": "GBZ", "古莲": "GRX",
+    "桂林": "GLZ", "固始": "GXN", "广水": "GSN", "干塘": "GNJ", "广元": "GYW",
+    "广州北": "GBQ", "赣州": "GZG", "公主岭": "GLT", "公主岭南": "GBT", "淮安": "AUH",
+    "淮北": "HRH", "鹤北": "HMB", "淮滨": "HVN", "河边": "HBV", "潢川": "KCN",
+    "韩城": "HCY", "邯郸": "HDP", "横道河子": "HDB", "鹤岗": "HGB", "皇姑屯": "HTT",
+    "红果": "HEM", "黑河": "HJB", "怀化": "HHQ", "汉口": "HKN", "葫芦岛": "HLD",
+    "海拉尔": "HRX", "霍林郭勒": "HWD", "海伦": "HLB", "侯马": "HMV", "哈密": "HMR",
+    "淮南": "HAH", "桦南": "HNB", "海宁西": "EUH", "鹤庆": "HQM", "怀柔北": "HBP",
+    "怀柔": "HRP", "黄石东": "OSN", "华山": "HSY", "黄山": "HKH", "黄石": "HSN",
+    "衡水": "HSP", "衡阳": "HYQ", "菏泽": "HIK", "贺州": "HXZ", "汉中": "HOY",
+    "惠州": "HCQ", "吉安": "VAG", "集安": "JAL", "江边村": "JBG", "晋城": "JCF",
+    "金城江": "JJZ", "景德镇": "JCG", "嘉峰": "JFF", "加格达奇": "JGX", "井冈山": "JGG",
+    "蛟河": "JHL", "金华南": "RNH", "金华": "JBH", "九江": "JJG", "吉林": "JLL",
+    "荆门": "JMN", "佳木斯": "JMB", "济宁": "JIK", "集宁南": "JAC", "酒泉": "JQJ",
+    "江山": "JUH", "吉首": "JIQ", "九台": "JTL", "镜铁山": "JVJ", "鸡西": "JXB",
+    "绩溪县": "JRH", "嘉峪关": "JGJ", "江油": "JFW", "蓟州北": "JKP", "金州": "JZT",
+    "锦州": "JZD", "库尔勒": "KLR", "开封": "KFF", "岢岚": "KLV", "凯里": "KLW",
+    "喀什": "KSR", "昆山南": "KNH", "奎屯": "KTR", "开原": "KYT", "六安": "UAH",
+    "灵宝": "LBF", "芦潮港": "UCH", "陆川": "LKZ", "利川": "LCN", "隆昌": "LCW",
+    "临川": "LCG", "潞城": "UTP", "鹿道": "LDL", "娄底": "LDQ", "临汾": "LFV",
+    "良各庄": "LGP", "临河": "LHC", "漯河": "LON", "绿化": "LWJ", "隆化": "UHP",
+    "丽江": "LHM", "临江": "LQL", "龙井": "LJL", "吕梁": "LHV", "醴陵": "LLG",
+    "柳林南": "LKV", "滦平": "UPP", "六盘水": "UMW", "灵丘": "LVV", "旅顺": "LST",
+    "兰溪": "LWH", "陇西": "LXJ", "澧县": "LEQ", "临西": "UEP", "龙岩": "LYS",
+    "耒阳": "LYQ", "洛阳": "LYF", "连云港东": "UKH", "洛阳东": "LDF", "临沂": "LVK",
+    "洛阳龙门": "LLF", "柳园": "DHR", "凌源": "LYD", "辽源": "LYL", "立志": "LZX",
+    "柳州": "LZZ", "辽中": "LZD", "麻城": "MCN", "免渡河": "MDX", "牡丹江": "MDB",
+    "莫尔道嘎": "MRX", "明光": "MGH", "满归": "MHX", "漠河": "MVX", "茂名": "MDQ",
+    "茂名西": "MMZ", "密山": "MSB", "马三家": "MJT", "麻尾": "VAW", "绵阳": "MYW",
+    "梅州": "MOQ", "满洲里": "MLX", "宁波东": "NVH", "宁波": "NGH", "南岔": "NCB",
+    "南充": "NCW", "南丹": "NDZ", "南大庙": "NMP", "南芬": "NFT", "讷河": "NHX",
+    "嫩江": "NGX", "内江": "NJW", "南通": "NUH", "南阳": "NFF", "碾子山": "NZX",
+    "平顶山": "PEN", "盘锦": "PVD", "平凉": "PIJ", "平凉南": "POJ", "平泉": "PQP",
+    "坪石": "PSQ", "萍乡": "PXG", "凭祥": "PXZ", "郫县西": "PCW", "攀枝花": "PRW",
+    "蕲春": "QRN", "青城山": "QSW", "青岛": "QDK", "清河城": "QYP", "曲靖": "QJM",
+    "黔江": "QNW", "前进镇": "QEB", "齐齐哈尔": "QHX", "七台河": "QTB", "沁县": "QVV",
+    "泉州东": "QRS", "泉州": "QYS", "衢州": "QEH", "融安": "RAZ", "汝箕沟": "RQJ",
+    "瑞金": "RJG", "日照": "RZK", "双城堡": "SCB", "绥芬河": "SFB", "韶关东": "SGQ",
+    "山海关": "SHD", "绥化": "SHB", "三间房": "SFX", "苏家屯": "SXT", "舒兰": "SLL",
+    "神木南": "OMY", "三门峡": "SMF", "商南": "ONY", "遂宁": "NIW", "四平": "SPT",
+    "商丘": "SQF", "上饶": "SRG", "韶山": "SSQ", "宿松": "OAH", "汕头": "OTQ",
+    "邵武": "SWS", "涉县": "OEP", "邵阳": "SYQ", "三亚": "SEQ", "十堰": "SNN",
+    "三元区": "SMS", "双鸭山": "SSB", "松原": "VYT", "苏州": "SZH", "深圳": "SZQ",
+    "宿州": "OXH", "随州": "SZN", "朔州": "SUV", "深圳西": "OSQ", "塘豹": "TBQ",
+    "塔尔气": "TVX", "潼关": "TGY", "塘沽": "TGP", "塔河": "TXX", "通化": "THL",
+    "泰来": "TLX", "吐鲁番": "TFR", "通辽": "TLD", "铁岭": "TLT", "陶赖昭": "TPT",
+    "图们": "TML", "铜仁": "RDQ", "唐山北": "FUP", "田师府": "TFT", "泰山": "TAK",
+    "唐山": "TSP", "天水": "TSJ", "通远堡": "TYT", "太阳升": "TQT", "泰州": "UTH",
+    "桐梓": "TZW", "通州西": "TAP", "五常": "WCB", "武昌": "WCN", "瓦房店": "WDT",
+    "威海": "WKK", "芜湖": "WHH", "乌海西": "WXC", "吴家屯": "WJT", "乌鲁木齐南": "WMR",
+    "武隆": "WLW", "乌兰浩特": "WWT", "渭南": "WNY", "威舍": "WSM", "歪头山": "WIT",
+    "武威": "WUJ", "武威南": "WWJ", "无锡": "WXH", "乌西": "WXR", "乌伊岭": "WPB",
+    "武夷山": "WAS", "万源": "WYY", "万州": "WYW", "梧州": "WZZ", "温州": "RZH",
+    "温州南": "VRH", "西昌": "ECW", "许昌": "XCF", "西昌南": "ENW", "锡林浩特": "XTC",
+    "厦门北": "XKS", "厦门": "XMS", "厦门高崎": "XBS", "宣威": "XWM", "新乡": "XXF",
+    "信阳": "XUN", "咸阳": "XYY", "襄阳": "XFN", "熊岳城": "XYT", "新余": "XUG",
+    "徐州": "XCH", "延安": "YWY", "宜宾": "YBW", "亚布力南": "YWB", "叶柏寿": "YBD",
+    "宜昌东": "HAN", "永川": "YCW", "盐城": "AFH", "宜昌": "YCN", "运城": "YNV",
+    "伊春": "YCB", "榆次": "YCV", "杨村": "YBP", "宜春西": "YCG", "伊尔施": "YET",
+    "燕岗": "YGW", "永济": "YIV", "延吉": "YJL", "营口": "YKT", "牙克石": "YKX",
+    "玉林": "YLZ", "阎良": "YNY", "榆林": "ALY", "亚龙湾": "TWQ", "一面坡": "YPB",
+    "伊宁": "YMR", "阳平关": "YAY", "玉屏": "YZW", "原平": "YPV", "延庆": "YNP",
+    "阳泉曲": "YYV", "玉泉": "YQB", "阳泉": "AQP", "营山": "NUW", "玉山": "YNG",
+    "燕山": "AOP", "榆树": "YRT", "烟台": "YAK", "鹰潭": "YTG", "伊图里河": "YEX",
+    "玉田县": "ATP", "义乌": "YWH", "阳新": "YON", "义县": "YXD", "益阳": "AEQ",
+    "岳阳": "YYQ", "崖州": "YUQ", "扬州": "YLH", "永州": "AOQ", "淄博": "ZBK",
+    "镇城底": "ZDV", "自贡": "ZGW", "珠海": "ZHQ", "珠海北": "ZIQ", "湛江": "ZJZ",
+    "镇江": "ZJH", "张家界": "DIQ", "张家口": "ZMP", "周口": "ZKN", "扎兰屯": "ZTX",
+    "驻马店": "ZDN", "肇庆": "ZVQ", "周水子": "ZIT", "昭通": "ZDW", "中卫": "ZWJ",
+    "资阳": "ZYW", "遵义西": "ZIW", "枣庄": "ZEK", "资中": "ZZW", "株洲": "ZZQ",
+    "枣庄西": "ZFK", "昂昂溪": "AAX", "阿城": "ACB", "安达": "ADX", "安德": "ARW",
+    "安定": "ADP", "安多": "ADO", "安广": "AGT", "敖汉": "YED", "艾河": "AHP",
+    "安化": "PKQ", "艾家村": "AJJ", "安家": "AJB", "阿金": "AJD", "安靖": "PYW",
+    "阿克陶": "AER", "安口窑": "AYY", "敖力布告": "ALD", "安龙": "AUZ", "阿龙山": "ASX",
+    "安陆": "ALN", "阿木尔": "JTX", "阿南庄": "AZM", "安庆西": "APH", "鞍山西": "AXT",
+    "安塘": "ATV", "安亭北": "ASH", "阿图什": "ATR", "安图": "ATL", "安溪": "AXS",
+    "博鳌": "BWQ", "北碚": "BPW", "白壁关": "BGV", "蚌埠南": "BMH", "巴楚": "BCR",
+    "板城": "BUP", "北戴河": "BEP", "保定": "BDP", "宝坻": "BPP", "八达岭": "ILP",
+    "巴东": "BNN", "宝丰": "BFF", "柏果": "BGM", "布海": "BUT", "白河东": "BIY",
+    "宝华山": "BWH", "白河县": "BEY", "白芨沟": "BJJ", "碧鸡关": "BJM", "北滘": "IBQ",
+    "碧江": "BLQ", "白鸡坡": "BBM", "笔架山": "BSB", "八角台": "BTD", "保康": "BKD",
+    "白奎堡": "BKB", "白狼": "BAT", "百浪": "BRZ", "博乐": "BOR", "巴林": "BLX",
+    "宝林": "BNB", "北流": "BOZ", "勃利": "BLB", "布列开": "BLR", "宝龙山": "BND",
+    "百里峡": "AAP", "八面城": "BMD", "班猫箐": "BNM", "八面通": "BMB", "北马圈子": "BRP",
+    "北票南": "RPD", "白旗": "BQP", "宝泉岭": "BQB", "白泉": "BQL", "巴山": "BAY",
+    "白水江": "BSY", "白沙坡": "BPM", "白石山": "BAL", "白水镇": "BUM", "包头 东": "FDC",
+    "坂田": "BTQ", "泊头": "BZP", "北屯": "BYP", "本溪湖": "BHT", "博兴": "BXK",
+    "八仙筒": "VXD", "白音察干": "BYC", "背荫河": "BYB", "北营": "BIV", "巴彦高勒": "BAC",
+    "白音他拉": "BID", "鲅鱼圈": "BYT", "白银市": "BNJ", "白音胡硕": "BCD", "巴中": "IEW",
+    "霸州": "RMP", "北宅": "BVP", "赤壁北": "CIN", "查布嘎": "CBC", "长城": "CEJ",
+    "长冲": "CCM", "承德东": "CCP", "赤峰": "CID", "嵯岗": "CAX", "柴岗": "CGT",
+    "长葛": "CEF", "柴沟堡": "CGV", "城固": "CGY", "陈官营": "CAJ", "成高子": "CZB",
+    "草海": "WBW", "柴河": "CHB", "册亨": "CHZ", "草河口": "CKT", "崔黄口": "CHP",
+    "巢湖": "CIH", "蔡家沟": "CJT", "成吉思汗": "CJX", "岔江": "CAM", "蔡家坡": "CJY",
+    "昌乐": "CLK", "超梁沟": "CYP", "慈利": "CUQ", "昌黎": "CLP", "长岭子": "CLT",
+    "晨明": "CMB", "长农": "CNJ", "昌平北": "VBP", "常平": "DAQ", "长坡岭": "CPM",
+    "辰清": "CQB", "蔡山": "CON", "楚山": "CSB", "长寿": "EFW", "磁山": "CSP",
+    "苍石": "CST", "草市": "CSL", "察素齐": "CSC", "长山屯": "CVT", "长汀": "CES",
+    "朝天南": "CTY", "昌图西": "CPT", "春湾": "CQQ", "磁县": "CIP", "岑溪": "CNZ",
+    "辰溪": "CXQ", "磁西": "CRP", "长兴南": "CFH", "磁窑": "CYK", "春阳": "CAL",
+    "城阳": "CEK", "创业村": "CEX", "朝阳川": "CYL", "朝阳地": "CDD", "朝阳南": "CYD",
+    "长垣": "CYF", "朝阳镇": "CZL", "滁州北": "CUH", "常州北": "ESH", "滁州": "CXH",
+    "潮州": "CKQ", "常庄": "CVK", "曹子里": "CFP", "车转湾": "CWM", "郴州西": "ICQ",
+    "沧州西": "CBP", "德安": "DAG", "大安": "RAT", "大坝": "DBJ", "大板": "DBC",
+    "大巴": "DBD", "电白": "NWQ", "到保": "RBT", "达坂城": "DCR", "定边": "DYJ",
+    "东边井": "DBB", "德伯斯": "RDT", "打柴沟": "DGJ", "德昌": "DVW", "滴道": "DDB",
+    "大磴沟": "DKJ", "刀尔登": "DRD", "得耳布尔": "DRX", "杜尔伯特": "TKX", "东方": "UFQ",
+    "丹凤": "DGY", "东丰": "DIL", "宝应": "BAU"
+}